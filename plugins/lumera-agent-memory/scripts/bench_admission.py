@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Store bursts with and without admission control.
+
+Usage:
+    python scripts/bench_admission.py [--sessions N] [--output-kb KB]
+        [--put-ms MS] [--limit N] [--max-mb MB]
+
+Fires --sessions store_session_to_cascade calls at once (agents storing at
+the end of a shared incident) into a fresh index and mock Cascade, while
+one client keeps querying. Runs once with every call admitted and once
+with at most --limit stores and --max-mb of session bytes in flight.
+Reports wall time, outcomes, peak Python heap (tracemalloc; the derivation
+cache is off so that it measures what calls in flight hold) and query
+latency during the burst.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("LUMERA_MEMORY_KEY", os.urandom(32).hex())
+
+import src.mcp_server as server  # noqa: E402
+from scripts.bench_backfill import make_sessions  # noqa: E402
+from scripts.bench_batch_store import fresh_server  # noqa: E402
+from src.pipeline import AdmissionController  # noqa: E402
+
+
+async def call(name, arguments):
+    return json.loads((await server.call_tool(name, arguments))[0].text)
+
+
+async def burst(session_ids):
+    stores = asyncio.ensure_future(
+        asyncio.gather(*(call("store_session_to_cascade", {"session_id": s}) for s in session_ids))
+    )
+    latencies = []
+    while not stores.done():
+        start = time.perf_counter()
+        result = await call("query_memories", {"query": "error"})
+        assert result["ok"], result
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return await stores, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--output-kb", type=int, default=128)
+    parser.add_argument("--put-ms", type=float, default=20)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--max-mb", type=float, default=8)
+    args = parser.parse_args()
+
+    corpus = make_sessions(args.sessions, args.output_kb, seed=3)
+    sessions = {s["session_id"]: s for s in corpus}
+    exported = {session_id: json.dumps(session) for session_id, session in sessions.items()}
+    store_tool = "store_session_to_cascade"
+    runs = (
+        ("no admission control", AdmissionController({store_tool: 0})),
+        (
+            f"limit {args.limit}, {args.max_mb:g} MB",
+            AdmissionController(
+                {store_tool: args.limit},
+                max_bytes=int(args.max_mb * 1024 * 1024),
+                byte_tools=(store_tool,),
+                queue_size=args.sessions,
+                max_wait=600,
+            ),
+        ),
+    )
+    print(f"burst of {args.sessions} x {args.output_kb} KB stores, put {args.put_ms:g} ms:")
+    for label, controller in runs:
+        with tempfile.TemporaryDirectory() as tmp:
+            fresh_server(Path(tmp) / "server", sessions, 0.0, args.put_ms / 1000)
+            # Each export parses its own copy, as the cm adapter does
+            server.cass.export_session = lambda session_id: json.loads(exported[session_id])
+            # Only what calls in flight hold counts, not derivations kept for reuse
+            server.derivation_cache.max_bytes = 0
+            server.admission = controller
+            tracemalloc.start()
+            start = time.perf_counter()
+            results, latencies = asyncio.run(burst(list(sessions)))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            server.index.close()
+
+        stored = sum(1 for r in results if r["ok"])
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"  {label:24s} {elapsed * 1000:8.0f} ms  stored {stored:4d}"
+            f"  peak heap {peak / 2**20:7.1f} MB"
+            f"  query p50 {statistics.median(latencies):6.1f} ms  p95 {p95:6.1f} ms"
+        )
+    server.executors.shutdown()
+
+
+if __name__ == "__main__":
+    main()
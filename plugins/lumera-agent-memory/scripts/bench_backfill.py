@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Backfill throughput for memory-card generation.
+
+Usage:
+    python scripts/bench_backfill.py [--sessions N] [--output-kb KB] [--per-day N]
+
+Generates cards for a synthetic corpus with per-session generate_memory_card()
+calls and with generate_memory_cards(), in plain term-frequency and TF-IDF
+modes, and projects the time to backfill a year of sessions. Multi-core
+hosts also fan the batch out across processes.
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.enrich import generate_memory_card, generate_memory_cards  # noqa: E402
+from src.index import DocumentFrequencies  # noqa: E402
+
+
+def make_sessions(count: int, output_kb: int, vocab_size: int = 20000, seed: int = 0) -> list:
+    """Sessions whose text draws from one Zipf-distributed vocabulary, like real logs."""
+    rng = random.Random(seed)
+    vocab = [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+        for _ in range(vocab_size)
+    ]
+    weights = [1 / (rank + 1) for rank in range(vocab_size)]
+    words_per_session = output_kb * 1024 // 7
+    return [
+        {
+            "session_id": f"backfill-{i}",
+            "tool_name": "pytest-runner",
+            "summary": "Ran the suite. Decided to pin numpy.",
+            "output": " ".join(rng.choices(vocab, weights, k=words_per_session)),
+        }
+        for i in range(count)
+    ]
+
+
+def make_df(sessions) -> DocumentFrequencies:
+    """DF snapshot as an index holding these sessions would have it."""
+    counts = Counter()
+    for session in sessions:
+        counts.update(set(session["output"].lower().split()))
+    return DocumentFrequencies(dict(counts), docs=len(sessions))
+
+
+def timed(label: str, fn, sessions: int, per_day: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    year = elapsed / sessions * per_day * 365
+    print(
+        f"  {label:<34} {sessions / elapsed:9.1f} sessions/s   year backfill ~{year / 60:6.1f} min"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--output-kb", type=int, default=8)
+    parser.add_argument("--per-day", type=int, default=200)
+    args = parser.parse_args()
+
+    sessions = make_sessions(args.sessions, args.output_kb)
+    print(
+        f"{args.sessions} sessions, {args.output_kb} KB output each, {os.cpu_count()} cores, "
+        f"{args.per_day} sessions/day"
+    )
+
+    print("\nKeyword ranking: tf")
+    timed(
+        "per-session generate_memory_card",
+        lambda: [generate_memory_card(s) for s in sessions],
+        args.sessions,
+        args.per_day,
+    )
+    timed(
+        "generate_memory_cards",
+        lambda: generate_memory_cards(sessions),
+        args.sessions,
+        args.per_day,
+    )
+
+    df = make_df(sessions)
+    print("\nKeyword ranking: tfidf")
+    # A fresh snapshot per call: idf recomputed for every (session, term)
+    timed(
+        "per-session, unshared DF snapshot",
+        lambda: [
+            generate_memory_card(s, df=DocumentFrequencies(df.counts, df.docs)) for s in sessions
+        ],
+        args.sessions,
+        args.per_day,
+    )
+    timed(
+        "generate_memory_cards",
+        lambda: generate_memory_cards(sessions, df=df),
+        args.sessions,
+        args.per_day,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""End-of-day ingest: per-session store calls vs. the pipelined batch store.
+
+Usage:
+    python scripts/bench_batch_store.py [--sessions N] [--output-kb KB]
+        [--export-ms MS] [--put-ms MS]
+
+Stores a synthetic corpus (see bench_backfill.make_sessions) once through
+store_session_to_cascade, one call per session, and once through a single
+store_sessions_to_cascade call, each into a fresh index and mock Cascade in
+a temporary directory. CASS export and Cascade upload latency are simulated
+with sleeps (a `cm export` subprocess, a network put); the batch overlaps
+them with redaction and card generation.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("LUMERA_MEMORY_KEY", os.urandom(32).hex())
+
+import src.mcp_server as server  # noqa: E402
+from scripts.bench_backfill import make_sessions  # noqa: E402
+from src.cascade import MockCascadeConnector  # noqa: E402
+from src.index import MemoryIndex  # noqa: E402
+
+
+class SlowCascade(MockCascadeConnector):
+    """Mock connector with fixed upload and download latencies."""
+
+    def __init__(self, cache_dir: Path, put_seconds: float, get_seconds: float = 0.0):
+        super().__init__(cache_dir)
+        self.put_seconds = put_seconds
+        self.get_seconds = get_seconds
+
+    def put(self, data: bytes) -> str:
+        time.sleep(self.put_seconds)
+        return super().put(data)
+
+    def get(self, pointer: str) -> bytes:
+        time.sleep(self.get_seconds)
+        return super().get(pointer)
+
+
+def fresh_server(root: Path, sessions: dict, export_seconds: float, put_seconds: float):
+    """Point the server module at an empty index/store and a slow exporter."""
+
+    def export_session(session_id):
+        time.sleep(export_seconds)
+        return sessions.get(session_id)
+
+    root.mkdir(parents=True)
+    server.index = MemoryIndex(db_path=root / "index.db")
+    server.cascade = SlowCascade(root / "cascade", put_seconds)
+    server.cass.export_session = export_session
+    server.derivation_cache.clear()
+
+
+async def store_one_by_one(session_ids):
+    for session_id in session_ids:
+        result = json.loads((await server._store_session({"session_id": session_id}))[0].text)
+        assert result["ok"], result
+
+
+async def store_batch(session_ids):
+    result = json.loads((await server._store_sessions({"session_ids": session_ids}))[0].text)
+    assert result["stored"] == len(session_ids), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--output-kb", type=int, default=16)
+    parser.add_argument("--export-ms", type=float, default=40)
+    parser.add_argument("--put-ms", type=float, default=30)
+    args = parser.parse_args()
+
+    corpus = make_sessions(args.sessions, args.output_kb)
+    for i, session in enumerate(corpus):
+        session["summary"] += f" Batch item {i}."
+    sessions = {s["session_id"]: s for s in corpus}
+    session_ids = list(sessions)
+
+    print(
+        f"{args.sessions} sessions x {args.output_kb} KB, export {args.export_ms:g} ms, "
+        f"put {args.put_ms:g} ms, {server.BATCH_IO_WORKERS} I/O workers:"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        for label, run in (
+            ("one call per session", store_one_by_one),
+            ("store_sessions_to_cascade", store_batch),
+        ):
+            fresh_server(
+                Path(tmp) / label.replace(" ", "-"),
+                sessions,
+                args.export_ms / 1000,
+                args.put_ms / 1000,
+            )
+            start = time.perf_counter()
+            asyncio.run(run(session_ids))
+            timings[label] = elapsed = time.perf_counter() - start
+            print(f"  {label:28s} {elapsed:7.2f} s  {args.sessions / elapsed:7.1f} sessions/s")
+            server.index.close()
+        speedup = timings["one call per session"] / timings["store_sessions_to_cascade"]
+        print(f"  speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
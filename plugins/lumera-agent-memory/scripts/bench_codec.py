@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Payload codecs: encode/decode time and size on agent-session payloads.
+
+Usage:
+    python scripts/bench_codec.py [--session-kb KB ...] [--repeat N]
+
+Builds raw_plus_artifact payloads around synthetic agent transcripts
+(messages with code, JSON tool arguments, test logs with quotes, newlines
+and some non-ASCII text), then times each payload codec against the legacy
+`json.dumps(payload).encode()` and reports encoded sizes.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pipeline import available_codecs, decode_payload, encode_payload  # noqa: E402
+
+SNIPPETS = [
+    "def refresh_token(session):\n"
+    '    """Refresh the JWT if it expires soon."""\n'
+    '    if session["exp"] - now() < 60:\n'
+    '        return client.post("/auth/refresh", json={"token": session["token"]})\n',
+    "FAILED tests/test_auth.py::test_refresh_expired - AssertionError: assert 401 == 200\n"
+    "E   where 401 = <Response [401]>.status_code\n",
+    '{"level": "error", "msg": "token decode failed", "path": "/api/v2/users/42", '
+    '"latency_ms": 12.7}\n',
+    'Traceback (most recent call last):\n  File "app/auth.py", line 88, in decode\n'
+    "    raise InvalidTokenError('Invalid token format')\n",
+    "Résumé des changements : correction du délai d'expiration — vérifié ✓\n",
+]
+
+
+def make_payload(session_kb: int, seed: int = 0) -> dict:
+    """raw_plus_artifact payload whose raw session is about session_kb KB of transcript."""
+    rng = random.Random(seed)
+    messages = []
+    size = 0
+    while size < session_kb * 1024:
+        if rng.random() < 0.4:
+            arguments = {"command": "pytest -x tests/test_auth.py", "timeout": rng.randint(10, 600)}
+            message = {
+                "role": "assistant",
+                "content": "Running the auth tests again.",
+                "tool_calls": [
+                    {
+                        "id": f"call_{len(messages)}",
+                        "name": "bash",
+                        "arguments": json.dumps(arguments),
+                    }
+                ],
+            }
+        else:
+            content = "".join(rng.choice(SNIPPETS) for _ in range(rng.randint(2, 12)))
+            message = {
+                "role": rng.choice(["user", "tool"]),
+                "content": content,
+                "exit_code": rng.choice([0, 1, None]),
+            }
+        messages.append(message)
+        size += len(json.dumps(message))
+    return {
+        "artifact_type": "raw_plus_artifact",
+        "session_id": f"bench-{seed}",
+        "timestamp": "2026-01-12T09:30:00Z",
+        "memory_card": {
+            "title": "Fixed JWT refresh",
+            "keywords": ["auth", "jwt", "refresh"],
+            "decisions": [],
+        },
+        "redaction_report": [{"rule": "email", "count": 2}],
+        "raw_session": {"session_id": f"bench-{seed}", "messages": messages},
+        "tags": ["auth"],
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn() in ms."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--session-kb", type=int, nargs="*", default=[64, 1024, 8192])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    codecs = [("legacy json.dumps", None)] + [(name, name) for name in available_codecs()]
+    for session_kb in args.session_kb:
+        payload = make_payload(session_kb)
+        print(f"raw session ~{session_kb} KB:")
+        for label, codec in codecs:
+            if codec is None:
+                encode = lambda: json.dumps(payload).encode("utf-8")  # noqa: E731
+            else:
+                encode = lambda: encode_payload(payload, codec)  # noqa: E731
+            encoded = encode()
+            assert decode_payload(encoded) == payload
+            print(
+                f"  {label:18s} {len(encoded) / 1024:9.1f} KB"
+                f"  encode {timed(encode, args.repeat):8.2f} ms"
+                f"  decode {timed(lambda: decode_payload(encoded), args.repeat):8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Memory-card extraction: per-field extractors vs. the shared-pass engine.
+
+Usage:
+    python scripts/bench_enrichment.py [--repeat N] [--output-kb KB ...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.bench_redaction import bench, make_tool_log  # noqa: E402
+from src.enrich import memory_card as legacy  # noqa: E402
+from src.enrich.engine import enrich_text  # noqa: E402
+
+
+def per_field(text: str) -> dict:
+    return {
+        "decisions": legacy.extract_decisions(text),
+        "todos": legacy.extract_todos(text),
+        "entities": legacy.extract_entities(text),
+        "keywords": legacy.extract_keywords(text),
+        "notable_quotes": legacy.extract_notable_quotes(text),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output-kb", type=int, nargs="*", default=[4, 64, 512])
+    args = parser.parse_args()
+
+    for size in args.output_kb:
+        text = (
+            "Decided to pin numpy. We will retry the Lumera Cascade upload. "
+            "TODO: add backoff to the uploader. 'quoted failure message here'. "
+            + make_tool_log(size)
+        )
+        assert enrich_text(text) == per_field(text)
+        print(f"\n{size} KB session text:")
+        old = bench("per-field extractors", lambda: per_field(text), args.repeat)
+        new = bench("shared-pass engine", lambda: enrich_text(text), args.repeat)
+        print(f"  speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""CASS exports: one `cm context` process per session vs. one export worker.
+
+Usage:
+    python scripts/bench_export.py [--sessions N] [--threads N] [--startup-ms MS]
+
+Exports --sessions sessions through CASSAdapter with the fake `cm`
+(tests/fake_cm.py) first on PATH, from --threads threads (the batch
+store's export workers), once per call and once through a worker started
+with LUMERA_CM_WORKER's protocol. --startup-ms adds `cm` startup time to
+every process start. The worker numbers are what a `cm` implementing the
+protocol would give; no released `cm` does yet.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.adapters import CASSAdapter  # noqa: E402
+
+FAKE_CM = ROOT / "tests" / "fake_cm.py"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--startup-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shim = Path(tmp) / "cm"
+        shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_CM}" "$@"\n')
+        shim.chmod(0o755)
+        os.environ["PATH"] = f"{tmp}:{os.environ['PATH']}"
+        os.environ["FAKE_CM_STARTUP_MS"] = str(args.startup_ms)
+        log = Path(tmp) / "cm.log"
+        os.environ["FAKE_CM_LOG"] = str(log)
+
+        session_ids = [f"bench-{n:05d}" for n in range(args.sessions)]
+        print(
+            f"{args.sessions} exports from {args.threads} threads,"
+            f" cm startup +{args.startup_ms:g} ms:"
+        )
+        timings = {}
+        for label, command in (
+            ("per call", None),
+            ("worker", [sys.executable, str(FAKE_CM), "worker"]),
+        ):
+            log.write_text("")
+            adapter = CASSAdapter(worker_command=command)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                sessions = list(pool.map(adapter.export_session, session_ids))
+            timings[label] = elapsed = time.perf_counter() - start
+            adapter.close()
+            assert all(session is not None for session in sessions)
+            processes = len(log.read_text().splitlines())
+            print(
+                f"  {label:10s} {elapsed * 1000:9.1f} ms"
+                f"  {elapsed / args.sessions * 1e6:8.1f} us/session"
+                f"  {processes:5d} processes"
+            )
+        print(f"  speedup: {timings['per call'] / timings['worker']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
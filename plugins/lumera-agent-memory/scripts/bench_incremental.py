@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Incremental vs. full memory-card enrichment for a growing session.
+
+Usage:
+    python scripts/bench_incremental.py [--output-kb KB ...] [--delta-kb KB] [--repeat N]
+
+Grows a session to each size, then times re-enriching it after appending
+delta-kb of new output: enrich_text() over the whole text vs.
+enrich_incremental() resumed from the previous version's state (including
+the JSON round trip the index does). Text draws from a Zipf vocabulary with
+log-style punctuation; state size grows with the session's vocabulary.
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.bench_backfill import make_sessions  # noqa: E402
+from scripts.bench_redaction import bench  # noqa: E402
+from src.enrich.engine import enrich_text  # noqa: E402
+from src.enrich.incremental import EnrichmentState, enrich_incremental  # noqa: E402
+
+
+def make_growing_text(size_kb: int, seed: int = 0) -> str:
+    """Log-like lines ("12:00:01 step: ... done.") over a Zipf vocabulary."""
+    rng = random.Random(seed)
+    words = make_sessions(1, size_kb, seed=seed)[0]["output"].split()
+    lines, i = [], 0
+    while i < len(words):
+        n = rng.randint(6, 14)
+        step = " ".join(words[i : i + n])
+        lines.append(f"12:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} step: {step}.")
+        i += n
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output-kb", type=int, nargs="*", default=[64, 512, 2048])
+    parser.add_argument("--delta-kb", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.output_kb:
+        text = make_growing_text(size + args.delta_kb)
+        old, grown = text[: size * 1024], text[: (size + args.delta_kb) * 1024]
+        _, state, _ = enrich_incremental(old)
+        stored = json.dumps(state.to_dict())
+
+        def incremental():
+            return enrich_incremental(grown, EnrichmentState.from_dict(json.loads(stored)))
+
+        assert incremental()[0] == enrich_text(grown)
+        print(
+            f"\n{size} KB session + {args.delta_kb} KB appended"
+            f" (state {len(stored) / 1024:.0f} KB):"
+        )
+        full = bench("full re-enrichment", lambda: enrich_text(grown), args.repeat)
+        inc = bench("incremental", incremental, args.repeat)
+        print(f"  speedup: {full / inc:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
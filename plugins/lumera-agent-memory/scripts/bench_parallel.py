@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Batch derivation throughput: in-process vs. process pool.
+
+Usage:
+    python scripts/bench_parallel.py [--sessions N] [--output-kb KB] [--workers W ...]
+
+Redacts and builds memory cards for a batch of synthetic sessions, once
+in-process and once per worker count, and reports sessions/second. Speedup
+is bounded by the number of cores on the machine.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.bench_redaction import make_session  # noqa: E402
+from src.pipeline import derive_session, derive_sessions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--output-kb", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="*", default=[2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    sessions = [make_session(args.output_kb, seed=i) for i in range(args.sessions)]
+    print(f"{args.sessions} sessions, {args.output_kb} KB tool output each, {os.cpu_count()} cores")
+
+    start = time.perf_counter()
+    serial = [derive_session(s) for s in sessions]
+    base = time.perf_counter() - start
+    print(f"  {'in-process':<14} {args.sessions / base:9.1f} sessions/s")
+
+    for workers in sorted(set(args.workers)):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Warm the pool so worker startup is not billed to the batch
+            list(pool.map(abs, range(workers)))
+            start = time.perf_counter()
+            results = derive_sessions(sessions, executor=pool, max_workers=workers)
+            elapsed = time.perf_counter() - start
+        assert results == serial
+        print(
+            f"  {f'{workers} workers':<14} {args.sessions / elapsed:9.1f} sessions/s  "
+            f"speedup {base / elapsed:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
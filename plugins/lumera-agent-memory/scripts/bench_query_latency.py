@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""query_memories latency while the server is busy storing.
+
+Usage:
+    python scripts/bench_query_latency.py [--memories N] [--sessions N]
+        [--output-kb KB] [--cpu-mode thread|process] [--inline]
+
+Fills a fresh index with --memories memories, measures query_memories
+latency on an idle server, then again while a store_sessions_to_cascade
+burst of --sessions sessions runs on the same event loop. --inline runs the
+burst's store steps on the event loop itself, as the server did before the
+execution layer, for comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("LUMERA_MEMORY_KEY", os.urandom(32).hex())
+
+import src.mcp_server as server  # noqa: E402
+from scripts.bench_backfill import make_sessions  # noqa: E402
+from scripts.bench_batch_store import fresh_server  # noqa: E402
+from src.pipeline import ExecutionLayer  # noqa: E402
+
+QUERIES = ["error", "timeout retry", "deploy", "token refresh", "database migration"]
+
+
+async def query_latencies(count: int, interval: float, until=None) -> list:
+    """Latency (ms) of query_memories calls, one every interval seconds."""
+    latencies = []
+    for i in range(count):
+        if until is not None and until.done():
+            break
+        start = time.perf_counter()
+        result = json.loads(
+            (await server._query_memories({"query": QUERIES[i % len(QUERIES)]}))[0].text
+        )
+        assert result["ok"], result
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def inline_burst(session_ids):
+    """Store steps on the event loop thread (no executors)."""
+    for session_id in session_ids:
+        job = server._StoreJob(session_id, [], {})
+        for step in (
+            server._export_step,
+            server._lookup_step,
+            server._derive_step,
+            server._dedup_step,
+            server._encrypt_step,
+            server._put_step,
+        ):
+            if step(job) is None:
+                break
+        else:
+            server.index.add_memory(**server._index_record(job))
+        await asyncio.sleep(0)
+
+
+async def run(args, session_ids):
+    idle = await query_latencies(args.queries, args.interval)
+    if args.inline:
+        burst = asyncio.ensure_future(inline_burst(session_ids))
+    else:
+        burst = asyncio.ensure_future(server._store_sessions({"session_ids": session_ids}))
+    await asyncio.sleep(0)
+    busy = await query_latencies(10**6, args.interval, until=burst)
+    await burst
+    return idle, busy
+
+
+def summary(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"  {label:18s} n={len(latencies):4d}  p50 {statistics.median(latencies):7.2f} ms"
+        f"  p95 {p95:7.2f} ms  max {latencies[-1]:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--memories", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=60)
+    parser.add_argument("--output-kb", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--cpu-mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--inline", action="store_true")
+    args = parser.parse_args()
+
+    corpus = make_sessions(args.sessions, args.output_kb, seed=1)
+    sessions = {s["session_id"]: s for s in corpus}
+    filler = make_sessions(args.memories, 1, seed=2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh_server(Path(tmp) / "server", sessions, 0.0, 0.0)
+        server.executors = ExecutionLayer(cpu_workers=server.CPU_WORKERS, cpu_mode=args.cpu_mode)
+        for i, session in enumerate(filler):
+            server.index.add_memory(
+                f"cascade://filler{i}",
+                f"h{i}",
+                title=f"{session['summary']} {session['output'][:60]}",
+                snippet=session["output"][60:200],
+            )
+
+        mode = "inline (no executors)" if args.inline else f"executors, cpu_mode={args.cpu_mode}"
+        print(
+            f"{args.memories} memories;"
+            f" burst of {args.sessions} x {args.output_kb} KB stores; {mode}:"
+        )
+        idle, busy = asyncio.run(run(args, list(sessions)))
+        summary("idle", idle)
+        summary("during stores", busy)
+        server.executors.shutdown()
+        server.index.close()
+
+
+if __name__ == "__main__":
+    main()
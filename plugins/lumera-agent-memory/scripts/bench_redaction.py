@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Redaction micro-benchmarks.
+
+Usage:
+    python scripts/bench_redaction.py [--repeat N] [--output-kb KB]
+
+Compares the default redact-then-project pipeline against allowlist-first
+redaction on sessions that carry large non-allowlisted fields (tool output,
+API responses), which are discarded before storage either way, and measures
+the literal prefilter on clean vs. PII-bearing strings (with per-rule skip
+ratios). The pathological corpus profiles every rule on inputs that trigger
+super-linear backtracking and checks that the per-string time budget fails
+closed on them.
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.security import RedactionError, redact_session  # noqa: E402
+from src.security.redact import (  # noqa: E402
+    RedactionProfile,
+    get_prefilter_stats,
+    redact_string,
+    reset_prefilter_stats,
+)
+
+# Inputs that make one or more rules degrade super-linearly.
+PATHOLOGICAL_CORPUS = {
+    "email_local_run": "a." * 20000 + "@",
+    "email_domain_run": "x@" + "a." * 20000,
+    "email_both_runs": ("a." * 5000 + "@") * 4,
+    "dotted_digits": "1." * 20000,
+    "digit_run": "1" * 40000,
+    "spaced_digits": "1 " * 20000,
+    "bearer_repeat": "Bearer " * 5000,
+    "key_assignments": "api_key=" * 5000,
+}
+
+
+def make_tool_log(size_kb: int, seed: int = 0) -> str:
+    """Build a realistic-looking tool log with sparse PII."""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size_kb * 1024:
+        words = " ".join(
+            "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+            for _ in range(rng.randint(6, 14))
+        )
+        line = (
+            f"2025-12-20T10:{rng.randint(0, 59):02d}:00Z INFO {words} took {rng.randint(1, 999)}ms"
+        )
+        if rng.random() < 0.01:
+            line += " contact ops@example.com"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def make_session(output_kb: int, seed: int = 0) -> dict:
+    """Session with small allowlisted fields and large discarded fields."""
+    return {
+        "session_id": f"bench-{seed}",
+        "timestamp": "2025-12-20T10:00:00Z",
+        "tool_name": "pytest-runner",
+        "success": False,
+        "summary": "Ran test suite. Decided to pin numpy. Contact dev@example.com for access.",
+        "tags": ["bench", "redaction"],
+        "output": make_tool_log(output_kb, seed),
+        "api_response": {"body": make_tool_log(output_kb // 4 or 1, seed + 1)},
+    }
+
+
+def bench(label: str, fn, repeat: int) -> float:
+    """Run fn `repeat` times and print the best wall time."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<28} {best * 1000:9.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output-kb", type=int, nargs="*", default=[64, 512, 2048])
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    for size in args.output_kb:
+        session = make_session(size)
+        print(f"\nSession with {size} KB discarded tool output:")
+        full = bench("redact-then-project", lambda: redact_session(session), args.repeat)
+        fast = bench(
+            "allowlist-first",
+            lambda: redact_session(session, allowlist_first=True),
+            args.repeat,
+        )
+        print(f"  speedup: {full / fast:.1f}x")
+
+    print("\nLiteral prefilter on many short strings:")
+    rng = random.Random(1)
+    clean = [
+        " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(6)) for _ in range(12))
+        for _ in range(5000)
+    ]
+    dirty = [f"{line} mail ops@example.com at 10.0.0.{i % 255}" for i, line in enumerate(clean)]
+    for label, corpus in (("clean", clean), ("pii-bearing", dirty)):
+        off = bench(
+            f"{label} (no prefilter)",
+            lambda: [redact_string(t, [], prefilter=False) for t in corpus],
+            args.repeat,
+        )
+        on = bench(
+            f"{label} (prefilter)", lambda: [redact_string(t, []) for t in corpus], args.repeat
+        )
+        print(f"  speedup: {off / on:.1f}x")
+
+    reset_prefilter_stats()
+    for text in clean + dirty:
+        redact_string(text, [])
+    print("\nPer-rule prefilter skip ratios (clean + pii-bearing corpus):")
+    for rule, stats in get_prefilter_stats().items():
+        print(f"  {rule:<18} {stats['skip_ratio']:6.1%} of {stats['checked']} strings skipped")
+
+    budget = args.budget_ms / 1000
+    print(f"\nPathological corpus (budget {args.budget_ms:.0f} ms per string):")
+    for name, text in PATHOLOGICAL_CORPUS.items():
+        profile = RedactionProfile()
+        session = {"session_id": name, "summary": text}
+        start = time.perf_counter()
+        try:
+            redact_session(session, profile=profile, time_budget=budget)
+            outcome = "ok"
+        except RedactionError:
+            outcome = "FAILED CLOSED"
+        elapsed = (time.perf_counter() - start) * 1000
+        worst = next(iter(profile.snapshot().items()), ("-", {"time_ms": 0}))
+        print(
+            f"  {name:<18} {len(text):>7} chars {elapsed:9.1f} ms  {outcome:<13} "
+            f"slowest rule: {worst[0]} ({worst[1]['time_ms']:.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Fetching query hits: per-pointer retrieve calls vs. one batch retrieve.
+
+Usage:
+    python scripts/bench_retrieve.py [--hits N] [--output-kb KB] [--get-ms MS]
+        [--rounds N] [--agents N]
+
+Stores --hits synthetic sessions (see bench_backfill.make_sessions) into a
+fresh index and mock Cascade, then fetches all of them --rounds times,
+once with one retrieve_session_from_cascade call per pointer (what an agent
+does with the top hits of query_memories), once with a single
+retrieve_sessions_from_cascade call, and once with that call in card_only
+mode, which the index answers without Cascade. Then --agents agents pull the
+same pointers one by one at the same time, with and without coalescing of
+identical in-flight retrievals. Cascade download latency is simulated with
+a sleep.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("LUMERA_MEMORY_KEY", os.urandom(32).hex())
+
+import src.mcp_server as server  # noqa: E402
+from scripts.bench_backfill import make_sessions  # noqa: E402
+from scripts.bench_batch_store import fresh_server  # noqa: E402
+from src.pipeline import SingleFlight  # noqa: E402
+
+
+class Uncoalesced(SingleFlight):
+    """Baseline: every call runs on its own."""
+
+    async def do(self, key, fn, *args, **kwargs):
+        return await fn(*args, **kwargs), False
+
+
+async def one_by_one(uris):
+    for uri in uris:
+        result = json.loads((await server._retrieve_session({"cascade_uri": uri}))[0].text)
+        assert result["ok"], result
+
+
+async def batch(uris, card_only=False):
+    result = json.loads(
+        (await server._retrieve_sessions({"cascade_uris": uris, "card_only": card_only}))[0].text
+    )
+    assert result["retrieved"] == len(uris), result
+
+
+async def batch_cards(uris):
+    await batch(uris, card_only=True)
+
+
+async def team(uris, agents):
+    await asyncio.gather(*(one_by_one(uris) for _ in range(agents)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hits", type=int, default=10)
+    parser.add_argument("--output-kb", type=int, default=64)
+    parser.add_argument("--get-ms", type=float, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--agents", type=int, default=8)
+    args = parser.parse_args()
+
+    corpus = make_sessions(args.hits, args.output_kb)
+    for i, session in enumerate(corpus):
+        session["summary"] += f" Hit {i}."
+    sessions = {s["session_id"]: s for s in corpus}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh_server(Path(tmp) / "server", sessions, 0.0, 0.0)
+        stored = json.loads(
+            asyncio.run(server._store_sessions({"session_ids": list(sessions)}))[0].text
+        )
+        uris = [r["cascade_uri"] for r in stored["results"]]
+        assert len(uris) == args.hits, stored
+        server.cascade.get_seconds = args.get_ms / 1000
+
+        print(
+            f"{args.hits} hits x {args.output_kb} KB sessions, get {args.get_ms:g} ms, "
+            f"{os.getenv('LUMERA_QUERY_WORKERS', '4')} query workers:"
+        )
+        timings = {}
+        runs = (
+            ("one call per pointer", one_by_one),
+            ("retrieve_sessions_from_cascade", batch),
+            ("  card_only (index)", batch_cards),
+        )
+        for label, run in runs:
+            elapsed = []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                asyncio.run(run(uris))
+                elapsed.append(time.perf_counter() - start)
+            timings[label] = median = statistics.median(elapsed)
+            print(f"  {label:32s} {median * 1000:8.1f} ms")
+        speedup = timings["one call per pointer"] / timings["retrieve_sessions_from_cascade"]
+        print(f"  speedup: {speedup:.1f}x")
+
+        print(f"{args.agents} agents pulling the same {args.hits} pointers one by one:")
+        for label, flights in (
+            ("without coalescing", Uncoalesced()),
+            ("with coalescing", SingleFlight()),
+        ):
+            server.flights = flights
+            elapsed = []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                asyncio.run(team(uris, args.agents))
+                elapsed.append(time.perf_counter() - start)
+            timings[label] = median = statistics.median(elapsed)
+            print(f"  {label:32s} {median * 1000:8.1f} ms")
+        print(f"  speedup: {timings['without coalescing'] / timings['with coalescing']:.1f}x")
+        server.executors.shutdown()
+        server.index.close()
+
+
+if __name__ == "__main__":
+    main()
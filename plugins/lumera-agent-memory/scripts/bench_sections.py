@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Reading the memory card of a raw_plus_artifact blob: single vs. sectioned.
+
+Usage:
+    python scripts/bench_sections.py [--raw-mb MB ...] [--repeat N]
+
+For each raw session size, stores one payload as a legacy single AES-GCM
+blob and one as a sectioned blob in a mock Cascade, then times reading the
+card back: the legacy blob must be fetched and decrypted whole, the
+sectioned one needs three ranged reads (header, TOC, card section).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cascade import MockCascadeConnector  # noqa: E402
+from src.security import decrypt_blob, encrypt_blob, encrypt_sections, read_sections  # noqa: E402
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn() in ms."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--raw-mb", type=float, nargs="*", default=[0.1, 1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    key = os.urandom(32)
+    card = {"title": "Investigated flaky auth token refresh", "keywords": ["auth", "token"] * 10}
+    print(f"{'raw session':>12s}  {'single blob':>12s}  {'sectioned':>10s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cascade = MockCascadeConnector(Path(tmp))
+        for raw_mb in args.raw_mb:
+            raw_session = {"output": "x" * int(raw_mb * 1024 * 1024)}
+            single = cascade.put(
+                encrypt_blob(
+                    json.dumps({"memory_card": card, "raw_session": raw_session}).encode(), key
+                )
+            )
+            sectioned = cascade.put(
+                encrypt_sections(
+                    {
+                        "card": json.dumps({"memory_card": card}).encode(),
+                        "raw_session": json.dumps(raw_session).encode(),
+                    },
+                    key,
+                )
+            )
+
+            def read_single():
+                return json.loads(decrypt_blob(cascade.get(single), key))["memory_card"]
+
+            def read_sectioned():
+                sections = read_sections(
+                    lambda offset, length: cascade.get_range(sectioned, offset, length),
+                    ["card"],
+                    key,
+                )
+                return json.loads(sections["card"])["memory_card"]
+
+            assert read_single() == read_sectioned() == card
+            print(
+                f"{raw_mb:9.1f} MB  {timed(read_single, args.repeat):9.2f} ms  "
+                f"{timed(read_sectioned, args.repeat):7.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""MCP server startup: process spawn to the first list_tools response.
+
+Usage:
+    python scripts/bench_startup.py [--runs N] [--memories N]
+
+Spawns `python -m src.mcp_server` over stdio --runs times, as an agent
+does for each session, and times the initialize handshake, the first
+tools/list response and a first query_memories call (which builds the
+index). Then does the same through `python -m src.daemon`, the stdio proxy
+to a shared daemon that is already running (started by a warm-up session).
+Wall time on a busy host varies by more than the server's own share of
+it, so each run also times the startup phases inside one fresh process:
+importing the MCP SDK, importing the server module, list_tools(), and the
+first query_memories call. The working directory holds an index of
+--memories memories from an earlier run, as a real one would.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+sys.path.insert(0, str(ROOT))
+
+from src.index import MemoryIndex  # noqa: E402
+
+
+def rpc(proc: subprocess.Popen, request_id: int, method: str, params: dict) -> dict:
+    """Send one JSON-RPC request and read lines until its response."""
+    proc.stdin.write(
+        json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}) + "\n"
+    )
+    proc.stdin.flush()
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError(f"server exited: {proc.stderr.read()}")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def one_run(workdir: Path, env: dict, module: str = "src.mcp_server") -> dict:
+    """Milestones (ms since spawn) of one server (or proxy) process."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", module],
+        cwd=workdir,
+        env=env,
+        text=True,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        rpc(
+            proc,
+            1,
+            "initialize",
+            {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "bench-startup", "version": "0"},
+            },
+        )
+        initialized = time.perf_counter()
+        proc.stdin.write(
+            json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}) + "\n"
+        )
+        tools = rpc(proc, 2, "tools/list", {})
+        assert tools["result"]["tools"], tools
+        listed = time.perf_counter()
+        query = rpc(
+            proc, 3, "tools/call", {"name": "query_memories", "arguments": {"query": "token"}}
+        )
+        assert json.loads(query["result"]["content"][0]["text"])["ok"], query
+        queried = time.perf_counter()
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=10)
+    return {
+        "initialize": (initialized - start) * 1000,
+        "list_tools": (listed - start) * 1000,
+        "first query": (queried - start) * 1000,
+    }
+
+
+PHASES = """
+import asyncio, json, time
+start = time.perf_counter()
+import mcp.server, mcp.server.stdio, mcp.types
+sdk = time.perf_counter()
+import src.mcp_server as server
+imported = time.perf_counter()
+asyncio.run(server.list_tools())
+listed = time.perf_counter()
+asyncio.run(server._query_memories({"query": "token"}))
+queried = time.perf_counter()
+print(json.dumps({
+    "import MCP SDK": (sdk - start) * 1000,
+    "import server": (imported - sdk) * 1000,
+    "list_tools()": (listed - imported) * 1000,
+    "first query": (queried - listed) * 1000,
+}))
+"""
+
+
+def phases(workdir: Path, env: dict) -> dict:
+    """In-process ms of each startup phase in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", PHASES],
+        cwd=workdir,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--memories", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        index = MemoryIndex(db_path=workdir / ".cache" / "memory_index.db")
+        for i in range(args.memories):
+            index.add_memory(
+                f"cascade://{i:064x}", f"h{i}", title=f"token refresh {i}", snippet="auth bug"
+            )
+        index.close()
+
+        env = dict(os.environ, PYTHONPATH=str(ROOT), LUMERA_MEMORY_KEY=os.urandom(32).hex())
+        env.pop("PYTHONDONTWRITEBYTECODE", None)  # installed servers start from cached bytecode
+        one_run(workdir, env)  # warm the OS file cache and bytecode
+        runs = [one_run(workdir, env) for _ in range(args.runs)]
+        phase_runs = [phases(workdir, env) for _ in range(args.runs)]
+        one_run(workdir, env, "src.daemon")  # starts the daemon
+        try:
+            proxy_runs = [one_run(workdir, env, "src.daemon") for _ in range(args.runs)]
+        finally:
+            subprocess.run(
+                [sys.executable, "-m", "src.daemon", "stop"], cwd=workdir, env=env, check=True
+            )
+
+    for label, label_runs in (("server", runs), ("proxy to a running daemon", proxy_runs)):
+        print(
+            f"{label} over stdio, {args.runs} runs,"
+            f" index of {args.memories} memories (ms since spawn):"
+        )
+        for milestone in label_runs[0]:
+            values = [run[milestone] for run in label_runs]
+            print(
+                f"  {milestone:14s} median {statistics.median(values):7.1f}  min {min(values):7.1f}"
+            )
+    print("startup phases in one process (ms):")
+    for phase in phase_runs[0]:
+        values = [run[phase] for run in phase_runs]
+        print(f"  {phase:14s} median {statistics.median(values):7.1f}  min {min(values):7.1f}")
+
+
+if __name__ == "__main__":
+    main()
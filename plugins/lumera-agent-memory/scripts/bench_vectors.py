@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Hashed-vector search: embedding cost and cosine top-k scan latency.
+
+Usage:
+    python scripts/bench_vectors.py [--memories N ...] [--repeat N]
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.index.vectors import VECTOR_DIM, VectorMatrix, embed_text, quantize  # noqa: E402
+
+
+def make_card_text(rng: random.Random) -> str:
+    words = [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+        for _ in range(60)
+    ]
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--memories", type=int, nargs="*", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [make_card_text(rng) for _ in range(500)]
+    start = time.perf_counter()
+    blobs = [quantize(embed_text(t)) for t in texts]
+    per_card = (time.perf_counter() - start) / len(texts)
+    print(f"embed + quantize: {per_card * 1000:.2f} ms per card, {VECTOR_DIM} bytes stored")
+
+    query = embed_text("auth token bug")
+    for count in args.memories:
+        matrix = VectorMatrix((i, blobs[i % len(blobs)]) for i in range(count))
+        matrix.search(query, 10)  # Build the dense matrix once
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            matrix.search(query, 10)
+            best = min(best, time.perf_counter() - start)
+        print(
+            f"  {count:>7} memories: top-10 scan {best * 1000:8.2f} ms "
+            f"({count * VECTOR_DIM / 1024 / 1024:.1f} MB int8)"
+        )
+
+
+if __name__ == "__main__":
+    main()
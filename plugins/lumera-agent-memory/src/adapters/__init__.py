@@ -1,6 +1,7 @@
 """Adapters for external systems (CASS memory system)."""
 
 from .cass_memory_system import CASSAdapter
+from .cm_worker import CMWorker, ExportError, WorkerError
 from .fixtures import get_fixture_session
 
-__all__ = ["CASSAdapter", "get_fixture_session"]
+__all__ = ["CASSAdapter", "CMWorker", "ExportError", "WorkerError", "get_fixture_session"]
@@ -1,21 +1,46 @@
 """Adapter for Jeff Emanuel's CASS memory system.
 
 Integrates with `cm` CLI when available, falls back to fixtures in CI.
+With a worker command, exports go to one long-lived worker process (see
+cm_worker) instead of a `cm` process per session. This is opt-in: no
+released `cm` speaks the worker protocol yet, so without a worker command
+every export runs `cm context` once.
 """
 
 import json
 import shutil
 import subprocess
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional
+from .cm_worker import CMWorker, ExportError, WorkerError
 from .fixtures import get_fixture_session
 
+# Worker failures (start, exit, timeout) after which exports stay per-call
+MAX_WORKER_FAILURES = 3
+
 
 class CASSAdapter:
     """Adapter for CASS memory system CLI."""
 
-    def __init__(self):
-        """Initialize adapter with capability detection."""
+    def __init__(self, worker_command: Optional[List[str]] = None, timeout: float = 10.0):
+        """Initialize adapter with capability detection.
+
+        Args:
+            worker_command: Command of a long-lived export worker speaking
+                the cm_worker protocol, which no released `cm` implements
+                yet (None: one `cm context` process per export)
+            timeout: Seconds per export
+        """
         self.cm_available = self._detect_cm_cli()
+        self.worker_command = worker_command
+        self.timeout = timeout
+        self._worker: Optional[CMWorker] = None
+        self._worker_lock = threading.Lock()
+        # Stats
+        self.worker_exports = 0
+        self.call_exports = 0
+        self.worker_failures = 0
+        self.last_worker_error: Optional[str] = None
 
     def _detect_cm_cli(self) -> bool:
         """Check if cm CLI is available in PATH.
@@ -39,10 +64,57 @@ class CASSAdapter:
             RuntimeError: If cm CLI fails
         """
         if self.cm_available:
+            if self.worker_command and self.worker_failures < MAX_WORKER_FAILURES:
+                worker = self._get_worker()
+                if worker is not None:
+                    return self._export_via_worker(worker, session_id)
             return self._export_via_cm_cli(session_id)
         else:
             return self._export_via_fixture(session_id)
 
+    def _get_worker(self) -> Optional[CMWorker]:
+        """Running worker, started on first use (None if it cannot start)."""
+        with self._worker_lock:
+            if self._worker is not None and not self._worker.alive:
+                self._worker.close()
+                self._worker = None
+            if self._worker is None and self.worker_failures < MAX_WORKER_FAILURES:
+                try:
+                    self._worker = CMWorker(self.worker_command, timeout=self.timeout)
+                except WorkerError as e:
+                    self._worker_failed(e)
+            return self._worker
+
+    def _worker_failed(self, error: WorkerError):
+        """Count a worker failure (caller holds _worker_lock); reported by stats()."""
+        self.worker_failures += 1
+        self.last_worker_error = str(error)
+
+    def _export_via_worker(self, worker: CMWorker, session_id: str) -> Optional[Dict[str, Any]]:
+        """Export session through the worker, or per call if the worker fails.
+
+        Args:
+            worker: Running worker
+            session_id: Session ID to export
+
+        Returns:
+            Session dict, None if session not found
+        """
+        try:
+            data = worker.export(session_id)
+        except ExportError as e:
+            raise RuntimeError(f"cm worker failed: {e}")
+        except WorkerError as e:
+            with self._worker_lock:
+                # Requests in flight fail together; count their worker once
+                if self._worker is worker:
+                    self._worker = None
+                    worker.close()
+                    self._worker_failed(e)
+            return self._export_via_cm_cli(session_id)
+        self.worker_exports += 1
+        return None if data is None else self._to_session(session_id, data)
+
     def _export_via_cm_cli(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Export session using cm CLI.
 
@@ -52,12 +124,13 @@ class CASSAdapter:
         Returns:
             Parsed JSON output from cm context --json
         """
+        self.call_exports += 1
         try:
             result = subprocess.run(
                 ["cm", "context", session_id, "--json"],
                 capture_output=True,
                 text=True,
-                timeout=10,
+                timeout=self.timeout,
                 check=False,
             )
 
@@ -66,17 +139,7 @@ class CASSAdapter:
                 return None
 
             data = json.loads(result.stdout)
-
-            # Transform cm output to our schema
-            # NOTE: Adjust field mapping based on actual cm output structure
-            return {
-                "session_id": session_id,
-                "timestamp": data.get("timestamp", ""),
-                "tool_name": data.get("tool", "unknown"),
-                "success": data.get("success", True),
-                "summary": data.get("summary", ""),
-                "tags": data.get("tags", []),
-            }
+            return self._to_session(session_id, data)
 
         except subprocess.TimeoutExpired:
             raise RuntimeError(f"cm CLI timeout for session: {session_id}")
@@ -85,6 +148,20 @@ class CASSAdapter:
         except Exception as e:
             raise RuntimeError(f"cm CLI failed: {e}")
 
+    @staticmethod
+    def _to_session(session_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Session dict from `cm context --json` output."""
+        # Transform cm output to our schema
+        # NOTE: Adjust field mapping based on actual cm output structure
+        return {
+            "session_id": session_id,
+            "timestamp": data.get("timestamp", ""),
+            "tool_name": data.get("tool", "unknown"),
+            "success": data.get("success", True),
+            "summary": data.get("summary", ""),
+            "tags": data.get("tags", []),
+        }
+
     def _export_via_fixture(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Export session using test fixture.
 
@@ -103,3 +180,20 @@ class CASSAdapter:
             True if cm can be used
         """
         return self.cm_available
+
+    def stats(self) -> Dict[str, Any]:
+        """Exports served by the worker and per call, and worker failures (with the last error)."""
+        return {
+            "worker_exports": self.worker_exports,
+            "call_exports": self.call_exports,
+            "worker_failures": self.worker_failures,
+            "last_worker_error": self.last_worker_error,
+            "worker_running": int(self._worker is not None and self._worker.alive),
+        }
+
+    def close(self):
+        """Stop the export worker, if one is running."""
+        with self._worker_lock:
+            if self._worker is not None:
+                self._worker.close()
+                self._worker = None
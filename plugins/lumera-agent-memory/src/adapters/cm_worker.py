@@ -0,0 +1,160 @@
+"""Long-lived CASS export worker talking JSON lines over pipes.
+
+Exporting through `cm context <id> --json` starts a process per session, and
+process spawn plus `cm` startup dominate batch ingestion. A worker is
+started once and answers export requests over its stdin/stdout, one JSON
+object per line:
+
+    request:  {"id": 7, "session_id": "abc"}
+    response: {"id": 7, "context": {...}}    (what `cm context abc --json` prints)
+              {"id": 7, "context": null}     (no such session)
+              {"id": 7, "error": "..."}      (the export failed)
+
+Requests carry ids, so several threads can have requests in flight at once
+and responses may come back in any order. The worker should exit at the end
+of its stdin. Its stderr is inherited.
+
+No released `cm` implements this protocol yet; only tests/fake_cm.py does
+(`fake_cm.py worker`). The worker is off unless a command is configured
+explicitly (LUMERA_CM_WORKER), so by default exports run `cm context` per
+session and gain nothing from this module.
+"""
+
+import itertools
+import json
+import subprocess
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional
+
+
+class WorkerError(Exception):
+    """Raised when the worker cannot answer (failed to start, exited, hung or garbled)."""
+
+    pass
+
+
+class ExportError(Exception):
+    """Raised when the worker reports that an export failed."""
+
+    pass
+
+
+class CMWorker:
+    """One worker process, shared by threads; requests are pipelined."""
+
+    def __init__(self, command: List[str], timeout: float = 10.0):
+        """Start the worker.
+
+        Args:
+            command: Worker command line
+            timeout: Seconds to wait for each response
+
+        Raises:
+            WorkerError: If the command cannot be started
+        """
+        self.command = command
+        self.timeout = timeout
+        try:
+            self._process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+        except OSError as e:
+            raise WorkerError(f"cm worker failed to start: {e}")
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        # Writes have their own lock, so the reader never waits behind a
+        # request blocked on a full pipe
+        self._write_lock = threading.Lock()
+        self._failure: Optional[WorkerError] = None
+        self._reader = threading.Thread(
+            target=self._read_responses, name="lumera-cm-worker", daemon=True
+        )
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._failure is None and self._process.poll() is None
+
+    def _read_responses(self):
+        try:
+            for line in self._process.stdout:
+                try:
+                    message = json.loads(line)
+                    future = self._pending_future(message["id"])
+                except (ValueError, KeyError, TypeError) as e:
+                    self._fail(WorkerError(f"cm worker sent an invalid response: {e}"))
+                    return
+                if future is not None:
+                    future.set_result(message)
+        except (OSError, ValueError):
+            pass
+        self._fail(WorkerError(f"cm worker exited (status {self._process.poll()})"))
+
+    def _pending_future(self, request_id: int) -> Optional[Future]:
+        with self._lock:
+            return self._pending.pop(request_id, None)
+
+    def _fail(self, error: WorkerError):
+        """Fail every request in flight, and all later ones."""
+        with self._lock:
+            if self._failure is None:
+                self._failure = error
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(self._failure)
+
+    def export(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Export one session.
+
+        Returns:
+            Context as `cm context --json` prints it, or None if not found
+
+        Raises:
+            ExportError: If the worker reports a failed export
+            WorkerError: If the worker does not answer within timeout
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._failure is not None:
+                raise self._failure
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        try:
+            with self._write_lock:
+                self._process.stdin.write(
+                    json.dumps({"id": request_id, "session_id": session_id}) + "\n"
+                )
+                self._process.stdin.flush()
+        except (OSError, ValueError) as e:
+            self._pending_future(request_id)
+            raise WorkerError(f"cm worker stopped reading requests: {e}")
+        try:
+            message = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._pending_future(request_id)
+            raise WorkerError(f"cm worker timeout for session: {session_id}")
+        if "error" in message:
+            raise ExportError(message["error"])
+        return message.get("context")
+
+    def close(self):
+        """Close the worker's stdin and stop it (killed if it does not exit)."""
+        self._fail(WorkerError("cm worker closed"))
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
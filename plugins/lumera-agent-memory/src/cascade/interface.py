@@ -37,6 +37,26 @@ class CascadeConnector(ABC):
         """
         pass
 
+    def get_range(self, pointer: str, offset: int, length: int) -> bytes:
+        """Retrieve part of a blob (fewer bytes at its end).
+
+        Connectors with ranged reads override this; the default fetches the
+        whole blob.
+
+        Args:
+            pointer: Content-addressed pointer (cascade://...)
+            offset: First byte to read
+            length: Number of bytes to read
+
+        Returns:
+            Encrypted blob bytes [offset, offset + length)
+
+        Raises:
+            NotFoundError: If pointer not found
+            ValidationError: If pointer format invalid
+        """
+        return self.get(pointer)[offset:offset + length]
+
 
 class NotFoundError(Exception):
     """Raised when pointer not found in Cascade."""
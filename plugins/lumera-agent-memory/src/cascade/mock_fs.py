@@ -61,6 +61,29 @@ class MockCascadeConnector(CascadeConnector):
             ValidationError: If pointer format invalid
             NotFoundError: If blob not found
         """
+        return self._blob_path(pointer).read_bytes()
+
+    def get_range(self, pointer: str, offset: int, length: int) -> bytes:
+        """Read part of a blob from disk without loading the rest.
+
+        Args:
+            pointer: cascade://<hash>
+            offset: First byte to read
+            length: Number of bytes to read
+
+        Returns:
+            Encrypted blob bytes [offset, offset + length)
+
+        Raises:
+            ValidationError: If pointer format invalid
+            NotFoundError: If blob not found
+        """
+        with open(self._blob_path(pointer), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def _blob_path(self, pointer: str) -> Path:
+        """Validated path of an existing blob."""
         # Validate pointer format
         match = POINTER_PATTERN.match(pointer)
         if not match:
@@ -84,8 +107,7 @@ class MockCascadeConnector(CascadeConnector):
         except Exception as e:
             raise ValidationError(f"Path resolution failed: {e}")
 
-        # Retrieve blob
         if not blob_path.exists():
             raise NotFoundError(f"Blob not found: {pointer}")
 
-        return blob_path.read_bytes()
+        return blob_path
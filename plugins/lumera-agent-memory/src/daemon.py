@@ -0,0 +1,463 @@
+"""Shared memory daemon behind thin stdio MCP proxies.
+
+Started as `python -m src.mcp_server`, every agent session runs its own
+server: its own SQLite connections, memos and caches, all contending for the
+same `.cache` files. In daemon mode one long-running process owns the index,
+the blob store and the caches, and serves MCP over a Unix domain socket:
+
+    agent --stdio--> proxy (python -m src.daemon) --socket--> daemon --> .cache
+
+- proxy: relays bytes between stdin/stdout and the socket. It imports no MCP
+  code, so a session starts in the time it takes to launch Python. If no
+  daemon answers, the proxy starts one (in the background, with the proxy's
+  working directory and environment) and connects once the socket is up; if
+  that fails, it serves the session in-process instead
+- daemon (python -m src.daemon serve): one MCP session per connection, all
+  on one event loop and one set of server components, so caches warm once
+  and every write goes through the index's single writer. A lock file next
+  to the socket (holding the daemon's pid) keeps it to one daemon per
+  socket; it exits after LUMERA_DAEMON_IDLE_S seconds without clients
+
+The socket is created owner-only (0600, in a 0700 directory if the daemon
+creates it), since the daemon decrypts memories with its key for anyone who
+can connect. Each proxy opens its connection with a fingerprint of its own
+LUMERA_MEMORY_KEY; a daemon started with another key turns it away and that
+proxy serves its session in-process. For any other change to the
+environment, stop the daemon with `python -m src.daemon stop`.
+"""
+
+import argparse
+import asyncio
+import fcntl
+import hashlib
+import hmac
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Socket of the daemon (relative paths resolve against the working
+# directory, like the index and blob store under .cache)
+SOCKET_PATH = os.getenv("LUMERA_DAEMON_SOCKET", ".cache/lumera-daemon.sock")
+# Seconds without clients before the daemon exits (0: never)
+IDLE_SECONDS = float(os.getenv("LUMERA_DAEMON_IDLE_S", "600"))
+# Seconds a proxy waits for a daemon it started to accept connections
+START_TIMEOUT = float(os.getenv("LUMERA_DAEMON_START_TIMEOUT_S", "10"))
+# Proxies connect to a daemon unless this is "0" (then they serve in-process)
+DAEMON_ENABLED = os.getenv("LUMERA_DAEMON", "1") != "0"
+
+# Longest JSON-RPC message line the daemon reads from a client
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+_CHUNK = 64 * 1024
+
+# Longest handshake response line a proxy reads
+_MAX_HELLO_BYTES = 4096
+
+
+class DaemonError(Exception):
+    """Raised when no daemon can be reached or started."""
+
+    pass
+
+
+def key_fingerprint(key_hex: Optional[str] = None) -> Optional[str]:
+    """Fingerprint of a LUMERA_MEMORY_KEY value (the environment's if None).
+
+    An HMAC keyed with the key itself, so it reveals nothing about the key.
+    None if no valid hex key is set.
+    """
+    if key_hex is None:
+        key_hex = os.getenv("LUMERA_MEMORY_KEY", "")
+    try:
+        key = bytes.fromhex(key_hex)
+    except ValueError:
+        return None
+    if not key:
+        return None
+    return hmac.new(key, b"lumera-daemon-key-check", hashlib.sha256).hexdigest()[:32]
+
+
+def _make_private_dir(path: Path):
+    """Create path (and parents) if missing; a directory created here is 0700."""
+    if not path.is_dir():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.mkdir(mode=0o700, exist_ok=True)
+
+
+def lock_path(socket_path: Path) -> Path:
+    """Lock file of the daemon serving socket_path (holds its pid)."""
+    return socket_path.with_suffix(".lock")
+
+
+def log_path(socket_path: Path) -> Path:
+    """Log file (stderr) of an auto-started daemon."""
+    return socket_path.with_suffix(".log")
+
+
+class _SocketLines:
+    """Text lines of a client connection, as stdio_server() reads stdin."""
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self._reader = reader
+
+    def __aiter__(self) -> "_SocketLines":
+        return self
+
+    async def __anext__(self) -> str:
+        line = await self._reader.readline()
+        if not line:
+            raise StopAsyncIteration
+        return line.decode("utf-8", errors="replace")
+
+
+class _SocketText:
+    """Text writer to a client connection, as stdio_server() writes stdout."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self._writer = writer
+
+    async def write(self, text: str):
+        self._writer.write(text.encode("utf-8"))
+
+    async def flush(self):
+        await self._writer.drain()
+
+
+async def _accept_hello(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, fingerprint: Optional[str]
+) -> bool:
+    """Read a client's handshake line and answer it; False if the client is turned away."""
+    try:
+        hello = json.loads(await reader.readline())
+        accepted = isinstance(hello, dict) and hello.get("key_fingerprint") == fingerprint
+    except ValueError:
+        hello, accepted = None, False
+    if accepted:
+        response = {"ok": True}
+    elif isinstance(hello, dict) and "key_fingerprint" in hello:
+        response = {"ok": False, "error": "daemon uses a different LUMERA_MEMORY_KEY"}
+    else:
+        response = {"ok": False, "error": "expected a handshake line with key_fingerprint"}
+    writer.write((json.dumps(response) + "\n").encode("utf-8"))
+    await writer.drain()
+    return accepted
+
+
+async def _serve_client(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, fingerprint: Optional[str]
+):
+    """Run one MCP session over a client connection, after its handshake."""
+    from mcp.server.stdio import stdio_server
+
+    from . import mcp_server as server
+
+    try:
+        if not await _accept_hello(reader, writer, fingerprint):
+            return
+        async with stdio_server(stdin=_SocketLines(reader), stdout=_SocketText(writer)) as (
+            read_stream,
+            write_stream,
+        ):
+            await server.app.run(
+                read_stream, write_stream, server.app.create_initialization_options()
+            )
+    except Exception as e:
+        # A client that goes away mid-response ends only its own session
+        print(f"lumera daemon: client session ended: {e!r}", file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: Path, idle_seconds: float = IDLE_SECONDS) -> bool:
+    """Serve MCP sessions on a Unix socket until idle, SIGTERM or SIGINT.
+
+    Args:
+        socket_path: Socket to listen on (created 0600; a missing directory
+            is created 0700)
+        idle_seconds: Exit after this long without clients (0: never)
+
+    Returns:
+        False if another daemon already serves socket_path, else True
+        after shutting down
+    """
+    socket_path = Path(socket_path)
+    _make_private_dir(socket_path.parent)
+    lock = open(lock_path(socket_path), "a+")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return False
+
+    from . import mcp_server as server
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    fingerprint = key_fingerprint()
+    clients = 0
+    last_client = loop.time()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        nonlocal clients, last_client
+        clients += 1
+        try:
+            await _serve_client(reader, writer, fingerprint)
+        finally:
+            clients -= 1
+            last_client = loop.time()
+
+    try:
+        lock.seek(0)
+        lock.truncate()
+        lock.write(f"{os.getpid()}\n")
+        lock.flush()
+        # The lock is ours, so a socket file left behind is stale
+        if socket_path.exists():
+            socket_path.unlink()
+        # Restrict the socket before listen(): until then connections are refused
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(str(socket_path))
+            os.chmod(socket_path, 0o600)
+            sock.listen(128)
+        except OSError:
+            sock.close()
+            raise
+        listener = await asyncio.start_unix_server(handle, sock=sock, limit=MAX_MESSAGE_BYTES)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        try:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(
+                        stop.wait(), timeout=min(idle_seconds, 1.0) if idle_seconds else None
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                if idle_seconds and clients == 0 and loop.time() - last_client >= idle_seconds:
+                    break
+        finally:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.remove_signal_handler(signum)
+            listener.close()
+            if socket_path.exists():
+                socket_path.unlink()
+            server.executors.shutdown(wait=False)
+    finally:
+        lock.close()
+    return True
+
+
+def _connect(socket_path: Path) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def start_daemon(socket_path: Path) -> subprocess.Popen:
+    """Start a daemon for socket_path in the background.
+
+    It runs in its own session (so it outlives the agent session that
+    started it), with this process's working directory and environment,
+    and appends its stderr to log_path(socket_path) (created 0600).
+    """
+    _make_private_dir(socket_path.parent)
+    root = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (root, env.get("PYTHONPATH")) if p)
+    log_fd = os.open(log_path(socket_path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    with open(log_fd, "ab") as log:
+        return subprocess.Popen(
+            [sys.executable, "-m", "src.daemon", "serve", "--socket", str(socket_path)],
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            start_new_session=True,
+        )
+
+
+def hello(sock: socket.socket, timeout: float = START_TIMEOUT):
+    """Send this process's key fingerprint on a new connection and read the answer.
+
+    Raises:
+        DaemonError: If the daemon turns the connection away (e.g. it was
+            started with another LUMERA_MEMORY_KEY) or does not answer
+    """
+    sock.settimeout(timeout)
+    try:
+        sock.sendall((json.dumps({"key_fingerprint": key_fingerprint()}) + "\n").encode("utf-8"))
+        line = b""
+        while not line.endswith(b"\n") and len(line) < _MAX_HELLO_BYTES:
+            data = sock.recv(1)
+            if not data:
+                break
+            line += data
+        response = json.loads(line)
+    except (OSError, ValueError) as e:
+        raise DaemonError(f"Daemon handshake failed: {e}")
+    finally:
+        sock.settimeout(None)
+    if not isinstance(response, dict) or not response.get("ok"):
+        error = response.get("error") if isinstance(response, dict) else response
+        raise DaemonError(f"Daemon refused the session: {error}")
+
+
+def connect(
+    socket_path: Path, autostart: bool = True, timeout: float = START_TIMEOUT
+) -> socket.socket:
+    """Connect to the daemon on socket_path, starting one if none answers.
+
+    Args:
+        socket_path: Daemon socket
+        autostart: Start a daemon if none is listening
+        timeout: Seconds to wait for a started daemon to listen
+
+    Returns:
+        Connected socket
+
+    Raises:
+        DaemonError: If no daemon is listening (and none could be started)
+    """
+    socket_path = Path(socket_path).resolve()
+    try:
+        return _connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        if not autostart:
+            raise DaemonError(f"No daemon listening on {socket_path}: {e}")
+
+    # Several proxies may start a daemon at once; all but one exit at the lock
+    daemon = start_daemon(socket_path)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return _connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            if time.monotonic() >= deadline:
+                raise DaemonError(
+                    f"Daemon did not start within {timeout}s (see {log_path(socket_path)}): {e}"
+                )
+            if daemon.poll() not in (None, 0):
+                raise DaemonError(
+                    f"Daemon exited with status {daemon.returncode} (see {log_path(socket_path)})"
+                )
+        time.sleep(0.02)
+
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def relay(sock: socket.socket, stdin_fd: int = 0, stdout_fd: int = 1):
+    """Copy stdin to the socket and the socket to stdout until the daemon hangs up.
+
+    End of stdin (the agent closed the session) half-closes the socket, so
+    the daemon finishes pending responses and then closes the connection.
+    """
+
+    def upstream():
+        try:
+            while True:
+                data = os.read(stdin_fd, _CHUNK)
+                if not data:
+                    break
+                sock.sendall(data)
+        except OSError:
+            pass
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    threading.Thread(target=upstream, name="lumera-proxy-stdin", daemon=True).start()
+    while True:
+        data = sock.recv(_CHUNK)
+        if not data:
+            break
+        _write_all(stdout_fd, data)
+
+
+def proxy(socket_path: Path = Path(SOCKET_PATH)):
+    """Serve this process's stdio session through the daemon (in-process if none can be reached)."""
+    sock: Optional[socket.socket] = None
+    if DAEMON_ENABLED:
+        try:
+            sock = connect(socket_path)
+            hello(sock)
+        except (DaemonError, OSError) as e:
+            if sock is not None:
+                sock.close()
+                sock = None
+            print(f"lumera proxy: {e}; serving in-process", file=sys.stderr, flush=True)
+    if sock is None:
+        from .mcp_server import main as serve_stdio
+
+        serve_stdio()
+        return
+    with sock:
+        relay(sock)
+
+
+def stop(socket_path: Path = Path(SOCKET_PATH), timeout: float = 10.0) -> bool:
+    """Ask the daemon serving socket_path to exit (SIGTERM) and wait for it.
+
+    Returns:
+        True if a daemon was running
+    """
+    try:
+        with open(lock_path(Path(socket_path))) as lock:
+            # An unlocked file is left over from a daemon that exited
+            try:
+                fcntl.flock(lock, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                return False
+            except BlockingIOError:
+                pid = int(lock.read().strip())
+    except (OSError, ValueError):
+        return False
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return False
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", nargs="?", default="proxy", choices=["proxy", "serve", "stop"])
+    parser.add_argument("--socket", type=Path, default=Path(SOCKET_PATH))
+    args = parser.parse_args(argv)
+
+    if args.command == "proxy":
+        proxy(args.socket)
+    elif args.command == "serve":
+        if not asyncio.run(serve(args.socket)):
+            print(f"lumera daemon: already running on {args.socket}", file=sys.stderr)
+    else:
+        if not stop(args.socket):
+            print(f"lumera daemon: not running on {args.socket}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Memory enrichment module (deterministic NLP heuristics)."""
 
+from .batch import generate_memory_cards
 from .memory_card import generate_memory_card
 
-__all__ = ["generate_memory_card"]
+__all__ = ["generate_memory_card", "generate_memory_cards"]
@@ -0,0 +1,72 @@
+"""Batch memory-card generation for backfills.
+
+generate_memory_cards() returns exactly what generate_memory_card() returns
+for each session. Backfills gain from it in two ways:
+- every card is ranked against one DocumentFrequencies snapshot, whose idf
+  memo then computes each vocabulary term's idf once per batch instead of
+  once per (session, term)
+- large batches fan out across worker processes in chunks, like
+  pipeline.derive_sessions(), since card extraction is CPU-bound and holds
+  the GIL
+
+Keyword counting and top-k stay on Counter and heapq: both run in C per
+session, and mapping string terms onto a shared NumPy vocabulary costs more
+than they do.
+"""
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..index.df import DocumentFrequencies
+from .memory_card import generate_memory_card
+
+# Below this many sessions, pool startup and IPC cost more than they save
+MIN_PARALLEL_BATCH = 64
+
+
+def _cards_for_chunk(
+    sessions: Sequence[Dict[str, Any]],
+    df: Optional[DocumentFrequencies],
+) -> List[Dict[str, Any]]:
+    """Cards for a run of sessions sharing one DF snapshot (and its idf memo)."""
+    return [generate_memory_card(session, df=df) for session in sessions]
+
+
+def generate_memory_cards(
+    sessions: Sequence[Dict[str, Any]],
+    df: Optional[DocumentFrequencies] = None,
+    max_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    chunksize: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Generate Memory Cards for many sessions (same output as generate_memory_card).
+
+    Args:
+        sessions: Session data dicts
+        df: Optional index document frequencies for TF-IDF keyword ranking.
+            Held fixed for the whole batch.
+        max_workers: Worker processes (default: os.cpu_count())
+        executor: Existing process pool to reuse (amortizes worker startup)
+        chunksize: Sessions per worker task (default: ~4 chunks per worker).
+            Each chunk receives one copy of df.
+
+    Returns:
+        One memory card per session, in input order
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if executor is None and (workers <= 1 or len(sessions) < MIN_PARALLEL_BATCH):
+        return _cards_for_chunk(sessions, df)
+
+    if chunksize is None:
+        chunksize = max(1, len(sessions) // (workers * 4))
+    chunks = [sessions[i : i + chunksize] for i in range(0, len(sessions), chunksize)]
+    task = partial(_cards_for_chunk, df=df)
+
+    if executor is not None:
+        results = executor.map(task, chunks)
+        return [card for chunk in results for card in chunk]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [card for chunk in pool.map(task, chunks) for card in chunk]
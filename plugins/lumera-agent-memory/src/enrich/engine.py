@@ -0,0 +1,255 @@
+"""Single-pass enrichment engine for memory cards.
+
+The extract_* helpers in memory_card.py each rescan the full session text
+with their own uncompiled patterns, always run every pattern to completion
+even though only the first few results are kept, and extract_keywords sorts
+the whole frequency table to take the top 20. The engine produces the same
+output with:
+- one TextAnalysis per text: lowercasing and keyword tokenization happen
+  once and are shared by every extractor that needs them
+- precompiled extractor patterns, iterated lazily and stopped as soon as an
+  extractor has its limit; on ASCII text, patterns skip straight to their
+  first leading literal (or are skipped entirely when it is absent)
+- heapq.nlargest for keyword top-k (documented equivalent to a stable
+  ``sorted(..., reverse=True)[:n]``, so frequency ties keep first-seen order)
+
+Given DocumentFrequencies from the index, keywords are ranked by TF-IDF
+instead of raw term frequency, so corpus-wide words ("session", "error",
+"tool") stop crowding out the terms that distinguish one memory from another.
+
+Extractors deliberately scan the whole text rather than sentence fragments:
+several patterns (e.g. ``TODO: ...`` up to the next period or newline) can
+span ``!``/``?`` sentence breaks, so per-sentence matching would change output.
+"""
+
+import heapq
+import re
+from collections import Counter
+from operator import itemgetter, mul
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..index.df import DocumentFrequencies
+
+# fmt: off
+STOPWORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "is", "was", "are", "were", "be", "been", "being",
+    "have", "has", "had", "do", "does", "did", "will", "would", "should", "could", "may",
+    "might", "must", "can", "to", "of", "in", "on", "at", "for", "with", "from", "by", "as",
+    "it", "this", "that", "these", "those", "i", "you", "he", "she", "they", "we", "what",
+    "when", "where", "why", "how", "which"
+})
+# fmt: on
+
+KEYWORD_TOKEN = re.compile(r"\b[a-z]{3,}\b")
+
+# Each extractor pattern with the lowercase literals every match starts with.
+# On ASCII text a pattern whose literals are absent cannot match, and a scan
+# can start at the first literal occurrence. (Non-ASCII text scans fully:
+# IGNORECASE also folds e.g. U+0130 to "i" and U+017F to "s".)
+DECISION_PATTERNS = [
+    (
+        re.compile(
+            r"(?:decided|chose|selected|picked)\s+(?:to\s+)?([^.!?]{10,100})", re.IGNORECASE
+        ),
+        ("decided", "chose", "selected", "picked"),
+    ),
+    (re.compile(r"(?:will|going to)\s+([^.!?]{10,100})", re.IGNORECASE), ("will", "going to")),
+    (
+        re.compile(r"(?:approved|rejected|accepted)\s+([^.!?]{10,100})", re.IGNORECASE),
+        ("approved", "rejected", "accepted"),
+    ),
+]
+
+TODO_PATTERNS = [
+    (
+        re.compile(r"(?:TODO|FIXME|ACTION):\s*([^.\n]{5,100})", re.IGNORECASE),
+        ("todo", "fixme", "action"),
+    ),
+    (
+        re.compile(r"(?:need to|must|should)\s+([^.!?]{10,100})", re.IGNORECASE),
+        ("need to", "must", "should"),
+    ),
+    (
+        re.compile(r"(?:next steps?|action items?):\s*([^.!?]{10,100})", re.IGNORECASE),
+        ("next step", "action item"),
+    ),
+]
+
+ORG_PATTERN = re.compile(r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})\b")
+DOMAIN_PATTERN = re.compile(r"\b([A-Z][a-zA-Z0-9-]+)\b")
+QUOTE_PATTERN = re.compile(r'["\'](.*?)["\']')
+
+MAX_DECISIONS = 5
+MAX_TODOS = 7
+MAX_ORGS = 5
+MAX_DOMAINS = 5
+MAX_ENTITIES = 15
+MAX_QUOTES = 5
+MAX_KEYWORDS = 20
+
+
+class TextAnalysis:
+    """Shared per-text state, computed lazily and at most once."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._lowered: Optional[str] = None
+        self._tokens: Optional[List[str]] = None
+        self._term_counts: Optional[Counter] = None
+
+    @property
+    def lowered(self) -> str:
+        if self._lowered is None:
+            self._lowered = self.text.lower()
+        return self._lowered
+
+    @property
+    def tokens(self) -> List[str]:
+        """Lowercase keyword tokens (3+ ASCII letters), in text order."""
+        if self._tokens is None:
+            self._tokens = KEYWORD_TOKEN.findall(self.lowered)
+        return self._tokens
+
+    @property
+    def term_counts(self) -> Counter:
+        """Non-stopword token frequencies, in first-occurrence order."""
+        if self._term_counts is None:
+            counts = Counter(self.tokens)
+            for word in STOPWORDS.intersection(counts):
+                del counts[word]
+            self._term_counts = counts
+        return self._term_counts
+
+    def scan_start(self, anchors: Sequence[str]) -> int:
+        """Earliest offset a match led by one of anchors can start at, or -1 if none can."""
+        if not self.text.isascii():
+            return 0
+        hits = [i for i in (self.lowered.find(a) for a in anchors) if i >= 0]
+        return min(hits) if hits else -1
+
+
+def _collect(
+    patterns: Sequence[Tuple[re.Pattern, Tuple[str, ...]]],
+    analysis: TextAnalysis,
+    limit: int,
+    min_length: int,
+) -> List[str]:
+    """First `limit` stripped group(1) matches longer than min_length, in pattern order."""
+    results = []
+    for pattern, anchors in patterns:
+        start = analysis.scan_start(anchors)
+        if start < 0:
+            continue
+        for match in pattern.finditer(analysis.text, start):
+            item = match.group(1).strip()
+            if len(item) > min_length:
+                results.append(item)
+                if len(results) == limit:
+                    return results
+    return results
+
+
+def extract_decisions(analysis: TextAnalysis) -> List[str]:
+    """Decision-like statements (same output as memory_card.extract_decisions)."""
+    return _collect(DECISION_PATTERNS, analysis, MAX_DECISIONS, 10)
+
+
+def extract_todos(analysis: TextAnalysis) -> List[str]:
+    """TODO/action items (same output as memory_card.extract_todos)."""
+    return _collect(TODO_PATTERNS, analysis, MAX_TODOS, 5)
+
+
+def extract_entities(analysis: TextAnalysis) -> List[str]:
+    """Entity heuristics (same output as memory_card.extract_entities)."""
+    candidates = []
+    for match in ORG_PATTERN.finditer(analysis.text):
+        candidates.append(match.group(1))
+        if len(candidates) == MAX_ORGS:
+            break
+
+    domains = 0
+    for match in DOMAIN_PATTERN.finditer(analysis.text):
+        domain = match.group(1)
+        if len(domain) > 3:
+            candidates.append(domain)
+            domains += 1
+            if domains == MAX_DOMAINS:
+                break
+
+    return dedupe_entities(candidates)
+
+
+def dedupe_entities(candidates: Sequence[str]) -> List[str]:
+    """Org then domain candidates -> unique entities, first occurrence kept."""
+    seen = set()
+    entities = []
+    for entity in candidates:
+        if entity not in seen and len(entity) > 2:
+            seen.add(entity)
+            entities.append(entity)
+    return entities[:MAX_ENTITIES]
+
+
+def extract_keywords(
+    analysis: TextAnalysis,
+    max_keywords: int = MAX_KEYWORDS,
+    df: Optional[DocumentFrequencies] = None,
+) -> List[str]:
+    """Top terms by frequency, or by TF-IDF when df is given.
+
+    Without df the output is the same as memory_card.extract_keywords. Ties
+    keep first-occurrence order in both modes.
+    """
+    return rank_keywords(analysis.term_counts, max_keywords, df)
+
+
+def rank_keywords(
+    counts: Dict[str, int],
+    max_keywords: int = MAX_KEYWORDS,
+    df: Optional[DocumentFrequencies] = None,
+) -> List[str]:
+    """Top terms of a first-occurrence-ordered term count table (see extract_keywords)."""
+    if df is None:
+        top = heapq.nlargest(max_keywords, counts.items(), key=itemgetter(1))
+        return [word for word, _ in top]
+
+    scored = zip(counts, map(mul, counts.values(), df.idf_many(counts)))
+    return [word for word, _ in heapq.nlargest(max_keywords, scored, key=itemgetter(1))]
+
+
+def extract_notable_quotes(analysis: TextAnalysis) -> List[str]:
+    """Quoted text of 10-160 chars (same output as memory_card.extract_notable_quotes)."""
+    quotes = []
+    for match in QUOTE_PATTERN.finditer(analysis.text):
+        quote = match.group(1)
+        if 10 <= len(quote) <= 160:
+            quotes.append(quote)
+            if len(quotes) == MAX_QUOTES:
+                break
+    return quotes
+
+
+def enrich(
+    analysis: TextAnalysis, df: Optional[DocumentFrequencies] = None
+) -> Dict[str, List[str]]:
+    """Run every extractor over one shared analysis.
+
+    Args:
+        analysis: TextAnalysis of the concatenated session text
+        df: Optional document frequencies for TF-IDF keyword ranking
+
+    Returns:
+        Dict with decisions, todos, entities, keywords, notable_quotes
+    """
+    return {
+        "decisions": extract_decisions(analysis),
+        "todos": extract_todos(analysis),
+        "entities": extract_entities(analysis),
+        "keywords": extract_keywords(analysis, df=df),
+        "notable_quotes": extract_notable_quotes(analysis),
+    }
+
+
+def enrich_text(text: str, df: Optional[DocumentFrequencies] = None) -> Dict[str, List[str]]:
+    """Run every extractor over one shared analysis of text (see enrich)."""
+    return enrich(TextAnalysis(text), df=df)
@@ -0,0 +1,316 @@
+"""Incremental memory-card enrichment for sessions that grow between stores.
+
+A long-running session is exported and stored again each time it grows, and
+enrich() rescans the whole text every time. EnrichmentState keeps what each
+extractor found in the text so far, plus the offset where it must resume, so
+the next version only scans the text appended since (and a short unresolved
+tail before it).
+
+An extractor's result is final up to the last "barrier" character it can
+never consume, because no match attempt that starts before that character
+reads past it:
+- keyword tokens: whitespace
+- decisions/todos: ".", "!" and "?" (only "." for ``TODO: ...`` items, which
+  may contain "!"); on ASCII text they resume at the first anchor literal
+  after that barrier, since matches can only start at one
+- entities: for capitalized phrases, anything but ASCII letters and
+  whitespace, or a lowercase letter after whitespace; for capitalized words,
+  anything but ASCII letters, digits and "-". Both then resume at the next
+  uppercase letter, since matches can only start at one.
+- quotes: a closed quote is final; newlines are barriers, and the scan
+  resumes at the first quote character after them
+
+Matches after the barrier count for the current card only and are found
+again next time. Cards built this way are identical to enrich() on the full
+text. A state is only reused when the new text extends exactly the text it
+was built from (checked by SHA-256, the one pass over the full text);
+otherwise, e.g. when an earlier field such as the summary changed,
+enrichment starts from scratch.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..index.df import DocumentFrequencies
+from .engine import (
+    DECISION_PATTERNS,
+    DOMAIN_PATTERN,
+    MAX_DECISIONS,
+    MAX_DOMAINS,
+    MAX_ORGS,
+    MAX_QUOTES,
+    MAX_TODOS,
+    ORG_PATTERN,
+    QUOTE_PATTERN,
+    TODO_PATTERNS,
+    TextAnalysis,
+    dedupe_entities,
+    rank_keywords,
+)
+
+# Bump when the state layout or any extractor changes (old states are then ignored)
+STATE_VERSION = 1
+
+# Characters each DECISION_PATTERNS / TODO_PATTERNS entry can never match
+DECISION_BARRIERS = (".!?", ".!?", ".!?")
+TODO_BARRIERS = (".", ".!?", ".!?")
+
+# Match up to the last barrier of ORG_PATTERN / DOMAIN_PATTERN (the greedy
+# prefix backtracks from the end, so this costs O(distance from end))
+_LAST_ORG_BARRIER = re.compile(r"(?s).*(?:[^A-Za-z\s]|\s[a-z])")
+_LAST_DOMAIN_BARRIER = re.compile(r"(?s).*[^A-Za-z0-9-]")
+_UPPER = re.compile(r"[A-Z]")
+
+
+def _last_of(text: str, chars: str, start: int) -> int:
+    """Last index >= start of any of chars in text, or -1."""
+    return max(text.rfind(c, start) for c in chars)
+
+
+class EnrichmentState:
+    """Final extractor results over one version of a session's text (JSON-serializable)."""
+
+    def __init__(self):
+        # UTF-8 length and SHA-256 of the text this state was built from
+        self.length = 0
+        self.text_sha256 = hashlib.sha256().hexdigest()
+        self.term_counts: Counter = Counter()
+        self.token_offset = 0
+        # [final items, resume offset] per pattern
+        self.decisions: List[List[Any]] = [[[], 0] for _ in DECISION_PATTERNS]
+        self.todos: List[List[Any]] = [[[], 0] for _ in TODO_PATTERNS]
+        self.orgs: List[Any] = [[], 0]
+        self.domains: List[Any] = [[], 0]
+        self.quotes: List[str] = []
+        self.quote_offset = 0
+        # Whether the call that produced this state resumed a previous one,
+        # and where it started scanning (not persisted)
+        self.resumed = False
+        self.scanned_from = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for storage (see from_dict)."""
+        return {
+            "version": STATE_VERSION,
+            "length": self.length,
+            "text_sha256": self.text_sha256,
+            "term_counts": list(self.term_counts.items()),
+            "token_offset": self.token_offset,
+            "decisions": self.decisions,
+            "todos": self.todos,
+            "orgs": self.orgs,
+            "domains": self.domains,
+            "quotes": self.quotes,
+            "quote_offset": self.quote_offset,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["EnrichmentState"]:
+        """Deserialize a to_dict() snapshot; None if missing or from another STATE_VERSION."""
+        if not data or data.get("version") != STATE_VERSION:
+            return None
+        state = cls()
+        state.length = data["length"]
+        state.text_sha256 = data["text_sha256"]
+        state.term_counts = Counter(dict(data["term_counts"]))
+        state.token_offset = data["token_offset"]
+        state.decisions = data["decisions"]
+        state.todos = data["todos"]
+        state.orgs = data["orgs"]
+        state.domains = data["domains"]
+        state.quotes = data["quotes"]
+        state.quote_offset = data["quote_offset"]
+        return state
+
+
+class _Lowered:
+    """Lowercased copy of text[start:], for anchor lookups (None if not ASCII)."""
+
+    def __init__(self, text: str, start: int):
+        region = text[start:]
+        self.start = start
+        self.lowered = region.lower() if region.isascii() else None
+
+    def find(self, anchors: Sequence[str], pos: int) -> int:
+        """Earliest anchor occurrence at or after pos, or -1."""
+        hits = [i for i in (self.lowered.find(a, pos - self.start) for a in anchors) if i >= 0]
+        return min(hits) + self.start if hits else -1
+
+
+def _advance_anchored(
+    text: str,
+    lowered: _Lowered,
+    patterns: Sequence[Tuple[re.Pattern, Tuple[str, ...]]],
+    barriers: Sequence[str],
+    found: List[List[Any]],
+    limit: int,
+    min_length: int,
+) -> Tuple[List[List[Any]], List[List[str]]]:
+    """Advance decision/todo pattern states over text.
+
+    Returns:
+        (new per-pattern [final items, offset], per-pattern items for the current card)
+    """
+    n = len(text)
+    states, current = [], []
+    for (pattern, anchors), chars, (items, offset) in zip(patterns, barriers, found):
+        if len(items) >= limit:
+            states.append([items, offset])
+            current.append(items)
+            continue
+
+        # New resume offset: past the last barrier, then (ASCII) up to the
+        # first anchor after it, as long as no anchor could straddle the end
+        resume = _last_of(text, chars, offset) + 1 or offset
+        if lowered.lowered is not None:
+            first_open = lowered.find(anchors, resume)
+            cap = n - max(map(len, anchors)) + 1
+            resume = max(resume, min(first_open, cap) if first_open >= 0 else cap)
+            start = lowered.find(anchors, offset)
+        else:
+            start = offset
+
+        final, items = _matches(pattern, text, start, resume, items, limit, min_length, strip=True)
+        states.append([final, resume])
+        current.append(items)
+    return states, current
+
+
+def _advance_entities(
+    pattern: re.Pattern,
+    last_barrier: re.Pattern,
+    text: str,
+    found: List[Any],
+    limit: int,
+    min_length: int,
+) -> Tuple[List[Any], List[str]]:
+    """Advance an entity pattern state: (new [final items, offset], items for the current card)."""
+    items, offset = found
+    if len(items) >= limit:
+        return found, items
+    barrier = last_barrier.match(text, offset)
+    upper = _UPPER.search(text, barrier.end() if barrier else offset)
+    resume = upper.start() if upper else len(text)
+    final, items = _matches(pattern, text, offset, resume, items, limit, min_length)
+    return [final, resume], items
+
+
+def _matches(
+    pattern: re.Pattern,
+    text: str,
+    start: int,
+    resume: int,
+    found: List[str],
+    limit: int,
+    min_length: int,
+    strip: bool = False,
+) -> Tuple[List[str], List[str]]:
+    """Scan text from start, capped at limit.
+
+    Returns:
+        (found + matches before resume, found + all matches)
+    """
+    final, tail = list(found), []
+    if start >= 0 and len(final) < limit:
+        for match in pattern.finditer(text, start):
+            item = match.group(1).strip() if strip else match.group(1)
+            if len(item) > min_length:
+                (final if match.start() < resume else tail).append(item)
+                if len(final) + len(tail) == limit:
+                    break
+    return final, final + tail
+
+
+def _flatten(per_pattern: List[List[str]], limit: int) -> List[str]:
+    """First limit items in pattern order (engine._collect semantics)."""
+    return [item for items in per_pattern for item in items][:limit]
+
+
+def enrich_incremental(
+    text: str,
+    state: Optional[EnrichmentState] = None,
+    df: Optional[DocumentFrequencies] = None,
+) -> Tuple[Dict[str, List[str]], EnrichmentState, Counter]:
+    """Run every extractor over text, resuming from state when text extends it.
+
+    Args:
+        text: Full session text (see memory_card.session_text)
+        state: State returned for an earlier, shorter version of the session
+        df: Optional document frequencies for TF-IDF keyword ranking
+
+    Returns:
+        (extracted, new_state, term_counts): extracted is what enrich() returns
+        for text, new_state is to be passed in with the next version and
+        term_counts are the text's keyword term frequencies
+    """
+    # One hash pass: the old text's digest, then continued over the new bytes
+    encoded = memoryview(text.encode("utf-8", "surrogatepass"))
+    digest = hashlib.sha256()
+    if state is not None and len(encoded) >= state.length:
+        digest.update(encoded[: state.length])
+    resumed = state is not None and digest.hexdigest() == state.text_sha256
+    if not resumed:
+        state = EnrichmentState()
+        digest = hashlib.sha256()
+    digest.update(encoded[state.length :])
+    new = EnrichmentState()
+    new.resumed = resumed
+    new.length = len(encoded)
+    new.text_sha256 = digest.hexdigest()
+
+    # Keyword tokens: fold whole words, count the unfinished last word only now
+    cut = _last_of(text, " \n\t", state.token_offset) + 1 or state.token_offset
+    new.term_counts = state.term_counts.copy()
+    new.term_counts.update(TextAnalysis(text[state.token_offset : cut]).term_counts)
+    new.token_offset = cut
+    term_counts = new.term_counts.copy()
+    term_counts.update(TextAnalysis(text[cut:]).term_counts)
+
+    # Decisions and todos
+    open_offsets = [offset for items, offset in state.decisions if len(items) < MAX_DECISIONS]
+    open_offsets += [offset for items, offset in state.todos if len(items) < MAX_TODOS]
+    lowered = _Lowered(text, min(open_offsets, default=len(text)))
+    new.decisions, decisions = _advance_anchored(
+        text, lowered, DECISION_PATTERNS, DECISION_BARRIERS, state.decisions, MAX_DECISIONS, 10
+    )
+    new.todos, todos = _advance_anchored(
+        text, lowered, TODO_PATTERNS, TODO_BARRIERS, state.todos, MAX_TODOS, 5
+    )
+
+    # Entities
+    new.orgs, orgs = _advance_entities(
+        ORG_PATTERN, _LAST_ORG_BARRIER, text, state.orgs, MAX_ORGS, -1
+    )
+    new.domains, domains = _advance_entities(
+        DOMAIN_PATTERN, _LAST_DOMAIN_BARRIER, text, state.domains, MAX_DOMAINS, 3
+    )
+
+    # Quotes: final once closed
+    new.quotes = list(state.quotes)
+    new.quote_offset = state.quote_offset
+    if len(new.quotes) < MAX_QUOTES:
+        for match in QUOTE_PATTERN.finditer(text, state.quote_offset):
+            new.quote_offset = match.end()
+            quote = match.group(1)
+            if 10 <= len(quote) <= 160:
+                new.quotes.append(quote)
+                if len(new.quotes) == MAX_QUOTES:
+                    break
+        if len(new.quotes) < MAX_QUOTES:
+            line_start = max(new.quote_offset, text.rfind("\n", new.quote_offset) + 1)
+            opened = [i for i in (text.find('"', line_start), text.find("'", line_start)) if i >= 0]
+            new.quote_offset = min(opened) if opened else len(text)
+
+    new.scanned_from = min(
+        open_offsets + [state.token_offset, state.orgs[1], state.domains[1], state.quote_offset]
+    )
+    extracted = {
+        "decisions": _flatten(decisions, MAX_DECISIONS),
+        "todos": _flatten(todos, MAX_TODOS),
+        "entities": dedupe_entities(orgs + domains),
+        "keywords": rank_keywords(term_counts, df=df),
+        "notable_quotes": list(new.quotes),
+    }
+    return extracted, new, term_counts
@@ -5,7 +5,10 @@ from session data without any network calls or ML models.
 """
 
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from ..index.df import DocumentFrequencies
+from .engine import TextAnalysis, enrich
 
 
 def extract_sentences(text: str) -> List[str]:
@@ -159,30 +162,50 @@ def generate_summary_bullets(session: Dict[str, Any]) -> List[str]:
     return bullets[:7]
 
 
-def generate_memory_card(session: Dict[str, Any]) -> Dict[str, Any]:
+def session_text(session: Dict[str, Any]) -> str:
+    """Concatenate the text fields a memory card is extracted from."""
+    text_parts = []
+    for key in ["summary", "tool_name", "error_message", "output"]:
+        if key in session and session[key]:
+            text_parts.append(str(session[key]))
+    return " ".join(text_parts)
+
+
+def generate_memory_card(
+    session: Dict[str, Any],
+    df: Optional[DocumentFrequencies] = None,
+    analysis: Optional[TextAnalysis] = None,
+    extracted: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, Any]:
     """Generate a Memory Card from session data.
 
     Uses deterministic NLP heuristics (no network, no ML models).
 
     Args:
         session: Session data dict
+        df: Optional index document frequencies; keywords are then ranked
+            by TF-IDF instead of raw term frequency
+        analysis: Optional precomputed TextAnalysis of session_text(session),
+            for callers that also need its terms
+        extracted: Optional precomputed extractor output for the session
+            text (e.g. from incremental.enrich_incremental); analysis and df
+            are then unused
 
     Returns:
         Memory card dict with title, summary_bullets, decisions, todos, entities, keywords, notable_quotes
     """
-    # Concatenate all text fields for analysis
-    text_parts = []
-    for key in ["summary", "tool_name", "error_message", "output"]:
-        if key in session and session[key]:
-            text_parts.append(str(session[key]))
-    full_text = " ".join(text_parts)
+    if extracted is None:
+        if analysis is None:
+            analysis = TextAnalysis(session_text(session))
+        # Single shared pass over the session text (same output as the extract_* helpers)
+        extracted = enrich(analysis, df=df)
 
     return {
         "title": generate_title(session),
         "summary_bullets": generate_summary_bullets(session),
-        "decisions": extract_decisions(full_text),
-        "todos": extract_todos(full_text),
-        "entities": extract_entities(full_text),
-        "keywords": extract_keywords(full_text),
-        "notable_quotes": extract_notable_quotes(full_text),
+        "decisions": extracted["decisions"],
+        "todos": extracted["todos"],
+        "entities": extracted["entities"],
+        "keywords": extracted["keywords"],
+        "notable_quotes": extracted["notable_quotes"],
     }
@@ -1,5 +1,6 @@
 """Local SQLite index for fast memory search."""
 
+from .df import DocumentFrequencies
 from .index import MemoryIndex
 
-__all__ = ["MemoryIndex"]
+__all__ = ["MemoryIndex", "DocumentFrequencies"]
@@ -0,0 +1,64 @@
+"""In-process document-frequency snapshot for TF-IDF keyword ranking."""
+
+import math
+import threading
+from typing import Collection, Dict, Iterable, List
+
+
+class DocumentFrequencies:
+    """Term -> number of indexed memories containing it, plus corpus size.
+
+    Lookups are plain dict gets (O(1) per term). MemoryIndex keeps one
+    instance per connection, applies its own inserts to it in place and
+    reloads it when another connection has written (PRAGMA data_version).
+    idf values are memoized until the next add_document(), so a batch of
+    cards ranked against one snapshot computes each term's idf once.
+    Stores derive cards against the snapshot on one thread while another
+    store's insert updates it, so updates and memoized lookups hold a lock.
+    """
+
+    def __init__(self, counts: Dict[str, int] = None, docs: int = 0):
+        """Initialize snapshot.
+
+        Args:
+            counts: Document frequency per term
+            docs: Number of memories that contributed terms
+        """
+        self.counts = counts or {}
+        self.docs = docs
+        self._idf_memo: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Shipped to worker processes (parallel derivation): the memo and
+        # lock stay behind
+        return {"counts": self.counts, "docs": self.docs}
+
+    def __setstate__(self, state):
+        self.__init__(state["counts"], state["docs"])
+
+    def add_document(self, terms: Iterable[str]):
+        """Count one more memory containing each of the (distinct) terms."""
+        counts = self.counts
+        with self._lock:
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            self.docs += 1
+            self._idf_memo.clear()  # N changed: every idf changed
+
+    def idf(self, term: str) -> float:
+        """Smoothed inverse document frequency: ln((1 + N) / (1 + df)) + 1.
+
+        Always >= 1, and exactly 1 for every term on an empty corpus, so
+        TF-IDF ranking degrades to plain term-frequency ranking at cold start.
+        """
+        return math.log((1 + self.docs) / (1 + self.counts.get(term, 0))) + 1.0
+
+    def idf_many(self, terms: Collection[str]) -> List[float]:
+        """idf() for each of terms, in order, using the memo."""
+        memo = self._idf_memo
+        with self._lock:
+            missing = set(terms).difference(memo)
+            if missing:
+                memo.update(zip(missing, map(self.idf, missing)))
+            return list(map(memo.__getitem__, terms))
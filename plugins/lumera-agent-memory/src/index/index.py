@@ -4,15 +4,82 @@ CRITICAL: This index stores POINTERS only (never blob content).
 Queries return pointers for retrieval from Cascade.
 """
 
+import functools
 import json
 import sqlite3
+import threading
+import zlib
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+from .df import DocumentFrequencies
+from .sketch import (
+    DEFAULT_DUPLICATE_DISTANCE,
+    SIMHASH_BANDS,
+    bands,
+    from_sqlite,
+    hamming,
+    simhash64,
+    sketch_text,
+    to_sqlite,
+)
+from .vectors import VectorMatrix, card_text, embed_text, quantize
+
+SEARCH_MODES = ("lexical", "vector", "hybrid")
+
+SCHEMA_PATH = Path(__file__).parent / "schema.sql"
+
+# Hashed vectors of unrelated texts have cosine ~ +-1/sqrt(VECTOR_DIM) (0.06);
+# below this a vector hit is noise
+VECTOR_MIN_SIMILARITY = 0.1
+
+# Reciprocal-rank-fusion constant for hybrid search (Cormack et al.: 60)
+RRF_K = 60
+# Candidates taken from each ranking before fusion, per requested result
+HYBRID_CANDIDATES_PER_RESULT = 5
+
+# Rows fetched per wanted result when collapsing near-duplicate clusters
+COLLAPSE_OVERFETCH = 3
+
+
+def schema_version(schema: str) -> int:
+    """PRAGMA user_version of a database set up from this schema.sql text.
+
+    A CRC-32 of the text (31 bits, never 0), so any edit to schema.sql is a
+    new version without a hand-maintained number.
+    """
+    return (zlib.crc32(schema.encode("utf-8")) & 0x7FFFFFFF) or 1
+
+
+def _holding(lock_name: str) -> Callable[[Callable], Callable]:
+    """Decorator: run a MemoryIndex method holding the named connection lock."""
+
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with getattr(self, lock_name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+_synchronized = _holding("_lock")
+_reading = _holding("_read_lock")
 
 
 class MemoryIndex:
-    """SQLite-based local memory index with FTS5 full-text search."""
+    """SQLite-based local memory index with FTS5 full-text search.
+
+    Safe to share between threads (the MCP server calls it from its query
+    and I/O pools). Writes and the store path's reads share one connection
+    under one re-entrant lock. Searches and lookups use a second, read-only
+    connection with its own lock: in WAL mode they read the last committed
+    state while a write transaction (e.g. a large add_memories() batch) is
+    still open, instead of waiting for it.
+    """
 
     def __init__(self, db_path: Path = None):
         """Initialize index.
@@ -25,15 +92,37 @@ class MemoryIndex:
 
         db_path.parent.mkdir(parents=True, exist_ok=True)
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.RLock()
         self.conn.row_factory = sqlite3.Row  # Enable dict-like access
         self._initialize_schema()
+        self._reader = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._reader.row_factory = sqlite3.Row
+        self._read_lock = threading.RLock()
+
+        # In-process DF cache (see document_frequencies)
+        self._df: Optional[DocumentFrequencies] = None
+        self._df_data_version: Optional[int] = None
+        # In-process vector cache of the reader (see _vector_matrix)
+        self._vectors: Optional[VectorMatrix] = None
+        self._vectors_data_version: Optional[int] = None
 
     def _initialize_schema(self):
-        """Create tables and indexes if not exist."""
-        schema_path = Path(__file__).parent / "schema.sql"
-        schema = schema_path.read_text()
+        """Create tables and indexes if not exist.
+
+        schema.sql is idempotent but not free (dozens of statements). A
+        database set up from the current text records its version in
+        PRAGMA user_version, and opening it skips the script.
+        """
+        schema = SCHEMA_PATH.read_text()
+        version = schema_version(schema)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] == version:
+            return
+        # WAL (persistent in the database file): readers see the last
+        # commit while a write is in progress
+        self.conn.execute("PRAGMA journal_mode=WAL")
         self.conn.executescript(schema)
+        self.conn.execute(f"PRAGMA user_version = {version}")
         self.conn.commit()
 
     def add_memory(
@@ -47,6 +136,9 @@ class MemoryIndex:
         title: str = None,
         snippet: str = None,
         metadata: Dict[str, Any] = None,
+        terms: Iterable[str] = None,
+        duplicate_of: Optional[int] = None,
+        enrichment_state: Dict[str, Any] = None,
     ) -> int:
         """Add memory pointer to index.
 
@@ -60,6 +152,13 @@ class MemoryIndex:
             title: Memory title (for search/display)
             snippet: Short summary/preview (for search/display)
             metadata: Additional metadata dict
+            terms: Distinct keyword terms of the session, counted into the
+                document frequencies used for TF-IDF keyword ranking
+            duplicate_of: ID of the first memory of this memory's
+                near-duplicate cluster (see find_near_duplicates)
+            enrichment_state: Extractor state of this version of the session
+                (see get_enrichment_state), JSON-serializable and stored as
+                is; requires source_session_id
 
         Returns:
             Memory ID (primary key)
@@ -67,21 +166,350 @@ class MemoryIndex:
         Raises:
             sqlite3.IntegrityError: If pointer already exists
         """
-        tags_json = json.dumps(tags or [])
-        metadata_json = json.dumps(metadata or {})
-        created_at = datetime.now().isoformat()
+        # Vector, sketch and JSON are built before taking the lock, so
+        # concurrent queries only wait for the SQL writes
+        row = self._prepare_memory(
+            pointer, content_hash, artifact_type, tags, source_session_id, source_tool,
+            title, snippet, metadata, terms, enrichment_state,
+        )
+        with self._lock:
+            try:
+                memory_id = self._insert_memory(row, duplicate_of)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            self._apply_insert(row["terms"])
+        return memory_id
+
+    def add_memories(
+        self,
+        records: List[Dict[str, Any]],
+        merges: List[Tuple[int, List[str], str]] = None,
+    ) -> List[int]:
+        """Add many memory pointers (and near-duplicate merges) in one transaction.
+
+        Either every record and merge is written or, on error, none is.
+
+        Args:
+            records: add_memory() keyword arguments, one dict per memory. A
+                record may set "duplicate_of_record" to the position of an
+                earlier record in the list, whose cluster it then joins
+                (for near-duplicates within the batch)
+            merges: (memory_id, tags, source_session_id) triples applied as
+                by merge_into()
 
+        Returns:
+            Memory IDs in record order
+
+        Raises:
+            sqlite3.IntegrityError: If a pointer already exists
+            ValueError: If duplicate_of_record is not an earlier position
+        """
+        rows, links = [], []
+        for position, record in enumerate(records):
+            record = dict(record)
+            duplicate_of_record = record.pop("duplicate_of_record", None)
+            if duplicate_of_record is not None and not 0 <= duplicate_of_record < position:
+                raise ValueError(
+                    f"duplicate_of_record must point at an earlier record: {duplicate_of_record}"
+                )
+            duplicate_of = record.pop("duplicate_of", None)
+            rows.append(self._prepare_memory(**record))
+            links.append((duplicate_of, duplicate_of_record))
+
+        with self._lock:
+            memory_ids: List[int] = []
+            clusters: List[int] = []
+            try:
+                for row, (duplicate_of, duplicate_of_record) in zip(rows, links):
+                    if duplicate_of_record is not None:
+                        duplicate_of = clusters[duplicate_of_record]
+                    memory_id = self._insert_memory(row, duplicate_of)
+                    memory_ids.append(memory_id)
+                    clusters.append(duplicate_of if duplicate_of is not None else memory_id)
+                for memory_id, tags, source_session_id in merges or []:
+                    self._merge(memory_id, tags, source_session_id)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            for row in rows:
+                self._apply_insert(row["terms"])
+        return memory_ids
+
+    def _prepare_memory(
+        self,
+        pointer: str,
+        content_hash: str,
+        artifact_type: str = "artifact_only",
+        tags: List[str] = None,
+        source_session_id: str = None,
+        source_tool: str = None,
+        title: str = None,
+        snippet: str = None,
+        metadata: Dict[str, Any] = None,
+        terms: Iterable[str] = None,
+        enrichment_state: Dict[str, Any] = None,
+    ) -> Dict[str, Any]:
+        """Column values, vector and sketch of one memory (no database access)."""
+        card = (metadata or {}).get("memory_card")
+        vector = embed_text(card_text(title, snippet, tags, source_tool, card))
+        return {
+            "values": (
+                pointer,
+                content_hash,
+                artifact_type,
+                json.dumps(tags or []),
+                datetime.now().isoformat(),
+                source_session_id,
+                source_tool,
+                title,
+                snippet,
+                json.dumps(metadata or {}),
+            ),
+            "source_session_id": source_session_id,
+            "vector_blob": quantize(vector) if any(vector) else None,
+            "signature": simhash64(sketch_text(title, snippet, card)),
+            "state_json": json.dumps(enrichment_state) if enrichment_state is not None else None,
+            "terms": sorted(set(terms)) if terms else [],
+        }
+
+    def _insert_memory(self, row: Dict[str, Any], duplicate_of: Optional[int] = None) -> int:
+        """Insert one _prepare_memory() row without committing; returns the memory ID."""
         cursor = self.conn.execute(
             """
             INSERT INTO memories (pointer, content_hash, artifact_type, tags_json, created_at,
                                   source_session_id, source_tool, title, snippet, metadata_json)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (pointer, content_hash, artifact_type, tags_json, created_at, source_session_id, source_tool, title, snippet, metadata_json),
+            row["values"],
         )
+        memory_id = cursor.lastrowid
+
+        if row["vector_blob"] is not None:
+            self.conn.execute(
+                "INSERT INTO memory_vectors (memory_id, vector) VALUES (?, ?)",
+                (memory_id, row["vector_blob"]),
+            )
+
+        signature = row["signature"]
+        if signature is not None:
+            band_columns = ", ".join(f"band{i}" for i in range(SIMHASH_BANDS))
+            self.conn.execute(
+                f"""
+                INSERT INTO memory_sketches (memory_id, simhash, duplicate_of, {band_columns})
+                VALUES (?, ?, ?, {', '.join('?' * SIMHASH_BANDS)})
+                """,
+                (memory_id, to_sqlite(signature), duplicate_of, *bands(signature)),
+            )
+
+        if row["state_json"] is not None and row["source_session_id"]:
+            self.conn.execute(
+                """
+                INSERT INTO enrichment_state (source_session_id, memory_id, version, state_json)
+                VALUES (?, ?, 1, ?)
+                ON CONFLICT(source_session_id) DO UPDATE SET
+                    memory_id = excluded.memory_id,
+                    version = version + 1,
+                    state_json = excluded.state_json
+                """,
+                (row["source_session_id"], memory_id, row["state_json"]),
+            )
+
+        if row["terms"]:
+            self.conn.executemany(
+                "INSERT INTO memory_terms (memory_id, term) VALUES (?, ?)",
+                ((memory_id, term) for term in row["terms"]),
+            )
+            self.conn.execute("UPDATE term_corpus SET docs = docs + 1 WHERE id = 1")
+        return memory_id
+
+    def _apply_insert(self, terms: List[str]):
+        """Update the DF cache for a committed insert.
+
+        Own commits do not change this connection's PRAGMA data_version:
+        apply them directly. (The reader's vector cache catches up by itself.)
+        """
+        if terms and self._df is not None:
+            self._df.add_document(terms)
+
+    @_synchronized
+    def get_enrichment_state(self, source_session_id: str) -> Optional[Dict[str, Any]]:
+        """Latest stored version of a session, for incremental enrichment.
+
+        Args:
+            source_session_id: Session ID
+
+        Returns:
+            Dict with keys memory_id, pointer, version and state, or None if
+            no version of the session was stored with enrichment state
+        """
+        row = self.conn.execute(
+            """
+            SELECT e.memory_id, m.pointer, e.version, e.state_json
+            FROM enrichment_state e
+            JOIN memories m ON m.id = e.memory_id
+            WHERE e.source_session_id = ?
+            """,
+            (source_session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "memory_id": row["memory_id"],
+            "pointer": row["pointer"],
+            "version": row["version"],
+            "state": json.loads(row["state_json"]),
+        }
+
+    @_synchronized
+    def find_near_duplicates(
+        self,
+        signature: int,
+        max_distance: int = DEFAULT_DUPLICATE_DISTANCE,
+        exclude_session_id: Optional[str] = None,
+        artifact_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Find indexed memories whose SimHash is within max_distance bits.
+
+        Candidates come from the LSH band indexes (any band equal), about
+        N * SIMHASH_BANDS / 256 rows: linear in N, but 32x fewer rows than a
+        full scan. Recall is exact up to MAX_DUPLICATE_DISTANCE.
+
+        Args:
+            signature: simhash64() of the new memory's sketch_text()
+            max_distance: Largest Hamming distance that counts as a duplicate
+            exclude_session_id: Ignore memories of this session (e.g. earlier
+                versions of a session that has grown)
+            artifact_type: Only match memories of this artifact type
+
+        Returns:
+            Dicts with keys id, pointer, distance and cluster_id (the first
+            memory of the match's cluster), nearest first
+        """
+        sql = f"""
+            SELECT s.memory_id, s.simhash, s.duplicate_of, m.pointer
+            FROM memory_sketches s
+            JOIN memories m ON m.id = s.memory_id
+            WHERE ({' OR '.join(f's.band{i} = ?' for i in range(SIMHASH_BANDS))})
+        """
+        params: List[Any] = bands(signature)
+        if exclude_session_id is not None:
+            sql += " AND m.source_session_id IS NOT ?"
+            params.append(exclude_session_id)
+        if artifact_type is not None:
+            sql += " AND m.artifact_type = ?"
+            params.append(artifact_type)
+        rows = self.conn.execute(sql, params).fetchall()
+
+        matches = []
+        for memory_id, stored, duplicate_of, pointer in rows:
+            distance = hamming(signature, from_sqlite(stored))
+            if distance <= max_distance:
+                matches.append({
+                    "id": memory_id,
+                    "pointer": pointer,
+                    "distance": distance,
+                    "cluster_id": duplicate_of if duplicate_of is not None else memory_id,
+                })
+        matches.sort(key=lambda match: (match["distance"], match["id"]))
+        return matches
+
+    @_synchronized
+    def merge_into(
+        self,
+        memory_id: int,
+        tags: List[str] = None,
+        source_session_id: str = None,
+    ) -> bool:
+        """Fold a near-duplicate session into an existing memory (no new row).
+
+        Adds tags the memory does not have yet and records the session in
+        metadata["merged_sessions"]. The memory's blob is left as is.
+
+        Args:
+            memory_id: Memory to merge into
+            tags: Tags of the duplicate session
+            source_session_id: Session ID of the duplicate
+
+        Returns:
+            True if merged, False if memory_id is not indexed
+        """
+        merged = self._merge(memory_id, tags, source_session_id)
         self.conn.commit()
-        return cursor.lastrowid
+        return merged
+
+    def _merge(self, memory_id: int, tags: List[str] = None, source_session_id: str = None) -> bool:
+        """Apply merge_into() without committing."""
+        row = self.conn.execute(
+            "SELECT tags_json, metadata_json FROM memories WHERE id = ?", (memory_id,)
+        ).fetchone()
+        if row is None:
+            return False
+
+        merged_tags = json.loads(row["tags_json"] or "[]")
+        merged_tags.extend(tag for tag in tags or [] if tag not in merged_tags)
+        metadata = json.loads(row["metadata_json"] or "{}")
+        if source_session_id:
+            metadata.setdefault("merged_sessions", []).append(source_session_id)
+
+        self.conn.execute(
+            "UPDATE memories SET tags_json = ?, metadata_json = ? WHERE id = ?",
+            (json.dumps(merged_tags), json.dumps(metadata), memory_id),
+        )
+        return True
+
+    @_synchronized
+    def document_frequencies(self) -> DocumentFrequencies:
+        """Return the cached document-frequency snapshot, refreshed if stale.
 
+        The snapshot is loaded once, then kept current in place by this
+        connection's add_memory() calls. A write from another connection
+        changes PRAGMA data_version (a single pragma read per call), which
+        triggers a full reload; so does delete_memory().
+
+        Returns:
+            DocumentFrequencies for TF-IDF keyword ranking
+        """
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._df is None or data_version != self._df_data_version:
+            counts = dict(self.conn.execute("SELECT term, df FROM term_df").fetchall())
+            docs = self.conn.execute("SELECT docs FROM term_corpus WHERE id = 1").fetchone()[0]
+            self._df = DocumentFrequencies(counts, docs)
+            self._df_data_version = data_version
+        return self._df
+
+    def _vector_matrix(self) -> VectorMatrix:
+        """Return the reader's cached vector matrix, caught up with new commits.
+
+        Memory IDs only grow (AUTOINCREMENT), so after a commit only rows past
+        the last loaded ID are read. A row count that does not add up means a
+        memory was deleted, which triggers a full reload.
+        """
+        data_version = self._reader.execute("PRAGMA data_version").fetchone()[0]
+        if self._vectors is not None and data_version == self._vectors_data_version:
+            return self._vectors
+
+        vectors = self._vectors
+        new_rows = self._reader.execute(
+            "SELECT memory_id, vector FROM memory_vectors WHERE memory_id > ? ORDER BY memory_id",
+            (vectors.last_id if vectors is not None else 0,),
+        ).fetchall()
+        total = self._reader.execute("SELECT count(*) FROM memory_vectors").fetchone()[0]
+        if vectors is None or total != len(vectors) + len(new_rows):
+            rows = self._reader.execute(
+                "SELECT memory_id, vector FROM memory_vectors ORDER BY memory_id"
+            )
+            vectors = VectorMatrix((row[0], row[1]) for row in rows)
+        else:
+            for memory_id, blob in new_rows:
+                vectors.add(memory_id, blob)
+        self._vectors = vectors
+        self._vectors_data_version = data_version
+        return vectors
+
+    @_reading
     def query_memories(
         self,
         query: str = None,
@@ -89,6 +517,8 @@ class MemoryIndex:
         time_range: Dict[str, str] = None,
         limit: int = 10,
         offset: int = 0,
+        search_mode: str = "lexical",
+        collapse_duplicates: bool = False,
     ) -> List[Dict[str, Any]]:
         """Query index for memory pointers with FTS5 full-text search.
 
@@ -98,10 +528,28 @@ class MemoryIndex:
             time_range: Filter by time range {"start": ISO8601, "end": ISO8601}
             limit: Max results to return
             offset: Number of results to skip
+            search_mode: "lexical" (FTS5 bm25, lower score is better),
+                "vector" (hashed n-gram cosine similarity, higher is better) or
+                "hybrid" (reciprocal-rank fusion of both, higher is better).
+                Ignored without a query.
+            collapse_duplicates: Return only the best-ranked memory of each
+                near-duplicate cluster
 
         Returns:
             List of memory dicts with keys: pointer, tags, created_at, title, snippet, score, etc.
+
+        Raises:
+            ValueError: If search_mode is unknown
         """
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search_mode: {search_mode} (expected one of {', '.join(SEARCH_MODES)})"
+            )
+        if collapse_duplicates:
+            return self._query_collapsed(query, tags, time_range, limit, offset, search_mode)
+        if query and search_mode != "lexical":
+            return self._query_ranked(query, tags, time_range, limit, offset, search_mode)
+
         if query:
             # FTS5 query with BM25 ranking
             sql = """
@@ -116,22 +564,10 @@ class MemoryIndex:
             sql = "SELECT *, 0 AS score FROM memories WHERE 1=1"
             params = []
 
-        # Add tag filtering
-        if tags:
-            tag_conditions = []
-            for tag in tags:
-                tag_conditions.append("tags_json LIKE ?")
-                params.append(f"%{tag}%")
-            sql += " AND (" + " OR ".join(tag_conditions) + ")"
-
-        # Add time range filtering
-        if time_range:
-            if time_range.get("start"):
-                sql += " AND created_at >= ?"
-                params.append(time_range["start"])
-            if time_range.get("end"):
-                sql += " AND created_at <= ?"
-                params.append(time_range["end"])
+        # Add tag and time range filtering
+        filter_sql, filter_params = self._filter_clause(tags, time_range, "m." if query else "")
+        sql += filter_sql
+        params.extend(filter_params)
 
         # Order by score (if FTS) or recency
         if query:
@@ -142,7 +578,7 @@ class MemoryIndex:
         sql += " LIMIT ? OFFSET ?"
         params.extend([limit, offset])
 
-        cursor = self.conn.execute(sql, params)
+        cursor = self._reader.execute(sql, params)
         rows = cursor.fetchall()
 
         # Convert to dicts and parse JSON fields
@@ -158,6 +594,149 @@ class MemoryIndex:
 
         return results
 
+    @staticmethod
+    def _filter_clause(
+        tags: Optional[List[str]],
+        time_range: Optional[Dict[str, str]],
+        column_prefix: str = "",
+    ) -> Tuple[str, List[Any]]:
+        """SQL " AND ..." fragment and params for tag/time-range filters.
+
+        column_prefix qualifies memories columns (e.g. "m.") where a join
+        makes them ambiguous: memories_fts also has a tags_json column.
+        """
+        sql = ""
+        params: List[Any] = []
+
+        # Tag filtering (substring match on any tag)
+        if tags:
+            tag_conditions = []
+            for tag in tags:
+                tag_conditions.append(f"{column_prefix}tags_json LIKE ?")
+                params.append(f"%{tag}%")
+            sql += " AND (" + " OR ".join(tag_conditions) + ")"
+
+        # Time range filtering
+        if time_range:
+            if time_range.get("start"):
+                sql += f" AND {column_prefix}created_at >= ?"
+                params.append(time_range["start"])
+            if time_range.get("end"):
+                sql += f" AND {column_prefix}created_at <= ?"
+                params.append(time_range["end"])
+
+        return sql, params
+
+    def _query_ranked(
+        self,
+        query: str,
+        tags: Optional[List[str]],
+        time_range: Optional[Dict[str, str]],
+        limit: int,
+        offset: int,
+        search_mode: str,
+    ) -> List[Dict[str, Any]]:
+        """Vector or hybrid query: rank memory IDs, then load the rows in rank order.
+
+        A hybrid query that is not valid FTS5 syntax is ranked by the vector
+        arm alone instead of failing.
+        """
+        wanted = limit + offset
+        allowed_ids = None
+        if tags or time_range:
+            filter_sql, filter_params = self._filter_clause(tags, time_range)
+            rows = self._reader.execute(
+                "SELECT id FROM memories WHERE 1=1" + filter_sql, filter_params
+            )
+            allowed_ids = {row[0] for row in rows}
+
+        candidates = wanted if search_mode == "vector" else wanted * HYBRID_CANDIDATES_PER_RESULT
+        vector_hits = self._vector_matrix().search(
+            embed_text(query), candidates, allowed_ids, min_similarity=VECTOR_MIN_SIMILARITY
+        )
+
+        if search_mode == "vector":
+            ranked = vector_hits
+        else:
+            try:
+                lexical = self.query_memories(
+                    query=query, tags=tags, time_range=time_range, limit=candidates
+                )
+            except sqlite3.OperationalError:
+                # Not valid FTS5 syntax (e.g. unbalanced quotes): rank by vectors alone
+                lexical = []
+            lexical_ids = [m["id"] for m in lexical]
+            fused: Dict[int, float] = {}
+            for ranking in (lexical_ids, [memory_id for memory_id, _ in vector_hits]):
+                for rank, memory_id in enumerate(ranking):
+                    fused[memory_id] = fused.get(memory_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+        ranked = ranked[offset:wanted]
+        if not ranked:
+            return []
+
+        ids = [memory_id for memory_id, _ in ranked]
+        rows = self._reader.execute(
+            f"SELECT * FROM memories WHERE id IN ({', '.join('?' * len(ids))})", ids
+        ).fetchall()
+        by_id = {row["id"]: row for row in rows}
+
+        results = []
+        for memory_id, score in ranked:
+            if memory_id not in by_id:
+                continue
+            memory = dict(by_id[memory_id])
+            memory["score"] = round(score, 6)
+            memory["tags"] = json.loads(memory["tags_json"])
+            memory["metadata"] = json.loads(memory.get("metadata_json", "{}"))
+            del memory["tags_json"]
+            if "metadata_json" in memory:
+                del memory["metadata_json"]
+            results.append(memory)
+        return results
+
+    def _query_collapsed(
+        self,
+        query: Optional[str],
+        tags: Optional[List[str]],
+        time_range: Optional[Dict[str, str]],
+        limit: int,
+        offset: int,
+        search_mode: str,
+    ) -> List[Dict[str, Any]]:
+        """Page through ranked results keeping the first memory of each cluster."""
+        wanted = limit + offset
+        page = max(wanted * COLLAPSE_OVERFETCH, 10)
+        seen = set()
+        kept: List[Dict[str, Any]] = []
+        fetched = 0
+        while len(kept) < wanted:
+            batch = self.query_memories(
+                query=query, tags=tags, time_range=time_range,
+                limit=page, offset=fetched, search_mode=search_mode,
+            )
+            if not batch:
+                break
+            ids = [m["id"] for m in batch]
+            links = dict(
+                self._reader.execute(
+                    "SELECT memory_id, duplicate_of FROM memory_sketches"
+                    f" WHERE memory_id IN ({', '.join('?' * len(ids))})",
+                    ids,
+                ).fetchall()
+            )
+            for memory in batch:
+                cluster = links.get(memory["id"]) or memory["id"]
+                if cluster not in seen:
+                    seen.add(cluster)
+                    kept.append(memory)
+            fetched += len(batch)
+            if len(batch) < page:
+                break
+        return kept[offset:wanted]
+
+    @_reading
     def get_memory_by_pointer(self, pointer: str) -> Optional[Dict[str, Any]]:
         """Get memory metadata by pointer.
 
@@ -167,7 +746,7 @@ class MemoryIndex:
         Returns:
             Memory dict or None if not found
         """
-        cursor = self.conn.execute("SELECT * FROM memories WHERE pointer = ?", (pointer,))
+        cursor = self._reader.execute("SELECT * FROM memories WHERE pointer = ?", (pointer,))
         row = cursor.fetchone()
 
         if row is None:
@@ -181,6 +760,7 @@ class MemoryIndex:
             del memory["metadata_json"]
         return memory
 
+    @_synchronized
     def delete_memory(self, pointer: str) -> bool:
         """Remove memory from index (blob remains in Cascade).
 
@@ -192,8 +772,13 @@ class MemoryIndex:
         """
         cursor = self.conn.execute("DELETE FROM memories WHERE pointer = ?", (pointer,))
         self.conn.commit()
+        if cursor.rowcount > 0:
+            # memories_ad_* triggers changed DF and vectors; reload lazily
+            self._df = None
+            self._vectors = None
         return cursor.rowcount > 0
 
+    @_reading
     def count_memories(self, tags: List[str] = None) -> int:
         """Count memories matching filters.
 
@@ -213,9 +798,12 @@ class MemoryIndex:
                 params.append(f"%{tag}%")
             query += " AND (" + " OR ".join(tag_conditions) + ")"
 
-        cursor = self.conn.execute(query, params)
+        cursor = self._reader.execute(query, params)
         return cursor.fetchone()[0]
 
+    @_synchronized
     def close(self):
         """Close database connection."""
+        with self._read_lock:
+            self._reader.close()
         self.conn.close()
@@ -1,5 +1,5 @@
 -- Lumera Agent Memory: Local SQLite Index Schema with FTS5
--- Version: 0.3.0
+-- Version: 0.4.0
 --
 -- CRITICAL: This index stores POINTERS ONLY (never blob content).
 -- Query this index to find what to retrieve, then fetch from Cascade.
@@ -56,6 +56,101 @@ CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
   VALUES (new.id, new.title, new.snippet, new.source_tool, new.tags_json);
 END;
 
+-- Document frequencies for corpus-aware (TF-IDF) keyword ranking.
+-- memory_terms holds each memory's distinct keyword terms, taken from the
+-- redacted, allowlisted fields only (this file is plaintext); term_df and
+-- term_corpus are maintained from it by triggers, so DF stays incremental.
+CREATE TABLE IF NOT EXISTS memory_terms (
+    memory_id INTEGER NOT NULL,
+    term TEXT NOT NULL,
+    PRIMARY KEY (memory_id, term)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS term_df (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+
+-- Number of memories that contributed terms (TF-IDF "N")
+CREATE TABLE IF NOT EXISTS term_corpus (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    docs INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO term_corpus (id, docs) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS memory_terms_ai AFTER INSERT ON memory_terms BEGIN
+  INSERT INTO term_df (term, df) VALUES (new.term, 1)
+  ON CONFLICT(term) DO UPDATE SET df = df + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS memory_terms_ad AFTER DELETE ON memory_terms BEGIN
+  UPDATE term_df SET df = df - 1 WHERE term = old.term;
+  DELETE FROM term_df WHERE term = old.term AND df <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS memories_ad_terms AFTER DELETE ON memories BEGIN
+  UPDATE term_corpus SET docs = docs - 1
+  WHERE id = 1 AND EXISTS (SELECT 1 FROM memory_terms WHERE memory_id = old.id);
+  DELETE FROM memory_terms WHERE memory_id = old.id;
+END;
+
+-- Hashed n-gram vectors (int8, see vectors.py) for vector/hybrid search
+CREATE TABLE IF NOT EXISTS memory_vectors (
+    memory_id INTEGER PRIMARY KEY,
+    vector BLOB NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS memories_ad_vectors AFTER DELETE ON memories BEGIN
+  DELETE FROM memory_vectors WHERE memory_id = old.id;
+END;
+
+-- SimHash sketches of memory cards (see sketch.py). band0..band7 are the
+-- 8-bit LSH bands of simhash; duplicate_of links a near-duplicate to the
+-- first memory of its cluster.
+CREATE TABLE IF NOT EXISTS memory_sketches (
+    memory_id INTEGER PRIMARY KEY,
+    simhash INTEGER NOT NULL,
+    duplicate_of INTEGER,
+    band0 INTEGER NOT NULL,
+    band1 INTEGER NOT NULL,
+    band2 INTEGER NOT NULL,
+    band3 INTEGER NOT NULL,
+    band4 INTEGER NOT NULL,
+    band5 INTEGER NOT NULL,
+    band6 INTEGER NOT NULL,
+    band7 INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sketch_band0 ON memory_sketches(band0);
+CREATE INDEX IF NOT EXISTS idx_sketch_band1 ON memory_sketches(band1);
+CREATE INDEX IF NOT EXISTS idx_sketch_band2 ON memory_sketches(band2);
+CREATE INDEX IF NOT EXISTS idx_sketch_band3 ON memory_sketches(band3);
+CREATE INDEX IF NOT EXISTS idx_sketch_band4 ON memory_sketches(band4);
+CREATE INDEX IF NOT EXISTS idx_sketch_band5 ON memory_sketches(band5);
+CREATE INDEX IF NOT EXISTS idx_sketch_band6 ON memory_sketches(band6);
+CREATE INDEX IF NOT EXISTS idx_sketch_band7 ON memory_sketches(band7);
+
+CREATE TRIGGER IF NOT EXISTS memories_ad_sketches AFTER DELETE ON memories BEGIN
+  DELETE FROM memory_sketches WHERE memory_id = old.id;
+END;
+
+-- Incremental enrichment: extractor state of the latest stored version of
+-- each session (see enrich/incremental.py), so the next, longer version only
+-- scans the appended text. version counts stored versions of the session.
+-- state_json is opaque to the index: the server stores it encrypted, since
+-- the state is derived from the raw session text.
+CREATE TABLE IF NOT EXISTS enrichment_state (
+    source_session_id TEXT PRIMARY KEY,
+    memory_id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    state_json TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS memories_ad_enrichment AFTER DELETE ON memories BEGIN
+  DELETE FROM enrichment_state WHERE memory_id = old.id;
+END;
+
 -- Metadata table for schema migrations
 CREATE TABLE IF NOT EXISTS schema_metadata (
     version TEXT PRIMARY KEY,
@@ -65,3 +160,6 @@ CREATE TABLE IF NOT EXISTS schema_metadata (
 -- Insert schema version
 INSERT OR IGNORE INTO schema_metadata (version, applied_at)
 VALUES ('0.3.0', datetime('now'));
+
+INSERT OR IGNORE INTO schema_metadata (version, applied_at)
+VALUES ('0.4.0', datetime('now'));
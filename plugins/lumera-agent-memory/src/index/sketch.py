@@ -0,0 +1,95 @@
+"""SimHash sketches and LSH bands for near-duplicate memories.
+
+Agents store many near-identical sessions (retried commands, the same
+failing test). A 64-bit SimHash of the memory card maps such cards to
+signatures a few bits apart (a retried test with a different status code
+and timing lands within ~6 bits; unrelated cards sit near 32). The index
+splits each signature into SIMHASH_BANDS bands of 8 bits and keeps one
+indexed column per band. By the pigeonhole principle, two signatures within
+SIMHASH_BANDS - 1 bits agree on at least one whole band, so every
+near-duplicate within MAX_DUPLICATE_DISTANCE is found by band lookups.
+
+A lookup reads about N * SIMHASH_BANDS / 256 candidate rows instead of N
+(the Hamming check runs on those only): still O(N), with a 32x smaller
+constant. Wider bands would cut the candidates further but shrink the
+guaranteed radius below DEFAULT_DUPLICATE_DISTANCE (4 bands of 16 bits only
+guarantee 3 bits).
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+# Guaranteed-recall radius of the band lookup (pigeonhole: bands - 1)
+MAX_DUPLICATE_DISTANCE = SIMHASH_BANDS - 1
+# Default near-duplicate threshold in bits
+DEFAULT_DUPLICATE_DISTANCE = 6
+
+DEDUP_POLICIES = ("off", "link", "skip", "merge")
+
+_WORD = re.compile(r"\w+")
+
+
+def sketch_text(
+    title: Optional[str],
+    snippet: Optional[str],
+    memory_card: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Card fields that define "the same memory" (tags and tool excluded)."""
+    parts = [title or "", snippet or ""]
+    if memory_card:
+        for field in ("summary_bullets", "decisions", "todos", "entities", "keywords"):
+            parts.extend(str(item) for item in memory_card.get(field) or [])
+    return " ".join(part for part in parts if part)
+
+
+def simhash64(text: str) -> Optional[int]:
+    """64-bit SimHash over word unigrams and bigrams of text.
+
+    Returns:
+        Unsigned 64-bit signature, or None if text has no words
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return None
+
+    features = Counter(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+    totals = [0] * SIMHASH_BITS
+    for feature, weight in features.items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            totals[bit] += weight if (h >> bit) & 1 else -weight
+
+    signature = 0
+    for bit, total in enumerate(totals):
+        if total > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def bands(signature: int) -> List[int]:
+    """Split a signature into SIMHASH_BANDS band values (LSH bucket keys)."""
+    mask = (1 << BAND_BITS) - 1
+    return [(signature >> (band * BAND_BITS)) & mask for band in range(SIMHASH_BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two signatures."""
+    return (a ^ b).bit_count()
+
+
+def to_sqlite(signature: int) -> int:
+    """Unsigned 64-bit -> signed (SQLite INTEGER range)."""
+    return signature - (1 << 64) if signature >= 1 << 63 else signature
+
+
+def from_sqlite(value: int) -> int:
+    """Signed SQLite INTEGER -> unsigned 64-bit signature."""
+    return value + (1 << 64) if value < 0 else value
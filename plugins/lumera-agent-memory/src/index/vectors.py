@@ -0,0 +1,198 @@
+"""Model-free hashed n-gram vectors for offline semantic-ish search.
+
+Each memory gets a fixed-size vector built by feature hashing (no model, no
+network, no GPU):
+- word unigrams and bigrams of the memory-card text
+- character 3-grams of each word (with boundary markers), so inflections and
+  shared stems ("validate" / "validation", "auth" / "authentication") overlap
+
+Features are hashed with CRC-32 (stable across processes, unlike hash())
+into VECTOR_DIM signed buckets, L2-normalized and quantized to int8, so a
+vector costs VECTOR_DIM bytes in the index. Queries are scored by cosine
+similarity with one matrix-vector product over all stored vectors (NumPy,
+imported on the first scan rather than at server start), or a pure-Python
+scan when NumPy is not installed.
+
+This is lexical similarity with partial credit, not a language model: it
+finds "auth token bug" in a card about "JWT auth token validation" even
+though FTS5 requires every query term, but it does not know that "JWT" and
+"token" are related.
+"""
+
+import math
+import re
+import zlib
+from operator import mul
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+_NOT_IMPORTED = object()
+
+# NumPy, imported by _numpy() on first use; None when it is not installed
+np: Any = _NOT_IMPORTED
+
+VECTOR_DIM = 256
+
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+CHAR_NGRAM_WEIGHT = 0.35
+CHAR_NGRAM = 3
+
+# Rows widened to float32 per matrix-vector product block (~8 MB at 256 dims)
+SCAN_BLOCK_ROWS = 8192
+
+_WORD = re.compile(r"\w+")
+
+
+def _numpy():
+    """NumPy, imported on first use, or None if it is not installed."""
+    global np
+    if np is _NOT_IMPORTED:
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover - exercised only without numpy
+            np = None
+    return np
+
+
+def card_text(
+    title: Optional[str],
+    snippet: Optional[str],
+    tags: Optional[List[str]],
+    source_tool: Optional[str],
+    memory_card: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Concatenate the memory fields that feed the vector."""
+    parts = [title or "", snippet or "", " ".join(tags or []), source_tool or ""]
+    if memory_card:
+        for field in ("summary_bullets", "keywords", "entities", "decisions", "todos"):
+            parts.extend(str(item) for item in memory_card.get(field) or [])
+    return " ".join(part for part in parts if part)
+
+
+def _features(text: str) -> Iterable[Tuple[str, float]]:
+    """Weighted hashing features of text."""
+    words = _WORD.findall(text.lower())
+    for i, word in enumerate(words):
+        yield "w:" + word, WORD_WEIGHT
+        if i:
+            yield "b:" + words[i - 1] + " " + word, BIGRAM_WEIGHT
+        marked = "<" + word + ">"
+        for j in range(len(marked) - CHAR_NGRAM + 1):
+            yield "c:" + marked[j : j + CHAR_NGRAM], CHAR_NGRAM_WEIGHT
+
+
+def embed_text(text: str) -> List[float]:
+    """L2-normalized hashed feature vector of text (all zeros if text has no words)."""
+    vector = [0.0] * VECTOR_DIM
+    for feature, weight in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        # Low bits pick the bucket, the top bit the sign (keeps E[dot] unbiased)
+        vector[h % VECTOR_DIM] += -weight if h & 0x80000000 else weight
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0.0:
+        return vector
+    return [v / norm for v in vector]
+
+
+def quantize(vector: Sequence[float]) -> bytes:
+    """int8-quantize a normalized vector (VECTOR_DIM bytes)."""
+    return bytes((max(-127, min(127, round(v * 127))) & 0xFF) for v in vector)
+
+
+class VectorMatrix:
+    """In-memory matrix of stored int8 vectors with cosine top-k search.
+
+    Rows are appended as memories are added and concatenated into one
+    contiguous array lazily, at the next search.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, bytes]] = ()):
+        """Initialize matrix.
+
+        Args:
+            rows: (memory_id, int8 vector blob) pairs
+        """
+        self._ids: List[int] = []
+        self._blobs: List[bytes] = []
+        self._matrix = None
+        self._norms = None
+        for memory_id, blob in rows:
+            self.add(memory_id, blob)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def last_id(self) -> int:
+        """Largest memory ID added (rows arrive in ID order), or 0 if empty."""
+        return self._ids[-1] if self._ids else 0
+
+    def add(self, memory_id: int, blob: bytes):
+        """Append one stored vector."""
+        self._ids.append(memory_id)
+        self._blobs.append(blob)
+        self._matrix = None
+
+    def _dense(self):
+        """Contiguous (N, VECTOR_DIM) int8 matrix plus row norms (NumPy only)."""
+        np = _numpy()
+        if self._matrix is None:
+            matrix = np.frombuffer(b"".join(self._blobs), dtype=np.int8).reshape(-1, VECTOR_DIM)
+            norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix, dtype=np.float32))
+            self._matrix, self._norms = matrix, np.maximum(norms, 1.0)
+        return self._matrix, self._norms
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int,
+        allowed_ids: Optional[Set[int]] = None,
+        min_similarity: float = 0.0,
+    ) -> List[Tuple[int, float]]:
+        """Top-k stored vectors by cosine similarity to query_vector.
+
+        Args:
+            query_vector: Normalized query vector (see embed_text)
+            k: Number of results
+            allowed_ids: Restrict results to these memory IDs (filters)
+            min_similarity: Drop results at or below this similarity
+
+        Returns:
+            (memory_id, similarity) pairs, best first
+        """
+        if not self._ids or k <= 0:
+            return []
+
+        np = _numpy()
+        if np is None:
+            scored = []
+            for memory_id, blob in zip(self._ids, self._blobs):
+                if allowed_ids is not None and memory_id not in allowed_ids:
+                    continue
+                row = memoryview(blob).cast("b")
+                row_norm = math.sqrt(sum(v * v for v in row)) or 1.0
+                scored.append((memory_id, sum(map(mul, row, query_vector)) / row_norm))
+            scored.sort(key=lambda item: item[1], reverse=True)
+            return [(memory_id, score) for memory_id, score in scored[:k] if score > min_similarity]
+
+        matrix, norms = self._dense()
+        query = np.asarray(query_vector, dtype=np.float32)
+        # Widen int8 -> float32 one block at a time so BLAS does the products
+        # without a full float copy of the matrix
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+            block = matrix[start : start + SCAN_BLOCK_ROWS].astype(np.float32)
+            scores[start : start + len(block)] = block @ query
+        scores /= norms
+        if allowed_ids is not None:
+            mask = np.fromiter(
+                (i in allowed_ids for i in self._ids), dtype=bool, count=len(self._ids)
+            )
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (self._ids[i], float(scores[i])) for i in top.tolist() if scores[i] > min_similarity
+        ]
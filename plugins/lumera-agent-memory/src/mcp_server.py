@@ -1,31 +1,222 @@
 """MCP Server for Lumera Agent Memory.
 
-Exposes 4 tools:
+Exposes 7 tools:
 1. store_session_to_cascade - Store session with redaction + encryption
-2. query_cascade_memories - Search local index (never queries Cascade)
-3. retrieve_session_from_cascade - Fetch and decrypt by pointer
-4. estimate_storage_cost - Heuristic cost estimation
+2. store_sessions_to_cascade - Store many sessions through a staged pipeline
+3. query_cascade_memories - Search local index (never queries Cascade)
+4. retrieve_session_from_cascade - Fetch and decrypt by pointer
+5. retrieve_sessions_from_cascade - Fetch and decrypt many pointers concurrently
+6. estimate_storage_cost - Heuristic cost estimation
+7. get_memory_metrics - Per-stage latency histograms, bytes and cache counters
 """
 
+import asyncio
+import base64
 import json
 import hashlib
-from typing import Any, Dict, List
+import os
+import shlex
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from pathlib import Path
 
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
-from .security import redact_session, encrypt_blob, decrypt_blob, RedactionError, EncryptionError
+from .security import (
+    encrypt_blob,
+    decrypt_blob,
+    RedactionMemo,
+    EncryptionError,
+    get_encryption_key,
+    encrypt_sections,
+    decrypt_sections,
+    read_sections,
+    is_sectioned,
+)
+from .security.sections import SECTION_HEADER_SIZE
+from .security.redact import RedactionProfile, get_prefilter_stats
 from .cascade import MockCascadeConnector, NotFoundError, ValidationError
 from .index import MemoryIndex
+from .index.sketch import (
+    DEDUP_POLICIES,
+    DEFAULT_DUPLICATE_DISTANCE,
+    bands,
+    hamming,
+    simhash64,
+    sketch_text,
+)
 from .adapters import CASSAdapter
-from .enrich import generate_memory_card
+from .pipeline import (
+    AdmissionController,
+    AdmissionRejected,
+    DerivationCache,
+    ExecutionLayer,
+    SingleFlight,
+    Stage,
+    StageFailure,
+    decode_payload,
+    default_codec,
+    derive_session,
+    encode_payload,
+    flight_key,
+    run_stages,
+    Ticket,
+)
+from .metrics import Metrics, Trace
 
 
-# Initialize components
-cascade = MockCascadeConnector()
-index = MemoryIndex()
-cass = CASSAdapter()
+class _Lazy:
+    """Stand-in for a server component that is built on first use.
+
+    Agents start a server per session, and listing tools or estimating a
+    cost needs no index, Cascade store or CASS adapter, so their setup
+    (SQLite connections, directories, a PATH lookup) waits until a tool
+    touches them. Assigning the module attribute (tests, benchmarks)
+    replaces the stand-in.
+    """
+
+    def __init__(self, factory: Any):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_component", None)
+        object.__setattr__(self, "_build_lock", threading.Lock())
+
+    def _get(self) -> Any:
+        if self._component is None:
+            with self._build_lock:
+                if self._component is None:
+                    object.__setattr__(self, "_component", self._factory())
+        return self._component
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._get(), name, value)
+
+
+# Long-lived CASS export worker (see adapters.cm_worker): its command line,
+# or empty (default) to run `cm context` once per exported session. Opt-in:
+# no released `cm` speaks the worker protocol yet
+CM_WORKER = shlex.split(os.getenv("LUMERA_CM_WORKER", ""))
+
+# Initialize components (built on first use, see _Lazy)
+cascade = _Lazy(MockCascadeConnector)
+index = _Lazy(MemoryIndex)
+cass = _Lazy(partial(CASSAdapter, worker_command=CM_WORKER or None))
+redaction_memo = RedactionMemo()  # Shared across stores: sessions repeat strings heavily
+
+# Redaction guard: per-string time budget (fail-closed), 0 disables
+REDACTION_TIME_BUDGET = float(os.getenv("LUMERA_REDACTION_BUDGET_MS", "2000")) / 1000 or None
+# Opt-in per-rule redaction profile, returned with each store response
+REDACTION_PROFILE = os.getenv("LUMERA_REDACTION_PROFILE", "") == "1"
+
+# Keyword ranking for memory cards: "tfidf" (index document frequencies) or "tf"
+KEYWORD_RANKING = os.getenv("LUMERA_KEYWORD_RANKING", "tfidf")
+
+# Incremental memory cards: a session stored again after growing reuses the
+# extractor state of its previous version and links to its pointer
+INCREMENTAL_CARDS = os.getenv("LUMERA_INCREMENTAL_CARDS", "1") == "1"
+
+# Derived artifacts by session content hash, so dry-run -> store derives once
+derivation_cache = DerivationCache(
+    max_bytes=int(os.getenv("LUMERA_DERIVATION_CACHE_MB", "64")) * 1024 * 1024,
+    ttl_seconds=float(os.getenv("LUMERA_DERIVATION_CACHE_TTL_S", "600")),
+)
+
+# Near-duplicate handling at store time: "off", "link" (store, mark as a
+# duplicate), "skip" (do not store) or "merge" (fold tags into the existing
+# memory, do not store); overridable per call via metadata.dedup_policy
+DEDUP_POLICY = os.getenv("LUMERA_DEDUP_POLICY", "link")
+# SimHash bits within which two memory cards count as near-duplicates
+DEDUP_DISTANCE = int(os.getenv("LUMERA_DEDUP_DISTANCE", str(DEFAULT_DUPLICATE_DISTANCE)))
+
+# Batch store pipeline (store_sessions_to_cascade): sessions waiting between
+# two stages, concurrent CASS exports / Cascade uploads, sessions per call
+BATCH_QUEUE_DEPTH = int(os.getenv("LUMERA_BATCH_QUEUE_DEPTH", "8"))
+BATCH_IO_WORKERS = int(os.getenv("LUMERA_BATCH_IO_WORKERS", "4"))
+MAX_BATCH_SESSIONS = int(os.getenv("LUMERA_MAX_BATCH_SESSIONS", "1000"))
+# Pointers per retrieve_sessions_from_cascade call
+MAX_BATCH_RETRIEVE = int(os.getenv("LUMERA_MAX_BATCH_RETRIEVE", "100"))
+
+# Execution layer: blocking work runs off the event loop, in pools sized
+# here. "process" CPU mode moves redaction and card extraction off the GIL;
+# queries and retrievals get their own threads and priority over stores.
+CPU_WORKERS = int(os.getenv("LUMERA_CPU_WORKERS", "2"))
+executors = ExecutionLayer(
+    io_workers=int(os.getenv("LUMERA_IO_WORKERS", "8")),
+    cpu_workers=CPU_WORKERS,
+    cpu_mode=os.getenv("LUMERA_CPU_EXECUTOR", "thread"),
+    query_workers=int(os.getenv("LUMERA_QUERY_WORKERS", "4")),
+    bulk_max_wait=float(os.getenv("LUMERA_BULK_MAX_WAIT_MS", "250")) / 1000,
+)
+
+# Serialization of stored payloads ("json" or "msgpack"; see pipeline.codec).
+# Readers detect the codec from the payload header, so it can change freely.
+PAYLOAD_CODEC = os.getenv("LUMERA_PAYLOAD_CODEC", default_codec())
+
+# Sections of a raw_plus_artifact blob: everything but the raw session, and
+# the raw session (see _seal_payload)
+CARD_SECTION = "card"
+RAW_SECTION = "raw_session"
+
+# Response to any tool called with mode=live
+LIVE_MODE_ERROR = (
+    "Live Cascade mode not yet implemented. Missing: CASCADE_API_ENDPOINT and CASCADE_API_KEY "
+    "environment variables. Use mode=mock for now."
+)
+
+# Admission control (see pipeline.admission): calls in flight per tool (0:
+# unlimited), a budget for the bytes that stores and retrievals in flight
+# hold (exported sessions, blobs), and a bounded queue of calls waiting for
+# admission, each rejected with a retry-after hint once its wait runs out
+admission = AdmissionController(
+    limits={
+        "store_session_to_cascade": int(os.getenv("LUMERA_MAX_INFLIGHT_STORES", "8")),
+        "store_sessions_to_cascade": int(os.getenv("LUMERA_MAX_INFLIGHT_BATCH_STORES", "2")),
+        "query_memories": int(os.getenv("LUMERA_MAX_INFLIGHT_QUERIES", "32")),
+        "retrieve_session_from_cascade": int(os.getenv("LUMERA_MAX_INFLIGHT_RETRIEVES", "16")),
+        "retrieve_sessions_from_cascade": int(
+            os.getenv("LUMERA_MAX_INFLIGHT_BATCH_RETRIEVES", "4")
+        ),
+    },
+    max_bytes=int(float(os.getenv("LUMERA_ADMISSION_MAX_MB", "256")) * 1024 * 1024),
+    byte_tools=(
+        "store_session_to_cascade",
+        "store_sessions_to_cascade",
+        "retrieve_session_from_cascade",
+        "retrieve_sessions_from_cascade",
+    ),
+    queue_size=int(os.getenv("LUMERA_ADMISSION_QUEUE", "64")),
+    max_wait=float(os.getenv("LUMERA_ADMISSION_MAX_WAIT_MS", "5000")) / 1000,
+)
+
+# Concurrent identical retrievals and queries share one execution (see
+# pipeline.singleflight); stores end the flights they could have changed
+flights = SingleFlight()
+
+# Instrumentation (see src.metrics): fraction of calls whose stages are timed
+# (0 disables timing; byte and event counters are always kept), and an
+# optional Prometheus text file rewritten at most every METRICS_DUMP_INTERVAL
+metrics = Metrics(sample_rate=float(os.getenv("LUMERA_METRICS_SAMPLE_RATE", "1")))
+METRICS_FILE = os.getenv("LUMERA_METRICS_FILE") or None
+METRICS_DUMP_INTERVAL = float(os.getenv("LUMERA_METRICS_DUMP_S", "15"))
+_metrics_dumped_at = 0.0
+# Module attributes are read at snapshot time, so replaced components count
+metrics.add_collector("redaction_memo", lambda: redaction_memo.stats())
+metrics.add_collector("derivation_cache", lambda: derivation_cache.stats())
+metrics.add_collector("prefilter", get_prefilter_stats)
+metrics.add_collector("gate", lambda: {
+    "reads": executors.gate.reads,
+    "bulk_waits": executors.gate.bulk_waits,
+    "bulk_wait_ms": round(executors.gate.bulk_wait_seconds * 1000, 3),
+})
+metrics.add_collector("singleflight", lambda: flights.stats())
+metrics.add_collector("admission", lambda: admission.stats())
+metrics.add_collector("cass_export", lambda: cass.stats())
 
 # Create MCP server
 app = Server("lumera-agent-memory")
@@ -53,7 +244,8 @@ async def list_tools() -> List[Tool]:
                     },
                     "metadata": {
                         "type": "object",
-                        "description": "Additional metadata (optional)",
+                        "description": "Additional metadata (optional). Control flags: dry_run, "
+                        "allow_raw_export, raw_export_ack, dedup_policy (off|link|skip|merge)",
                     },
                     "mode": {
                         "type": "string",
@@ -65,6 +257,40 @@ async def list_tools() -> List[Tool]:
                 "required": ["session_id"],
             },
         ),
+        Tool(
+            name="store_sessions_to_cascade",
+            description="Store many sessions to Cascade (batch of store_session_to_cascade). "
+            "Exports, redaction, encryption and uploads run as a pipeline; all memories are "
+            "indexed in one transaction. Returns one result per session. "
+            "WARNING: Storage is immutable.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "session_ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Session IDs to store (from CASS or custom)",
+                    },
+                    "tags": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Tags applied to every session (optional)",
+                    },
+                    "metadata": {
+                        "type": "object",
+                        "description": "Additional metadata applied to every session (optional). "
+                        "Control flags as for store_session_to_cascade",
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["mock", "live"],
+                        "description": "Storage mode: mock (filesystem) or live (Cascade API)",
+                        "default": "mock",
+                    },
+                },
+                "required": ["session_ids"],
+            },
+        ),
         Tool(
             name="query_memories",
             description="Query local index for memory pointers. "
@@ -95,6 +321,18 @@ async def list_tools() -> List[Tool]:
                         "description": "Max results (default: 10)",
                         "default": 10,
                     },
+                    "search_mode": {
+                        "type": "string",
+                        "enum": ["lexical", "vector", "hybrid"],
+                        "description": "lexical: FTS5 bm25 (all terms must match); vector: offline "
+                        "hashed n-gram similarity (partial matches); hybrid: fusion of both",
+                        "default": "lexical",
+                    },
+                    "collapse_duplicates": {
+                        "type": "boolean",
+                        "description": "Return one hit per near-duplicate cluster (default: false)",
+                        "default": False,
+                    },
                 },
             },
         ),
@@ -108,6 +346,13 @@ async def list_tools() -> List[Tool]:
                         "type": "string",
                         "description": "Cascade URI (cascade://...)",
                     },
+                    "card_only": {
+                        "type": "boolean",
+                        "description": "Only the memory card and redaction report are "
+                        "needed: served from the local index when it holds them, raw_session "
+                        "omitted (default: false)",
+                        "default": False,
+                    },
                     "mode": {
                         "type": "string",
                         "enum": ["mock", "live"],
@@ -118,6 +363,41 @@ async def list_tools() -> List[Tool]:
                 "required": ["cascade_uri"],
             },
         ),
+        Tool(
+            name="retrieve_sessions_from_cascade",
+            description="Retrieve and decrypt many sessions from Cascade in one call "
+            "(batch of retrieve_session_from_cascade, e.g. the top hits of query_memories). "
+            "Fetches and decrypts run concurrently. Returns one result per pointer, in order.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cascade_uris": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Cascade URIs (cascade://...), most wanted first",
+                    },
+                    "max_total_bytes": {
+                        "type": "integer",
+                        "description": "Byte budget for the fetched blobs (optional). Pointers are "
+                        "taken in order; the first that does not fit and all after it are skipped",
+                    },
+                    "card_only": {
+                        "type": "boolean",
+                        "description": "Only the memory card and redaction report are "
+                        "needed: served from the local index when it holds them, raw_session "
+                        "omitted (default: false)",
+                        "default": False,
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["mock", "live"],
+                        "description": "Storage mode: mock (filesystem) or live (Cascade API)",
+                        "default": "mock",
+                    },
+                },
+                "required": ["cascade_uris"],
+            },
+        ),
         Tool(
             name="estimate_storage_cost",
             description="Estimate Cascade storage cost (heuristic calculation). "
@@ -138,6 +418,27 @@ async def list_tools() -> List[Tool]:
                 "required": ["bytes"],
             },
         ),
+        Tool(
+            name="get_memory_metrics",
+            description="Server metrics: per-stage latency histograms of store and retrieve calls "
+            "(export, redact, card, serialize, encrypt, put, index / lookup, get, decrypt, hash, "
+            "parse), bytes processed, outcome and cache-hit counters, memo/cache/prefilter stats.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "include_buckets": {
+                        "type": "boolean",
+                        "description": "Add per-bucket counts to each latency histogram",
+                        "default": False,
+                    },
+                    "reset": {
+                        "type": "boolean",
+                        "description": "Zero histograms and counters after reading them",
+                        "default": False,
+                    },
+                },
+            },
+        ),
     ]
 
 
@@ -145,232 +446,722 @@ async def list_tools() -> List[Tool]:
 async def call_tool(name: str, arguments: Any) -> List[TextContent]:
     """Handle tool calls."""
 
-    if name == "store_session_to_cascade":
-        return await _store_session(arguments)
-    elif name == "query_memories":
-        return await _query_memories(arguments)
-    elif name == "retrieve_session_from_cascade":
-        return await _retrieve_session(arguments)
-    elif name == "estimate_storage_cost":
-        return await _estimate_cost(arguments)
+    if name == "get_memory_metrics":
+        return await _get_metrics(arguments or {})
+    try:
+        ticket = await admission.admit(name)
+    except AdmissionRejected as e:
+        return [
+            TextContent(
+                type="text",
+                text=json.dumps({
+                    "ok": False,
+                    "error": str(e),
+                    "busy": True,
+                    "retry_after_s": e.retry_after,
+                }),
+            )
+        ]
+
+    try:
+        if name == "store_session_to_cascade":
+            result = await _store_session(arguments, ticket)
+            # Reads in flight may predate the store; later reads must not join them
+            flights.forget()
+        elif name == "store_sessions_to_cascade":
+            result = await _store_sessions(arguments, ticket)
+            flights.forget()
+        elif name == "query_memories":
+            result = await _query_memories(arguments)
+        elif name == "retrieve_session_from_cascade":
+            result = await _retrieve_session(arguments, ticket)
+        elif name == "retrieve_sessions_from_cascade":
+            result = await _retrieve_sessions(arguments, ticket)
+        elif name == "estimate_storage_cost":
+            result = await _estimate_cost(arguments)
+        else:
+            return [TextContent(type="text", text=f"Unknown tool: {name}")]
+    finally:
+        ticket.release()
+    await _dump_metrics()
+    return result
+
+
+class _StoreJob:
+    """One session on its way through the store steps (single or batch store)."""
+
+    def __init__(
+        self,
+        session_id: str,
+        tags: List[str],
+        metadata: Dict[str, Any],
+        batch: Optional["_StoreBatch"] = None,
+        trace: Optional[Trace] = None,
+        ticket: Optional[Ticket] = None,
+    ):
+        self.session_id = session_id
+        self.tags = tags
+        # Control flags from metadata
+        self.dry_run = metadata.get("dry_run", False)
+        self.dedup_policy = metadata.get("dedup_policy", DEDUP_POLICY)
+        # Artifact type based on opt-in gate
+        self.artifact_type = "artifact_only"  # DEFAULT: privacy-first
+        if (
+            metadata.get("allow_raw_export", False)
+            and metadata.get("raw_export_ack") == "I understand the risk"
+        ):
+            self.artifact_type = "raw_plus_artifact"
+        self.batch = batch
+        # Stage timings go to the call's trace (a batch shares one)
+        self.trace = trace if trace is not None else metrics.trace("store")
+        # Admission of the call: charged with the bytes the job holds
+        self.ticket = ticket
+
+        # Set by the steps
+        self.session_data: Optional[Dict[str, Any]] = None
+        self.previous: Optional[Dict[str, Any]] = None
+        self.df = None
+        self.derived: Optional[Dict[str, Any]] = None
+        self.memory_card: Optional[Dict[str, Any]] = None
+        self.snippet: Optional[str] = None
+        self.redaction_info: Optional[Dict[str, Any]] = None
+        self.enrichment_info: Optional[Dict[str, Any]] = None
+        self.duplicate: Optional[Dict[str, Any]] = None
+        self.dedup_info: Optional[Dict[str, Any]] = None
+        self.payload: Optional[Dict[str, Any]] = None
+        self.plaintext_sha256: Optional[str] = None
+        self.encrypted_blob: Optional[bytes] = None
+        self.cascade_uri: Optional[str] = None
+        # Response, once a step finished the job early
+        self.response: Optional[Dict[str, Any]] = None
+
+
+class _StoreBatch:
+    """Near-duplicate lookups and deferred index merges within one batch store.
+
+    Sessions of a batch are only indexed at the end, so the index cannot
+    see earlier sessions of the same batch; their SimHash bands are kept
+    here instead.
+    """
+
+    def __init__(self):
+        self.registered: List[_StoreJob] = []
+        self._signatures: Dict[int, int] = {}
+        self._buckets: Dict[Tuple[int, int], List[_StoreJob]] = defaultdict(list)
+        # (duplicate match, tags, session_id) of jobs with the merge policy
+        self.merges: List[Tuple[Dict[str, Any], List[str], str]] = []
+
+    def find_near_duplicate(
+        self, signature: int, max_distance: int, artifact_type: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Nearest registered job within max_distance bits (of artifact_type, if given).
+
+        Returns:
+            {"job", "pointer": None, "distance"}, or None if there is none
+        """
+        best = None
+        for key in enumerate(bands(signature)):
+            for other in self._buckets.get(key, ()):
+                if artifact_type is not None and other.artifact_type != artifact_type:
+                    continue
+                distance = hamming(signature, self._signatures[id(other)])
+                if distance <= max_distance and (best is None or distance < best["distance"]):
+                    best = {"job": other, "pointer": None, "distance": distance}
+        return best
+
+    def register(self, job: _StoreJob, signature: Optional[int]):
+        """Record a job that will be stored (in store order)."""
+        self.registered.append(job)
+        if signature is not None:
+            self._signatures[id(job)] = signature
+            for key in enumerate(bands(signature)):
+                self._buckets[key].append(job)
+
+
+def _export_step(job: _StoreJob) -> Optional[_StoreJob]:
+    """Step 1: Export session from CASS (or fixture)."""
+    with job.trace.stage("export"):
+        job.session_data = cass.export_session(job.session_id)
+    if job.session_data is None:
+        job.response = {"ok": False, "error": f"Session not found: {job.session_id}"}
+        return None
+    if job.ticket is not None and admission.max_bytes:
+        job.ticket.charge(len(json.dumps(job.session_data, default=str)))
+    return job
+
+
+def _lookup_step(job: _StoreJob) -> _StoreJob:
+    """Index reads the derivation needs (on the index connection's thread)."""
+    with job.trace.stage("lookup"):
+        previous = index.get_enrichment_state(job.session_id) if INCREMENTAL_CARDS else None
+        if previous is not None:
+            previous["state"] = _open_enrichment_state(previous["state"])
+        job.previous = previous
+        job.df = index.document_frequencies() if KEYWORD_RANKING == "tfidf" else None
+    return job
+
+
+def _derive_step(job: _StoreJob) -> Optional[_StoreJob]:
+    """Steps 2-3: Redact (always - with report) and generate Memory Card.
+
+    Deterministic and offline; reused from a prior call on identical content.
+    """
+    profile = RedactionProfile() if REDACTION_PROFILE else None
+    timings: Dict[str, float] = {}
+    derived = derive_session(
+        job.session_data,
+        memo=redaction_memo,
+        time_budget=REDACTION_TIME_BUDGET,
+        cache=derivation_cache,
+        profile=profile,
+        df=job.df,
+        incremental=INCREMENTAL_CARDS,
+        previous_state=job.previous["state"] if job.previous else None,
+        executor=executors.processes,
+        timings=timings,
+    )
+    for stage, seconds in timings.items():
+        job.trace.record(stage, seconds)
+    if not derived["ok"]:
+        # CRITICAL secrets detected (or redaction budget exceeded) - fail-closed
+        job.response = {
+            "ok": False,
+            "error": f"Redaction failed closed - storage aborted: {derived['error']}",
+            "reason": "Privacy-first design: Cannot store sessions with private keys, "
+            "auth headers, or bearer tokens.",
+        }
+        return None
+
+    if derived["cached"]:
+        job.trace.count("derivation_cached")
+    job.derived = derived
+    job.memory_card = derived["memory_card"]
+    job.snippet = " | ".join(job.memory_card["summary_bullets"][:2])  # First 2 bullets
+    job.redaction_info = {"rules_fired": derived["redaction_report"], "cached": derived["cached"]}
+    if profile is not None and not derived["cached"]:
+        job.redaction_info["profile"] = profile.snapshot()
+
+    if INCREMENTAL_CARDS:
+        previous = job.previous
+        job.enrichment_info = {
+            "resumed": derived["enrichment_resumed"],
+            "card_version": previous["version"] + 1 if previous else 1,
+            "previous_pointer": previous["pointer"] if previous else None,
+        }
+    return job
+
+
+def _dedup_step(job: _StoreJob) -> Optional[_StoreJob]:
+    """Step 3b: Near-duplicate check (SimHash of the card, LSH band lookup).
+
+    Earlier versions of a grown session do not count. Steps 4-5 (payload)
+    follow for sessions that will be stored.
+    """
+    previous = job.previous
+    memory_card = job.memory_card
+    # A grown session is a new version of its previous memory
+    grown = previous is not None and job.derived["enrichment_state"]["length"] != previous[
+        "state"
+    ].get("length")
+
+    signature = None
+    duplicate = None
+    # skip and merge stand in for the new session, so only a memory of the
+    # same artifact type can (an opted-in raw export is never collapsed onto
+    # an artifact-only memory); link just records the relation
+    same_type = job.artifact_type if job.dedup_policy in ("skip", "merge") else None
+    if job.dedup_policy != "off":
+        with job.trace.stage("dedup"):
+            signature = simhash64(sketch_text(memory_card["title"], job.snippet, memory_card))
+            if signature is not None:
+                matches = index.find_near_duplicates(
+                    signature,
+                    DEDUP_DISTANCE,
+                    exclude_session_id=job.session_id if grown else None,
+                    artifact_type=same_type,
+                )
+                duplicate = matches[0] if matches else None
+                if job.batch is not None:
+                    in_batch = job.batch.find_near_duplicate(signature, DEDUP_DISTANCE, same_type)
+                    if in_batch is not None and (
+                        duplicate is None or in_batch["distance"] < duplicate["distance"]
+                    ):
+                        duplicate = in_batch
+    job.duplicate = duplicate
+    if duplicate is not None:
+        job.trace.count("near_duplicate")
+
+    if duplicate is not None:
+        job.dedup_info = {
+            "policy": job.dedup_policy,
+            "duplicate_of": duplicate["pointer"],
+            "distance": duplicate["distance"],
+        }
+        if "job" in duplicate:
+            job.dedup_info["duplicate_of_session"] = duplicate["job"].session_id
+        if job.dedup_policy in ("skip", "merge"):
+            merge = not job.dry_run and job.dedup_policy == "merge"
+            if merge and job.batch is not None:
+                job.batch.merges.append((duplicate, job.tags, job.session_id))
+            elif merge:
+                index.merge_into(duplicate["id"], job.tags, job.session_id)
+            job.response = {
+                "ok": True,
+                "session_id": job.session_id,
+                "cascade_uri": duplicate["pointer"],
+                "artifact_type": job.artifact_type,
+                "indexed": merge,
+                "dedup": job.dedup_info,
+                "memory_card": memory_card,
+                "redaction": job.redaction_info,
+            }
+            if job.dry_run:
+                job.response["dry_run"] = True
+                job.response["preview"] = {"would_upload": False}
+            return None
+
+    if job.batch is not None:
+        job.batch.register(job, signature)
+
+    # Step 5: Build payload based on artifact type
+    job.payload = {
+        "artifact_type": job.artifact_type,
+        "session_id": job.session_id,
+        "timestamp": job.session_data.get("timestamp"),
+        "memory_card": memory_card,
+        "redaction_report": job.derived["redaction_report"],
+    }
+    if job.artifact_type == "raw_plus_artifact":
+        # OPT-IN: Store artifact + redacted raw session
+        job.payload["raw_session"] = job.derived["redacted"]
+    job.payload["tags"] = job.tags
+
+    if previous is not None:
+        job.payload["card_version"] = job.enrichment_info["card_version"]
+        job.payload["previous_pointer"] = previous["pointer"]
+    return job
+
+
+def _encrypt_step(job: _StoreJob) -> Optional[_StoreJob]:
+    """Step 6: Serialize and encrypt (Step 7: a dry run ends here).
+
+    A dry run leaves its blob for the following store of the same content,
+    which then uploads exactly what was previewed; the store consumes it,
+    so repeated stores still get a fresh nonce (and pointer).
+    """
+    blob_key = None
+    if job.derived["content_sha256"] is not None:
+        key_fingerprint = hashlib.sha256(get_encryption_key()).hexdigest()[:16]
+        blob_key = (
+            "blob",
+            job.derived["content_sha256"],
+            job.session_id,
+            job.artifact_type,
+            json.dumps(job.tags, sort_keys=True),
+            job.previous["pointer"] if job.previous else None,
+            key_fingerprint,
+        )
+    prepared = derivation_cache.get(blob_key) if job.dry_run else derivation_cache.pop(blob_key)
+    if prepared is None:
+        plaintext_sha256, encrypted_blob = _seal_payload(job.payload, job.trace)
+        if job.dry_run:
+            derivation_cache.put(blob_key, (plaintext_sha256, encrypted_blob), len(encrypted_blob))
     else:
-        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+        plaintext_sha256, encrypted_blob = prepared
+        job.trace.count("blob_reused")
+    job.plaintext_sha256 = plaintext_sha256
+    job.encrypted_blob = encrypted_blob
+    if job.ticket is not None:
+        job.ticket.charge(len(encrypted_blob))
+
+    if job.dry_run:
+        # Return preview without uploading
+        job.response = {
+            "ok": True,
+            "dry_run": True,
+            "preview": {
+                "artifact_type": job.artifact_type,
+                "fields": list(job.payload.keys()),
+                "bytes": len(encrypted_blob),
+                "plaintext_sha256": plaintext_sha256,
+                "would_upload": False,
+            },
+            "memory_card": job.memory_card,
+            "redaction": job.redaction_info,
+        }
+        if job.dedup_info is not None:
+            job.response["dedup"] = job.dedup_info
+        if job.enrichment_info is not None:
+            job.response["enrichment"] = job.enrichment_info
+        return None
+    return job
+
+
+def _seal_payload(payload: Dict[str, Any], trace: Trace) -> Tuple[str, bytes]:
+    """Serialize (PAYLOAD_CODEC) and encrypt a payload: (plaintext_sha256, encrypted_blob).
+
+    A payload with a raw session is sealed as a sectioned blob (card, raw
+    session) so that the card can be read without the raw session; its
+    plaintext_sha256 covers the section plaintexts in order.
+    """
+    with trace.stage("serialize"):
+        if "raw_session" not in payload:
+            plaintext = encode_payload(payload, PAYLOAD_CODEC)
+            sections = None
+        else:
+            card = {key: value for key, value in payload.items() if key != "raw_session"}
+            sections = {
+                CARD_SECTION: encode_payload(card, PAYLOAD_CODEC),
+                RAW_SECTION: encode_payload(payload["raw_session"], PAYLOAD_CODEC),
+            }
+            plaintext = b"".join(sections.values())
+    with trace.stage("encrypt"):
+        plaintext_sha256 = hashlib.sha256(plaintext).hexdigest()
+        encrypted_blob = encrypt_blob(plaintext) if sections is None else encrypt_sections(sections)
+    trace.add_bytes("serialize", len(plaintext))
+    trace.add_bytes("encrypt", len(encrypted_blob))
+    return plaintext_sha256, encrypted_blob
+
+
+def _put_step(job: _StoreJob) -> _StoreJob:
+    """Step 8: Store in Cascade (not dry-run)."""
+    with job.trace.stage("put"):
+        job.cascade_uri = cascade.put(job.encrypted_blob)
+    job.trace.add_bytes("put", len(job.encrypted_blob))
+    return job
+
+
+def _timed(trace: Trace, stage: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call fn as one timed stage of trace (for work submitted to an executor)."""
+    with trace.stage(stage):
+        return fn(*args, **kwargs)
+
+
+def _traced(trace: Trace, response: Dict[str, Any]) -> List[TextContent]:
+    """Finish a call's trace with its outcome and return its response."""
+    trace.finish(response["ok"])
+    return [TextContent(type="text", text=json.dumps(response))]
+
+
+def _seal_enrichment_state(state: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Encrypt extractor state for the index.
+
+    The state holds term counts and a digest of the raw session text,
+    including fields the payload never keeps, and the index is plaintext.
+    """
+    if state is None:
+        return None
+    sealed = encrypt_blob(json.dumps(state).encode("utf-8"))
+    return {"sealed": base64.b64encode(sealed).decode("ascii")}
+
+
+def _open_enrichment_state(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Decrypt a _seal_enrichment_state() value; {} (start from scratch) if unreadable."""
+    try:
+        return json.loads(decrypt_blob(base64.b64decode(stored["sealed"])))
+    except (KeyError, TypeError, ValueError, EncryptionError):
+        return {}
+
+
+def _index_record(job: _StoreJob) -> Dict[str, Any]:
+    """Step 9: add_memory() arguments for a stored job."""
+    index_metadata = {
+        "memory_card": job.memory_card,
+        "redaction_report": job.derived["redaction_report"],
+        "timestamp": job.session_data.get("timestamp"),
+    }
+    if job.previous is not None:
+        index_metadata["card_version"] = job.enrichment_info["card_version"]
+        index_metadata["previous_pointer"] = job.previous["pointer"]
+    duplicate = job.duplicate
+    return {
+        "pointer": job.cascade_uri,
+        "content_hash": hashlib.sha256(job.encrypted_blob).hexdigest(),
+        "artifact_type": job.artifact_type,
+        "tags": job.tags,
+        "source_session_id": job.session_id,
+        "source_tool": job.session_data.get("tool_name", "unknown"),
+        "title": job.memory_card["title"],
+        "snippet": job.snippet,
+        "metadata": index_metadata,
+        "terms": job.derived["terms"],
+        "duplicate_of": (
+            duplicate["cluster_id"] if duplicate is not None and "job" not in duplicate else None
+        ),
+        "enrichment_state": _seal_enrichment_state(job.derived.get("enrichment_state")),
+    }
+
+
+def _stored_response(job: _StoreJob, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Response for a job that was uploaded and indexed."""
+    response = {
+        "ok": True,
+        "session_id": job.session_id,
+        "cascade_uri": job.cascade_uri,
+        "artifact_type": job.artifact_type,
+        "indexed": True,
+        "memory_card": job.memory_card,
+        "redaction": job.redaction_info,
+        "crypto": {
+            "enc": "AES-256-GCM",
+            "key_id": "env:LUMERA_MEMORY_KEY",
+            "plaintext_sha256": job.plaintext_sha256,
+            "ciphertext_sha256": record["content_hash"],
+            "bytes": len(job.encrypted_blob),
+        },
+    }
+    if job.dedup_info is not None:
+        response["dedup"] = job.dedup_info
+    if job.enrichment_info is not None:
+        response["enrichment"] = job.enrichment_info
+    return response
 
 
-async def _store_session(args: Dict[str, Any]) -> List[TextContent]:
+def _store_failure(error: Exception) -> Dict[str, Any]:
+    """Error response for an exception raised while storing."""
+    if isinstance(error, EncryptionError):
+        return {"ok": False, "error": f"Encryption failed: {str(error)}"}
+    return {"ok": False, "error": f"Storage failed: {str(error)}"}
+
+
+def _check_store_args(metadata: Dict[str, Any], mode: str) -> Optional[Dict[str, Any]]:
+    """Error response for invalid store arguments, or None."""
+    dedup_policy = metadata.get("dedup_policy", DEDUP_POLICY)
+    if dedup_policy not in DEDUP_POLICIES:
+        return {
+            "ok": False,
+            "error": f"Unknown dedup_policy: {dedup_policy} "
+            f"(expected one of {', '.join(DEDUP_POLICIES)})",
+        }
+
+    # Check live mode
+    if mode == "live":
+        return {
+            "ok": False,
+            "error": LIVE_MODE_ERROR,
+        }
+    return None
+
+
+async def _store_session(
+    args: Dict[str, Any], ticket: Optional[Ticket] = None
+) -> List[TextContent]:
     """Store session to Cascade with privacy-first artifact-only design.
 
     CEO Feedback: Default to artifact-only (no raw sessions).
     Opt-in required for raw export.
+
+    Args:
+        args: Tool arguments
+        ticket: Admission of the call, charged with the session's bytes
     """
+    trace = metrics.trace("store")
     try:
         session_id = args["session_id"]
         tags = args.get("tags", [])
         metadata = args.get("metadata", {})
         mode = args.get("mode", "mock")
 
-        # Extract control flags from metadata
-        dry_run = metadata.get("dry_run", False)
-        allow_raw_export = metadata.get("allow_raw_export", False)
-        raw_export_ack = metadata.get("raw_export_ack")
+        error = _check_store_args(metadata, mode)
+        if error is not None:
+            return _traced(trace, error)
 
-        # Check live mode
-        if mode == "live":
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "ok": False,
-                        "error": "Live Cascade mode not yet implemented. Missing: CASCADE_API_ENDPOINT and CASCADE_API_KEY environment variables. Use mode=mock for now.",
-                    }),
-                )
-            ]
-
-        # Step 1: Export session from CASS (or fixture)
-        session_data = cass.export_session(session_id)
-        if session_data is None:
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "ok": False,
-                        "error": f"Session not found: {session_id}",
-                    }),
-                )
-            ]
+        job = _StoreJob(session_id, tags, metadata, trace=trace, ticket=ticket)
+        for run, step in (
+            (executors.run_io, _export_step),
+            (executors.run_io, _lookup_step),
+            (executors.run_cpu, _derive_step),
+            (executors.run_cpu, _dedup_step),
+            (executors.run_cpu, _encrypt_step),
+            (executors.run_io, _put_step),
+        ):
+            if await run(step, job) is None:
+                return _traced(trace, job.response)
 
-        # Step 2: Redact (always - with report)
-        try:
-            redacted, redaction_report = redact_session(session_data)
-        except RedactionError as e:
-            # CRITICAL secrets detected - fail-closed
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "ok": False,
-                        "error": f"CRITICAL secrets detected - storage aborted: {str(e)}",
-                        "reason": "Privacy-first design: Cannot store sessions with private keys, auth headers, or bearer tokens.",
-                    }),
-                )
-            ]
+        # Step 9: Add to local index
+        record = _index_record(job)
+        await executors.run_io(_timed, trace, "index", index.add_memory, **record)
+        return _traced(trace, _stored_response(job, record))
 
-        # Step 3: Generate Memory Card (always - deterministic, offline)
-        memory_card = generate_memory_card(session_data)
+    except Exception as e:
+        return _traced(trace, _store_failure(e))
 
-        # Step 4: Determine artifact type based on opt-in gate
-        artifact_type = "artifact_only"  # DEFAULT: privacy-first
 
-        if allow_raw_export and raw_export_ack == "I understand the risk":
-            artifact_type = "raw_plus_artifact"
+async def _store_sessions(
+    args: Dict[str, Any], ticket: Optional[Ticket] = None
+) -> List[TextContent]:
+    """Store many sessions through the staged store pipeline.
 
-        # Step 5: Build payload based on artifact type
-        if artifact_type == "artifact_only":
-            # DEFAULT: Store only sanitized artifact (CEO feedback)
-            payload = {
-                "artifact_type": "artifact_only",
-                "session_id": session_id,
-                "timestamp": session_data.get("timestamp"),
-                "memory_card": memory_card,
-                "redaction_report": redaction_report,
-                "tags": tags,
-            }
-        else:
-            # OPT-IN: Store artifact + redacted raw session
-            payload = {
-                "artifact_type": "raw_plus_artifact",
-                "session_id": session_id,
-                "timestamp": session_data.get("timestamp"),
-                "memory_card": memory_card,
-                "redaction_report": redaction_report,
-                "raw_session": redacted,  # Redacted version
-                "tags": tags,
+    Export, index reads and upload run on the I/O pool, redaction, card,
+    near-duplicate checks and encryption on the CPU pool, with bounded
+    queues in between (see pipeline.stages). All new memories and merges
+    are indexed in one transaction at the end, so the call holds every
+    session's bytes until it returns (charged to ticket).
+    """
+    trace = metrics.trace("store_batch")
+    try:
+        session_ids = args["session_ids"]
+        tags = args.get("tags", [])
+        metadata = args.get("metadata", {})
+        mode = args.get("mode", "mock")
+
+        error = _check_store_args(metadata, mode)
+        if error is None and len(session_ids) > MAX_BATCH_SESSIONS:
+            error = {
+                "ok": False,
+                "error": f"Too many sessions: {len(session_ids)} "
+                f"(max {MAX_BATCH_SESSIONS} per call)",
             }
+        if error is not None:
+            return _traced(trace, error)
 
-        # Step 6: Serialize and encrypt
-        plaintext = json.dumps(payload).encode("utf-8")
-        plaintext_sha256 = hashlib.sha256(plaintext).hexdigest()
-        encrypted_blob = encrypt_blob(plaintext)
-        ciphertext_sha256 = hashlib.sha256(encrypted_blob).hexdigest()
-
-        # Step 7: DRY-RUN check (preview mode)
-        if dry_run:
-            # Return preview without uploading
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "ok": True,
-                        "dry_run": True,
-                        "preview": {
-                            "artifact_type": artifact_type,
-                            "fields": list(payload.keys()),
-                            "bytes": len(encrypted_blob),
-                            "plaintext_sha256": plaintext_sha256,
-                            "would_upload": False,
-                        },
-                        "memory_card": memory_card,
-                        "redaction": {
-                            "rules_fired": redaction_report,
-                        },
-                    }),
+        batch = _StoreBatch()
+        jobs: List[_StoreJob] = []
+        results: List[Optional[Dict[str, Any]]] = []
+        seen = set()
+        for session_id in session_ids:
+            if session_id in seen:
+                results.append(
+                    {"ok": False, "error": f"Duplicate session_id in batch: {session_id}"}
                 )
-            ]
+                continue
+            seen.add(session_id)
+            jobs.append(
+                _StoreJob(session_id, list(tags), metadata, batch=batch, trace=trace, ticket=ticket)
+            )
+            results.append(None)
 
-        # Step 8: Store in Cascade (not dry-run)
-        cascade_uri = cascade.put(encrypted_blob)
+        bulk_turn = executors.gate.bulk_turn
+        stages = [
+            Stage("export", _export_step, BATCH_IO_WORKERS, executors.io),
+            Stage("lookup", _lookup_step, 1, executors.io),
+            Stage("derive", _derive_step, CPU_WORKERS, executors.cpu, before=bulk_turn),
+            # One worker: batch near-duplicate state is not shared between threads
+            Stage("dedup", _dedup_step, 1, executors.cpu, before=bulk_turn),
+            Stage("encrypt", _encrypt_step, 1, executors.cpu, before=bulk_turn),
+            Stage("put", _put_step, BATCH_IO_WORKERS, executors.io),
+        ]
+        for job, outcome in zip(jobs, await run_stages(jobs, stages, BATCH_QUEUE_DEPTH)):
+            if isinstance(outcome, StageFailure):
+                job.response = _store_failure(outcome.error)
 
-        # Step 9: Add to local index
-        index.add_memory(
-            pointer=cascade_uri,
-            content_hash=ciphertext_sha256,
-            artifact_type=artifact_type,
-            tags=tags,
-            source_session_id=session_id,
-            source_tool=session_data.get("tool_name", "unknown"),
-            title=memory_card["title"],
-            snippet=" | ".join(memory_card["summary_bullets"][:2]),  # First 2 bullets
-            metadata={
-                "memory_card": memory_card,
-                "redaction_report": redaction_report,
+        await executors.run_io(_timed, trace, "index", _index_batch, jobs, batch)
+
+        responses = iter(jobs)
+        for position, result in enumerate(results):
+            if result is None:
+                job = next(responses)
+                result = job.response
+                result.setdefault("session_id", job.session_id)
+                results[position] = result
+            else:
+                result["session_id"] = session_ids[position]
+
+        return _traced(
+            trace,
+            {
+                "ok": True,
+                "results": results,
+                "stored": sum(1 for r in results if r["ok"] and "crypto" in r),
+                "deduplicated": sum(
+                    1
+                    for r in results
+                    if r["ok"] and "dedup" in r and "crypto" not in r and not r.get("dry_run")
+                ),
+                "failed": sum(1 for r in results if not r["ok"]),
             },
         )
 
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
-                    "ok": True,
-                    "session_id": session_id,
-                    "cascade_uri": cascade_uri,
-                    "artifact_type": artifact_type,
-                    "indexed": True,
-                    "memory_card": memory_card,
-                    "redaction": {
-                        "rules_fired": redaction_report,
-                    },
-                    "crypto": {
-                        "enc": "AES-256-GCM",
-                        "key_id": "env:LUMERA_MEMORY_KEY",
-                        "plaintext_sha256": plaintext_sha256,
-                        "ciphertext_sha256": ciphertext_sha256,
-                        "bytes": len(encrypted_blob),
-                    },
-                }),
-            )
-        ]
-
-    except EncryptionError as e:
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
-                    "ok": False,
-                    "error": f"Encryption failed: {str(e)}",
-                }),
-            )
-        ]
     except Exception as e:
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
+        return _traced(trace, _store_failure(e))
+
+
+def _index_batch(jobs: List[_StoreJob], batch: _StoreBatch):
+    """Index a batch's uploads and merges in one transaction, then finish their responses."""
+    stored = [
+        job for job in batch.registered if job.response is None and job.cascade_uri is not None
+    ]
+    positions = {id(job): position for position, job in enumerate(stored)}
+
+    def cluster_root(job: _StoreJob):
+        # First memory of a job's cluster: an indexed memory ID or a batch job
+        duplicate = job.duplicate
+        if duplicate is None:
+            return job
+        if "job" in duplicate:
+            return cluster_root(duplicate["job"])
+        return duplicate["cluster_id"]
+
+    records = []
+    for job in stored:
+        record = _index_record(job)
+        if job.duplicate is not None and "job" in job.duplicate:
+            root = cluster_root(job.duplicate["job"])
+            if isinstance(root, int):
+                record["duplicate_of"] = root
+            elif id(root) in positions:
+                record["duplicate_of_record"] = positions[id(root)]
+        records.append(record)
+
+    # Merges into an indexed memory join the transaction; merges into a
+    # session of this batch are folded into its record
+    merges = []
+    for duplicate, tags, session_id in batch.merges:
+        if "job" not in duplicate:
+            merges.append((duplicate["id"], tags, session_id))
+        elif id(duplicate["job"]) in positions:
+            record = records[positions[id(duplicate["job"])]]
+            record["tags"] = record["tags"] + [tag for tag in tags if tag not in record["tags"]]
+            record["metadata"].setdefault("merged_sessions", []).append(session_id)
+
+    failure = None
+    if records or merges:
+        try:
+            index.add_memories(records, merges)
+        except Exception as e:
+            failure = {"ok": False, "error": f"Storage failed: indexing failed: {str(e)}"}
+    for job, record in zip(stored, records):
+        job.response = _stored_response(job, record) if failure is None else dict(failure)
+
+    # Matches against sessions of this batch learn their pointer only now;
+    # a skip or merge whose target was not stored leaves the session unstored,
+    # and a failed transaction fails every merge it carried
+    for job in jobs:
+        duplicate = job.duplicate
+        if duplicate is None or not job.response["ok"]:
+            continue
+        finished_early = job.cascade_uri is None and not job.dry_run
+        if finished_early and job.response.get("indexed") and failure is not None:
+            job.response = dict(failure)
+        elif "job" in duplicate:
+            other = duplicate["job"]
+            if other.cascade_uri is not None and other.response["ok"]:
+                job.dedup_info["duplicate_of"] = other.cascade_uri
+                if finished_early:
+                    job.response["cascade_uri"] = other.cascade_uri
+            elif finished_early:
+                job.response = {
                     "ok": False,
-                    "error": f"Storage failed: {str(e)}",
-                }),
-            )
-        ]
+                    "error": f"Near-duplicate session {other.session_id} "
+                    "in this batch was not stored",
+                }
 
 
 async def _query_memories(args: Dict[str, Any]) -> List[TextContent]:
-    """Query local index for memory pointers."""
+    """Query local index for memory pointers (identical concurrent queries run once)."""
     try:
-        query_text = args.get("query")
-        tags = args.get("tags")
-        time_range = args.get("time_range")
-        limit = args.get("limit", 10)
-
-        memories = index.query_memories(
-            query=query_text,
-            tags=tags,
-            time_range=time_range,
-            limit=limit
-        )
+        query = {
+            "query": args.get("query"),
+            "tags": args.get("tags"),
+            "time_range": args.get("time_range"),
+            "limit": args.get("limit", 10),
+            "search_mode": args.get("search_mode", "lexical"),
+            "collapse_duplicates": args.get("collapse_duplicates", False),
+        }
 
-        # Return hits with cascade_uri + metadata + artifact_type
-        hits = [
-            {
-                "cass_session_id": m.get("source_session_id"),
-                "cascade_uri": m["pointer"],
-                "artifact_type": m.get("artifact_type", "artifact_only"),
-                "title": m.get("title", f"Session {m.get('source_session_id', 'unknown')}"),
-                "snippet": m.get("snippet", m.get("source_tool", "")),
-                "tags": m.get("tags", []),
-                "created_at": m["created_at"],
-                "score": m.get("score", 0),
-            }
-            for m in memories
-        ]
+        hits, joined = await flights.do(flight_key("query", **query), _query_hits, query)
+        if joined:
+            metrics.count("query", "coalesced")
 
         return [
             TextContent(
@@ -394,98 +1185,402 @@ async def _query_memories(args: Dict[str, Any]) -> List[TextContent]:
         ]
 
 
-async def _retrieve_session(args: Dict[str, Any]) -> List[TextContent]:
-    """Retrieve and decrypt session from Cascade."""
+async def _query_hits(query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Run a query on the query pool into hits."""
+    memories = await executors.run_query(index.query_memories, **query)
+
+    # Return hits with cascade_uri + metadata + artifact_type
+    return [
+        {
+            "cass_session_id": m.get("source_session_id"),
+            "cascade_uri": m["pointer"],
+            "artifact_type": m.get("artifact_type", "artifact_only"),
+            "title": m.get("title", f"Session {m.get('source_session_id', 'unknown')}"),
+            "snippet": m.get("snippet", m.get("source_tool", "")),
+            "tags": m.get("tags", []),
+            "created_at": m["created_at"],
+            "score": m.get("score", 0),
+        }
+        for m in memories
+    ]
+
+
+def _join_sections(sections: Dict[str, bytes]) -> Dict[str, Any]:
+    """Payload from the decrypted sections of a sectioned blob."""
+    payload = decode_payload(sections[CARD_SECTION])
+    if RAW_SECTION in sections:
+        payload["raw_session"] = decode_payload(sections[RAW_SECTION])
+    return payload
+
+
+def _decrypt_artifact(encrypted_blob: bytes, trace: Trace) -> Tuple[str, str, Dict[str, Any]]:
+    """Decrypt and parse a blob: (plaintext_sha256, ciphertext_sha256, payload)."""
+    started = time.perf_counter()
+    ciphertext_sha256 = hashlib.sha256(encrypted_blob).hexdigest()
+    hash_seconds = time.perf_counter() - started
+
+    with trace.stage("decrypt"):
+        sections = None
+        if is_sectioned(encrypted_blob):
+            try:
+                sections = decrypt_sections(encrypted_blob)
+            except EncryptionError:
+                pass  # a legacy blob whose random nonce starts like the magic, or tampered
+        if sections is None:
+            plaintext = decrypt_blob(encrypted_blob)
+    trace.add_bytes("decrypt", len(encrypted_blob))
+
+    started = time.perf_counter()
+    if sections is not None:
+        plaintext_sha256 = hashlib.sha256(b"".join(sections.values())).hexdigest()
+    else:
+        plaintext_sha256 = hashlib.sha256(plaintext).hexdigest()
+    trace.record("hash", hash_seconds + time.perf_counter() - started)
+
+    with trace.stage("parse"):
+        payload = _join_sections(sections) if sections is not None else decode_payload(plaintext)
+    return plaintext_sha256, ciphertext_sha256, payload
+
+
+def _read_card_sections(cascade_uri: str) -> Optional[Tuple[int, Dict[str, bytes]]]:
+    """Read and decrypt only the card section of a sectioned blob.
+
+    Three ranged reads (header, TOC, card), whatever the raw session's size.
+
+    Returns:
+        (bytes read, {CARD_SECTION: plaintext}), or None if the blob is not
+        sectioned (or does not authenticate as one; the full read decides)
+    """
+    header = cascade.get_range(cascade_uri, 0, SECTION_HEADER_SIZE)
+    if not is_sectioned(header):
+        return None
+    bytes_read = [len(header)]
+
+    def read(offset: int, length: int) -> bytes:
+        chunk = cascade.get_range(cascade_uri, offset, length)
+        bytes_read[0] += len(chunk)
+        return chunk
+
     try:
-        cascade_uri = args["cascade_uri"]
-        mode = args.get("mode", "mock")
+        sections = read_sections(read, [CARD_SECTION], header=header)
+    except EncryptionError:
+        return None
+    return bytes_read[0], sections
 
-        # Check live mode
-        if mode == "live":
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "ok": False,
-                        "error": "Live Cascade mode not yet implemented. Missing: CASCADE_API_ENDPOINT and CASCADE_API_KEY environment variables. Use mode=mock for now.",
-                    }),
-                )
-            ]
 
-        # Step 1: Fetch encrypted blob from Cascade
-        try:
+def _fetch_artifact(
+    cascade_uri: str, card_only: bool, trace: Trace
+) -> Tuple[int, Union[bytes, Dict[str, bytes]]]:
+    """Fetch what a retrieval needs: (bytes read, whole blob or decrypted card section).
+
+    A card read through ranged reads is timed as "get" including the card
+    section's decryption.
+    """
+    with trace.stage("get"):
+        fetched = _read_card_sections(cascade_uri) if card_only else None
+        if fetched is not None:
+            trace.count("card_sections_read")
+        else:
             encrypted_blob = cascade.get(cascade_uri)
-        except NotFoundError:
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "ok": False,
-                        "error": f"Cascade URI not found: {cascade_uri}",
-                    }),
-                )
-            ]
-        except ValidationError as e:
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "ok": False,
-                        "error": f"Invalid Cascade URI: {str(e)}",
-                    }),
-                )
-            ]
+            fetched = len(encrypted_blob), encrypted_blob
+    trace.add_bytes("get", fetched[0])
+    return fetched
 
-        # Step 2: Decrypt and verify
-        try:
-            plaintext = decrypt_blob(encrypted_blob)
-            plaintext_sha256 = hashlib.sha256(plaintext).hexdigest()
-            ciphertext_sha256 = hashlib.sha256(encrypted_blob).hexdigest()
-            artifact_payload = json.loads(plaintext.decode("utf-8"))
-        except EncryptionError as e:
-            return [
-                TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "ok": False,
-                        "error": f"Decryption failed: {str(e)}",
-                    }),
-                )
-            ]
 
-        # Step 3: Extract artifact type and build result
-        artifact_type = artifact_payload.get("artifact_type", "artifact_only")
+def _fetch_failure(cascade_uri: str, e: Exception) -> Dict[str, Any]:
+    """Response for a pointer whose blob could not be fetched."""
+    if isinstance(e, NotFoundError):
+        return {"ok": False, "error": f"Cascade URI not found: {cascade_uri}"}
+    if isinstance(e, ValidationError):
+        return {"ok": False, "error": f"Invalid Cascade URI: {str(e)}"}
+    return {"ok": False, "error": f"Retrieval failed: {str(e)}"}
+
+
+def _indexed_memories(cascade_uris: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Index entries of pointers (None for pointers not in the index)."""
+    return {cascade_uri: index.get_memory_by_pointer(cascade_uri) for cascade_uri in cascade_uris}
+
 
-        result = {
+def _card_from_index(
+    cascade_uri: str, memory: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """card_only response served from the index, or None if it has no card copy.
+
+    Every store indexes the memory card and redaction report it uploads, so
+    reading them back needs neither a Cascade fetch nor a decryption. Tags
+    are the index's, which include tags merged in by later near-duplicates.
+    """
+    if memory is None:
+        return None
+    metadata = memory["metadata"]
+    if "memory_card" not in metadata or "redaction_report" not in metadata:
+        return None
+    artifact = {
+        "artifact_type": memory["artifact_type"],
+        "session_id": memory["source_session_id"],
+        "memory_card": metadata["memory_card"],
+        "redaction_report": metadata["redaction_report"],
+        "tags": memory["tags"],
+    }
+    for key in ("timestamp", "card_version", "previous_pointer"):
+        if key in metadata:
+            artifact[key] = metadata[key]
+    return {
+        "ok": True,
+        "cascade_uri": cascade_uri,
+        "artifact_type": memory["artifact_type"],
+        "artifact": artifact,
+        "source": "index",
+        "crypto": {
+            "verified": False,  # nothing decrypted
+            "ciphertext_sha256": memory["content_hash"],
+        },
+    }
+
+
+async def _open_blob(
+    cascade_uri: str,
+    fetched: Union[bytes, Dict[str, bytes]],
+    memory: Optional[Dict[str, Any]],
+    card_only: bool,
+    trace: Trace,
+) -> Dict[str, Any]:
+    """Decrypt and verify a fetched blob (on the query pool) into a retrieve response.
+
+    Args:
+        cascade_uri: Pointer the blob was fetched from
+        fetched: Blob from Cascade, or the card section read from it (see
+            _fetch_artifact; sections are authenticated on their own, the
+            whole blob is not hashed)
+        memory: Index entry of the pointer; its content_hash must match the blob
+        card_only: Leave raw_session out of the response
+        trace: Trace of the retrieve call
+    """
+    if isinstance(fetched, dict):
+        with trace.stage("parse"):
+            artifact_payload = _join_sections(fetched)
+        return {
             "ok": True,
             "cascade_uri": cascade_uri,
-            "artifact_type": artifact_type,
-            "artifact": artifact_payload,  # Full artifact (includes memory_card, redaction_report, etc.)
+            "artifact_type": artifact_payload.get("artifact_type", "artifact_only"),
+            "artifact": artifact_payload,
+            "source": "cascade",
             "crypto": {
                 "verified": True,
-                "plaintext_sha256": plaintext_sha256,
-                "ciphertext_sha256": ciphertext_sha256,
+                "sections": {
+                    name: hashlib.sha256(plaintext).hexdigest()
+                    for name, plaintext in fetched.items()
+                },
                 "key_id": "env:LUMERA_MEMORY_KEY",
             },
         }
 
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps(result),
-            )
-        ]
+    encrypted_blob = fetched
+    try:
+        plaintext_sha256, ciphertext_sha256, artifact_payload = await executors.run_query(
+            _decrypt_artifact, encrypted_blob, trace
+        )
+    except EncryptionError as e:
+        return {"ok": False, "error": f"Decryption failed: {str(e)}"}
+    if memory is not None and memory["content_hash"] != ciphertext_sha256:
+        return {
+            "ok": False,
+            "error": f"Integrity check failed: blob sha256 {ciphertext_sha256} does not match "
+            f"indexed content_hash {memory['content_hash']}",
+        }
+    if card_only:
+        artifact_payload.pop("raw_session", None)
+
+    return {
+        "ok": True,
+        "cascade_uri": cascade_uri,
+        "artifact_type": artifact_payload.get("artifact_type", "artifact_only"),
+        # Full artifact (includes memory_card, redaction_report, etc.)
+        "artifact": artifact_payload,
+        "source": "cascade",
+        "crypto": {
+            "verified": True,
+            "plaintext_sha256": plaintext_sha256,
+            "ciphertext_sha256": ciphertext_sha256,
+            "key_id": "env:LUMERA_MEMORY_KEY",
+        },
+    }
+
+
+async def _retrieve_session(
+    args: Dict[str, Any], ticket: Optional[Ticket] = None
+) -> List[TextContent]:
+    """Retrieve and decrypt session from Cascade (card_only: from the index if possible).
+
+    Concurrent retrievals of the same pointer share one fetch and decryption.
+    """
+    trace = metrics.trace("retrieve")
+    try:
+        cascade_uri = args["cascade_uri"]
+        mode = args.get("mode", "mock")
+        card_only = bool(args.get("card_only", False))
+
+        # Check live mode
+        if mode == "live":
+            return _traced(trace, {"ok": False, "error": LIVE_MODE_ERROR})
+
+        (result, fetched_bytes), joined = await flights.do(
+            flight_key("retrieve", cascade_uri=cascade_uri, card_only=card_only),
+            _retrieve_one, cascade_uri, card_only,
+        )
+        # Every caller of the flight holds the result: charge it to each
+        if ticket is not None:
+            ticket.charge(fetched_bytes)
+        if joined:
+            trace.count("coalesced")
+        if result.get("source") == "index":
+            trace.count("served_from_index")
+        return _traced(trace, result)
 
     except Exception as e:
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
+        return _traced(trace, {
+            "ok": False,
+            "error": f"Retrieval failed: {str(e)}",
+        })
+
+
+async def _retrieve_one(cascade_uri: str, card_only: bool) -> Tuple[Dict[str, Any], int]:
+    """Retrieve response of one pointer and the bytes fetched for it.
+
+    Shared by the coalesced callers of a flight, so it holds none of their
+    state: its stages are timed on a trace of its own, and each caller
+    charges the fetched bytes to its own admission ticket.
+    """
+    trace = metrics.trace("retrieve")
+    # Step 1: Index entry (a card_only request is answered from it when it can be)
+    memories = await executors.run_query(_timed, trace, "lookup", _indexed_memories, [cascade_uri])
+    memory = memories[cascade_uri]
+    result = _card_from_index(cascade_uri, memory) if card_only else None
+    if result is not None:
+        return result, 0
+
+    # Step 2: Fetch encrypted blob (card_only: just its card section) from Cascade
+    try:
+        fetched_bytes, fetched = await executors.run_query(
+            _fetch_artifact, cascade_uri, card_only, trace
+        )
+    except (NotFoundError, ValidationError) as e:
+        return _fetch_failure(cascade_uri, e), 0
+
+    # Step 3: Decrypt, verify against the index and build result
+    return await _open_blob(cascade_uri, fetched, memory, card_only, trace), fetched_bytes
+
+
+async def _retrieve_sessions(
+    args: Dict[str, Any], ticket: Optional[Ticket] = None
+) -> List[TextContent]:
+    """Retrieve and decrypt many sessions from Cascade concurrently.
+
+    Every pointer's fetch starts at once on the query pool, and each blob is
+    decrypted as soon as it arrives, so the call takes about as long as the
+    slowest retrieval instead of the sum of all of them. Blobs are counted
+    against max_total_bytes in input order: from the first blob that does
+    not fit, the remaining fetches are cancelled and their pointers skipped.
+    With card_only, pointers whose card the index holds are answered from it
+    and fetch nothing. Fetched bytes are charged to ticket (the call's
+    admission).
+    """
+    trace = metrics.trace("retrieve_batch")
+    try:
+        cascade_uris = args["cascade_uris"]
+        max_total_bytes = args.get("max_total_bytes")
+        mode = args.get("mode", "mock")
+        card_only = args.get("card_only", False)
+
+        error = None
+        if mode == "live":
+            error = LIVE_MODE_ERROR
+        elif len(cascade_uris) > MAX_BATCH_RETRIEVE:
+            error = f"Too many pointers: {len(cascade_uris)} (max {MAX_BATCH_RETRIEVE} per call)"
+        elif max_total_bytes is not None and (
+            not isinstance(max_total_bytes, int)
+            or isinstance(max_total_bytes, bool)
+            or max_total_bytes < 0
+        ):
+            error = f"max_total_bytes must be a non-negative integer, got {max_total_bytes!r}"
+        if error is not None:
+            return _traced(trace, {"ok": False, "error": error})
+
+        memories = await executors.run_query(
+            _timed, trace, "lookup", _indexed_memories, list(dict.fromkeys(cascade_uris))
+        )
+        results: List[Optional[Dict[str, Any]]] = [None] * len(cascade_uris)
+        if card_only:
+            for position, cascade_uri in enumerate(cascade_uris):
+                results[position] = _card_from_index(cascade_uri, memories[cascade_uri])
+            trace.count("served_from_index", sum(1 for result in results if result is not None))
+
+        # One fetch per distinct pointer not answered from the index
+        fetches: Dict[str, asyncio.Future] = {}
+        for cascade_uri, result in zip(cascade_uris, results):
+            if result is None and cascade_uri not in fetches:
+                fetches[cascade_uri] = asyncio.ensure_future(
+                    executors.run_query(_fetch_artifact, cascade_uri, card_only, trace)
+                )
+
+        opening: Dict[int, asyncio.Future] = {}
+        total_bytes = 0
+        exhausted = False
+        for position, cascade_uri in enumerate(cascade_uris):
+            if results[position] is not None:
+                continue
+            if exhausted:
+                results[position] = {"ok": False, "skipped": True, "error": "Byte budget exhausted"}
+                continue
+            try:
+                fetched_bytes, fetched = await fetches[cascade_uri]
+            except Exception as e:
+                results[position] = _fetch_failure(cascade_uri, e)
+                continue
+            if max_total_bytes is not None and total_bytes + fetched_bytes > max_total_bytes:
+                exhausted = True
+                for fetch in fetches.values():
+                    fetch.cancel()
+                results[position] = {
                     "ok": False,
-                    "error": f"Retrieval failed: {str(e)}",
-                }),
+                    "skipped": True,
+                    "error": f"Byte budget exhausted: {fetched_bytes} bytes would exceed "
+                    f"max_total_bytes={max_total_bytes} ({total_bytes} used)",
+                }
+                continue
+            total_bytes += fetched_bytes
+            if ticket is not None:
+                ticket.charge(fetched_bytes)
+            opening[position] = asyncio.ensure_future(
+                _open_blob(cascade_uri, fetched, memories[cascade_uri], card_only, trace)
             )
-        ]
+
+        # Collect cancelled and failed fetches that were not awaited above
+        await asyncio.gather(*fetches.values(), return_exceptions=True)
+        for position, result in zip(
+            opening, await asyncio.gather(*opening.values(), return_exceptions=True)
+        ):
+            if isinstance(result, Exception):
+                result = {"ok": False, "error": f"Retrieval failed: {str(result)}"}
+            results[position] = result
+
+        for cascade_uri, result in zip(cascade_uris, results):
+            result.setdefault("cascade_uri", cascade_uri)
+
+        return _traced(trace, {
+            "ok": True,
+            "results": results,
+            "retrieved": sum(1 for r in results if r["ok"]),
+            "skipped": sum(1 for r in results if r.get("skipped")),
+            "failed": sum(1 for r in results if not r["ok"] and not r.get("skipped")),
+            "total_bytes": total_bytes,
+        })
+
+    except Exception as e:
+        return _traced(trace, {
+            "ok": False,
+            "error": f"Retrieval failed: {str(e)}",
+        })
 
 
 async def _estimate_cost(args: Dict[str, Any]) -> List[TextContent]:
@@ -530,12 +1625,63 @@ async def _estimate_cost(args: Dict[str, Any]) -> List[TextContent]:
         ]
 
 
-if __name__ == "__main__":
-    import asyncio
+async def _get_metrics(args: Dict[str, Any]) -> List[TextContent]:
+    """Report server metrics (and rewrite the Prometheus file, if configured)."""
+    try:
+        snapshot = metrics.snapshot(include_buckets=args.get("include_buckets", False))
+        if METRICS_FILE is not None:
+            await _dump_metrics(force=True)
+        if args.get("reset", False):
+            metrics.reset()
+
+        return [
+            TextContent(
+                type="text",
+                text=json.dumps({
+                    "ok": True,
+                    **snapshot,
+                    "prometheus_file": METRICS_FILE,
+                }),
+            )
+        ]
+
+    except Exception as e:
+        return [
+            TextContent(
+                type="text",
+                text=json.dumps({
+                    "ok": False,
+                    "error": f"Metrics failed: {str(e)}",
+                }),
+            )
+        ]
+
+
+async def _dump_metrics(force: bool = False):
+    """Rewrite METRICS_FILE if set and METRICS_DUMP_INTERVAL has passed since the last write."""
+    global _metrics_dumped_at
+    if METRICS_FILE is None:
+        return
+    now = time.monotonic()
+    if not force and now - _metrics_dumped_at < METRICS_DUMP_INTERVAL:
+        return
+    _metrics_dumped_at = now
+    try:
+        await executors.run_io(metrics.write_prometheus, METRICS_FILE)
+    except OSError:
+        pass  # a missing or read-only target must not fail tool calls
+
+
+def main():
+    """Serve one MCP session over this process's stdio (see src.daemon for a shared server)."""
     from mcp.server.stdio import stdio_server
 
-    async def main():
+    async def run():
         async with stdio_server() as (read_stream, write_stream):
             await app.run(read_stream, write_stream, app.create_initialization_options())
 
-    asyncio.run(main())
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
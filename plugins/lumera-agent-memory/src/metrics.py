@@ -0,0 +1,341 @@
+"""Low-overhead instrumentation: per-stage latency histograms and counters.
+
+A tool call opens a Trace for its operation ("store", "retrieve", ...) and
+times its stages (export, redact, encrypt, get, decrypt, ...) with
+trace.stage(name). Latencies go into fixed-bucket histograms, one per
+(operation, stage): recording one is a bisect and three additions under a
+lock, and memory does not grow with traffic. Batch calls share one trace
+across their items, so their stage histograms count items and their "total"
+counts calls.
+
+Only latencies are sampled: with sample_rate < 1, a call is timed or not as
+a whole, and an untimed call's stages cost a method call that returns a
+shared no-op context. Bytes processed and event counters (cache hits, where
+a retrieval was served from) are cheap and always exact. Stats that other
+components already keep (memos, caches, the priority gate) are read at
+snapshot time through collectors.
+
+snapshot() returns everything as a dict (the get_memory_metrics tool);
+prometheus_text() renders the Prometheus text exposition format, e.g. for
+node_exporter's textfile collector via write_prometheus().
+"""
+
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Upper bounds (ms) of the latency buckets; a last bucket catches the rest
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (ms). Not locked; Metrics locks it."""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect_left(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.sum += value_ms
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile (ms), interpolating within its bucket (clamped to min..max)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(estimate, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def snapshot(self, include_buckets: bool = False) -> Dict[str, Any]:
+        """Count, sum, mean, min, max and estimated p50/p95/p99 (ms)."""
+        result = {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "mean_ms": round(self.sum / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "max_ms": round(self.max, 3),
+        }
+        if include_buckets:
+            # Per bucket, not cumulative; keys are upper bounds
+            labels = [_format_bound(bound) for bound in self.bounds] + ["+Inf"]
+            result["buckets"] = dict(zip(labels, self.counts))
+        return result
+
+
+def _format_bound(value: float) -> str:
+    return f"{value:g}"
+
+
+class _StageTimer:
+    """Context that records the time spent inside it as one stage latency."""
+
+    __slots__ = ("_metrics", "_key", "_started")
+
+    def __init__(self, metrics: "Metrics", key: Tuple[str, str]):
+        self._metrics = metrics
+        self._key = key
+
+    def __enter__(self) -> "_StageTimer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self._metrics._observe(self._key, (time.perf_counter() - self._started) * 1000)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Trace:
+    """Stage timings and counters of one tool call (shared by a batch's items)."""
+
+    __slots__ = ("metrics", "operation", "sampled", "started")
+
+    def __init__(self, metrics: "Metrics", operation: str, sampled: bool):
+        self.metrics = metrics
+        self.operation = operation
+        self.sampled = sampled
+        self.started = time.perf_counter()
+
+    def stage(self, name: str):
+        """Context manager timing one stage (a no-op when the call is not sampled)."""
+        if not self.sampled:
+            return _NULL_TIMER
+        return _StageTimer(self.metrics, (self.operation, name))
+
+    def record(self, name: str, seconds: float):
+        """Record a stage latency measured elsewhere (e.g. in a worker process)."""
+        if self.sampled:
+            self.metrics._observe((self.operation, name), seconds * 1000)
+
+    def add_bytes(self, name: str, nbytes: int):
+        """Count bytes a stage processed."""
+        self.metrics.add_bytes(self.operation, name, nbytes)
+
+    def count(self, event: str, n: int = 1):
+        """Count an event of this operation (e.g. a cache hit)."""
+        self.metrics.count(self.operation, event, n)
+
+    def finish(self, ok: bool = True):
+        """Record the call's total latency and outcome."""
+        if self.sampled:
+            self.metrics._observe(
+                (self.operation, "total"), (time.perf_counter() - self.started) * 1000
+            )
+        self.metrics.count(self.operation, "ok" if ok else "error")
+
+
+class Metrics:
+    """Thread-safe registry of stage histograms, byte and event counters."""
+
+    def __init__(self, sample_rate: float = 1.0, buckets_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        """Initialize registry.
+
+        Args:
+            sample_rate: Fraction of calls whose stages are timed (0: none)
+            buckets_ms: Upper bounds of the latency buckets (ms, ascending)
+        """
+        self.sample_rate = sample_rate
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._bytes: Dict[Tuple[str, str], int] = {}
+        self._events: Dict[Tuple[str, str], int] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self.started = time.time()
+
+    def trace(self, operation: str) -> Trace:
+        """Open a trace for one call, sampled at sample_rate."""
+        rate = self.sample_rate
+        sampled = rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+        return Trace(self, operation, sampled)
+
+    def _observe(self, key: Tuple[str, str], value_ms: float):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets_ms)
+            histogram.observe(value_ms)
+
+    def add_bytes(self, operation: str, stage: str, nbytes: int):
+        """Count bytes processed by a stage."""
+        key = (operation, stage)
+        with self._lock:
+            self._bytes[key] = self._bytes.get(key, 0) + nbytes
+
+    def count(self, operation: str, event: str, n: int = 1):
+        """Count an event of an operation."""
+        key = (operation, event)
+        with self._lock:
+            self._events[key] = self._events.get(key, 0) + n
+
+    def add_collector(self, name: str, collect: Callable[[], Dict[str, Any]]):
+        """Include stats kept elsewhere in snapshots.
+
+        Args:
+            name: Section name in snapshots (and Prometheus metric prefix)
+            collect: Returns {field: number} or {key: {field: number}}
+                (e.g. per-rule stats); called on every snapshot
+        """
+        self._collectors[name] = collect
+
+    def snapshot(self, include_buckets: bool = False) -> Dict[str, Any]:
+        """All metrics as a JSON-serializable dict.
+
+        Args:
+            include_buckets: Add per-bucket counts to each histogram
+        """
+        with self._lock:
+            latency: Dict[str, Dict[str, Any]] = {}
+            for (operation, stage), histogram in sorted(self._histograms.items()):
+                latency.setdefault(operation, {})[stage] = histogram.snapshot(include_buckets)
+            processed: Dict[str, Dict[str, int]] = {}
+            for (operation, stage), nbytes in sorted(self._bytes.items()):
+                processed.setdefault(operation, {})[stage] = nbytes
+            events: Dict[str, Dict[str, int]] = {}
+            for (operation, event), n in sorted(self._events.items()):
+                events.setdefault(operation, {})[event] = n
+        return {
+            "uptime_s": round(time.time() - self.started, 3),
+            "sample_rate": self.sample_rate,
+            "latency_ms": latency,
+            "bytes": processed,
+            "events": events,
+            **{name: collect() for name, collect in self._collectors.items()},
+        }
+
+    def prometheus_text(self) -> str:
+        """Metrics in the Prometheus text exposition format (latencies in seconds)."""
+        lines: List[str] = []
+        with self._lock:
+            histograms = sorted(
+                (key, list(h.counts), h.count, h.sum) for key, h in self._histograms.items()
+            )
+            processed = sorted(self._bytes.items())
+            events = sorted(self._events.items())
+
+        lines.append("# HELP lumera_stage_latency_seconds Latency of tool call stages (sampled)")
+        lines.append("# TYPE lumera_stage_latency_seconds histogram")
+        for (operation, stage), counts, count, total in histograms:
+            labels = f'operation="{operation}",stage="{stage}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets_ms, counts):
+                cumulative += bucket_count
+                le = _format_bound(bound / 1000)
+                lines.append(
+                    f'lumera_stage_latency_seconds_bucket{{{labels},le="{le}"}} {cumulative}'
+                )
+            lines.append(f'lumera_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"lumera_stage_latency_seconds_sum{{{labels}}} {total / 1000:.6f}")
+            lines.append(f"lumera_stage_latency_seconds_count{{{labels}}} {count}")
+
+        lines.append("# HELP lumera_stage_bytes_total Bytes processed by tool call stages")
+        lines.append("# TYPE lumera_stage_bytes_total counter")
+        for (operation, stage), nbytes in processed:
+            lines.append(
+                f'lumera_stage_bytes_total{{operation="{operation}",stage="{stage}"}} {nbytes}'
+            )
+
+        lines.append("# HELP lumera_events_total Tool call outcomes and events")
+        lines.append("# TYPE lumera_events_total counter")
+        for (operation, event), n in events:
+            lines.append(f'lumera_events_total{{operation="{operation}",event="{event}"}} {n}')
+
+        for name, collect in self._collectors.items():
+            lines.extend(_collector_lines(name, collect()))
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: os.PathLike):
+        """Write prometheus_text() to path atomically (write, then rename)."""
+        path = os.fspath(path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        """Zero histograms and counters (collected stats belong to their owners)."""
+        with self._lock:
+            self._histograms.clear()
+            self._bytes.clear()
+            self._events.clear()
+            self.started = time.time()
+
+
+def _collector_lines(name: str, stats: Dict[str, Any]) -> List[str]:
+    """Gauges for a collector's numeric fields; nested dicts become a "key" label."""
+    families: Dict[str, List[str]] = {}
+    for field, value in sorted(stats.items()):
+        if isinstance(value, dict):
+            for inner, inner_value in sorted(value.items()):
+                if _is_number(inner_value):
+                    families.setdefault(f"lumera_{name}_{inner}", []).append(
+                        f'{{key="{field}"}} {inner_value}'
+                    )
+        elif _is_number(value):
+            families.setdefault(f"lumera_{name}_{field}", []).append(f" {value}")
+    # One contiguous block per metric, as the format requires
+    lines = []
+    for metric, samples in families.items():
+        lines.append(f"# TYPE {metric} gauge")
+        lines.extend(metric + sample for sample in samples)
+    return lines
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
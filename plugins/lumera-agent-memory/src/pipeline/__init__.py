@@ -0,0 +1,43 @@
+"""Batch execution for the store pipeline.
+
+Parallel derivation, derivation cache, staged runs, executors, payload
+codecs, request coalescing and admission control.
+"""
+
+from .admission import AdmissionController, AdmissionRejected, Ticket
+from .cache import DerivationCache, session_digest
+from .codec import (
+    PayloadCodec,
+    available_codecs,
+    decode_payload,
+    default_codec,
+    encode_payload,
+    register_codec,
+)
+from .executors import ExecutionLayer, PriorityGate
+from .parallel import derive_session, derive_sessions
+from .singleflight import SingleFlight, flight_key
+from .stages import Stage, StageFailure, run_stages
+
+__all__ = [
+    "DerivationCache",
+    "session_digest",
+    "derive_session",
+    "derive_sessions",
+    "ExecutionLayer",
+    "PriorityGate",
+    "Stage",
+    "StageFailure",
+    "run_stages",
+    "PayloadCodec",
+    "available_codecs",
+    "decode_payload",
+    "default_codec",
+    "encode_payload",
+    "register_codec",
+    "SingleFlight",
+    "flight_key",
+    "AdmissionController",
+    "AdmissionRejected",
+    "Ticket",
+]
@@ -0,0 +1,251 @@
+"""Admission control: bounded concurrency and bytes in flight per tool.
+
+Nothing else bounds how many tool calls run at once. Each store holds
+several copies of its session (export, redacted copy, encoded payload,
+ciphertext), so a burst of stores can exhaust memory, and it competes with
+queries for the pools. An AdmissionController admits a call only while:
+- fewer than its tool's limit of calls of that tool are in flight, and
+- for tools that hold payloads, the bytes charged by calls in flight are
+  under max_bytes
+
+Other calls wait in one bounded FIFO queue. A call is rejected at once when
+the queue is full, or when its deadline passes while it waits, with a
+retry-after hint derived from how long calls of its tool recently took.
+Waiters of different tools do not block each other: a query is admitted as
+soon as query capacity frees up, whatever stores are waiting.
+
+Bytes are charged once they are known (a store charges its session after
+exporting it) and returned when the call ends. A call is never blocked
+after admission, so the budget can be exceeded by what admitted calls
+charge; it holds further calls back until they finish. Admission and
+release run on the event loop; charge() may be called from worker threads,
+and charges that arrive after release are dropped.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+# Service time assumed for the retry-after hint before a tool's first call ends
+DEFAULT_SERVICE_SECONDS = 1.0
+# Bounds of the retry-after hint (seconds)
+MIN_RETRY_AFTER = 0.05
+MAX_RETRY_AFTER = 60.0
+
+
+class AdmissionRejected(Exception):
+    """Raised when a call is not admitted (queue full or waited too long)."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """An admitted call: holds its tool's slot and the bytes it charged until released."""
+
+    __slots__ = ("_controller", "tool", "bytes", "admitted_at", "_released")
+
+    def __init__(self, controller: Optional["AdmissionController"], tool: str):
+        self._controller = controller
+        self.tool = tool
+        self.bytes = 0
+        self.admitted_at = time.monotonic()
+        self._released = False
+
+    def charge(self, nbytes: int):
+        """Count nbytes held by this call against the byte budget (thread-safe).
+
+        Does nothing once the ticket is released: a step still running in a
+        worker thread after its call was cancelled must not leak bytes.
+        """
+        if self._controller is not None:
+            self._controller._charge(self, nbytes)
+
+    def release(self):
+        """Give back the slot and bytes (idempotent)."""
+        if self._controller is not None:
+            self._controller._release(self)
+
+
+class AdmissionController:
+    """Per-tool in-flight limits and a byte budget, with a bounded wait queue."""
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        max_bytes: int = 0,
+        byte_tools: Iterable[str] = (),
+        queue_size: int = 64,
+        max_wait: float = 5.0,
+    ):
+        """Initialize controller.
+
+        Args:
+            limits: Tool name -> calls in flight at most (0: unlimited);
+                tools not listed are admitted at once and not counted
+            max_bytes: Budget of bytes charged by calls in flight (0: none)
+            byte_tools: Tools that wait for the byte budget (those holding
+                payloads; reads of the index should not wait behind stores)
+            queue_size: Calls that may wait at once (0: reject instead of waiting)
+            max_wait: Seconds a call waits before it is rejected
+        """
+        self.limits = dict(limits)
+        self.max_bytes = max_bytes
+        self.byte_tools = frozenset(byte_tools)
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self._in_flight: Dict[str, int] = {tool: 0 for tool in self.limits}
+        self._bytes = 0
+        self._bytes_lock = threading.Lock()
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+        # Smoothed call duration per tool (retry-after hints)
+        self._service_seconds: Dict[str, float] = {}
+        # Stats
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def bytes_in_flight(self) -> int:
+        return self._bytes
+
+    def queue_depth(self) -> int:
+        """Calls waiting for admission."""
+        return len(self._waiters)
+
+    def _has_room(self, tool: str) -> bool:
+        limit = self.limits[tool]
+        if limit and self._in_flight[tool] >= limit:
+            return False
+        return not (self.max_bytes and tool in self.byte_tools and self._bytes >= self.max_bytes)
+
+    def _admit(self, tool: str) -> Ticket:
+        self._in_flight[tool] += 1
+        self.admitted += 1
+        return Ticket(self, tool)
+
+    async def admit(self, tool: str) -> Ticket:
+        """Admit a call of tool, waiting in the queue if needed.
+
+        Returns:
+            Ticket to release when the call ends
+
+        Raises:
+            AdmissionRejected: If the queue is full or max_wait passed
+        """
+        if tool not in self.limits:
+            return Ticket(None, tool)
+        # Earlier waiters of the same tool go first
+        if self._has_room(tool) and not any(waiting == tool for waiting, _ in self._waiters):
+            return self._admit(tool)
+        if len(self._waiters) >= self.queue_size:
+            self.rejected_full += 1
+            raise AdmissionRejected(
+                f"Server busy: {self._busy_reason(tool)} and {len(self._waiters)} calls queued",
+                self.retry_after(tool),
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (tool, waiter)
+        self._waiters.append(entry)
+        self.queued += 1
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted as the deadline passed
+                return waiter.result()
+            self.rejected_timeout += 1
+            raise AdmissionRejected(
+                f"Server busy: waited {self.max_wait:g}s for admission ({self._busy_reason(tool)})",
+                self.retry_after(tool),
+            )
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                waiter.result().release()
+            raise
+        finally:
+            self.wait_seconds += time.monotonic() - started
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+            if not waiter.done():
+                waiter.cancel()
+
+    def _busy_reason(self, tool: str) -> str:
+        limit = self.limits[tool]
+        if limit and self._in_flight[tool] >= limit:
+            return f"{self._in_flight[tool]} {tool} calls in flight (limit {limit})"
+        return f"{self._bytes} bytes in flight (limit {self.max_bytes})"
+
+    def retry_after(self, tool: str) -> float:
+        """Seconds after which a call of tool has a fair chance of admission.
+
+        Roughly the time the calls ahead of it need: recent call duration
+        times the rounds of its tool's limit that the queue holds.
+        """
+        service = self._service_seconds.get(tool, DEFAULT_SERVICE_SECONDS)
+        ahead = sum(1 for waiting, _ in self._waiters if waiting == tool) + 1
+        rounds = math.ceil(ahead / self.limits[tool]) if self.limits.get(tool) else 1
+        return round(min(max(service * rounds, MIN_RETRY_AFTER), MAX_RETRY_AFTER), 3)
+
+    def _charge(self, ticket: Ticket, nbytes: int):
+        with self._bytes_lock:
+            if ticket._released:
+                return
+            ticket.bytes += nbytes
+            self._bytes += nbytes
+
+    def _release(self, ticket: Ticket):
+        with self._bytes_lock:
+            if ticket._released:
+                return
+            ticket._released = True
+            self._bytes -= ticket.bytes
+        self._in_flight[ticket.tool] -= 1
+        elapsed = time.monotonic() - ticket.admitted_at
+        previous = self._service_seconds.get(ticket.tool)
+        self._service_seconds[ticket.tool] = (
+            elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+        )
+        self._wake()
+
+    def _wake(self):
+        """Admit waiters that now fit, in queue order."""
+        blocked = set()
+        for tool, waiter in list(self._waiters):
+            if waiter.done() or tool in blocked:
+                continue
+            if self._has_room(tool):
+                waiter.set_result(self._admit(tool))
+                self._waiters.remove((tool, waiter))
+            else:
+                # Keeps FIFO order within a tool
+                blocked.add(tool)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, bytes in flight, admission outcomes and per-tool load."""
+        stats: Dict[str, Any] = {
+            "queue_depth": len(self._waiters),
+            "queue_size": self.queue_size,
+            "bytes_in_flight": self._bytes,
+            "max_bytes": self.max_bytes,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "wait_ms": round(self.wait_seconds * 1000, 3),
+        }
+        for tool, limit in self.limits.items():
+            stats[tool] = {
+                "in_flight": self._in_flight[tool],
+                "limit": limit,
+                "queued": sum(1 for waiting, _ in self._waiters if waiting == tool),
+            }
+        return stats
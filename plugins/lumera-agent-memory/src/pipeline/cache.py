@@ -0,0 +1,139 @@
+"""Content-hash memo for derived store artifacts.
+
+Agents usually call store_session_to_cascade twice for the same session: a
+dry run to preview, then the real store. Both calls export byte-identical
+session data, so the redacted session, redaction report and memory card are
+memoized under a SHA-256 of the canonical session JSON. Entries expire after
+a TTL and the cache is bounded by total (approximate) bytes, evicting least
+recently used entries first.
+
+Failed derivations (RedactionError) are never cached: a time-budget failure
+depends on machine load, and a CRITICAL hit is cheap to rediscover.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Bump when redaction rules or card extraction change, so stale derivations
+# from a long-lived process are not reused after a hot reload
+DERIVATION_VERSION = "1"
+
+
+def session_digest(session: Dict[str, Any], **params: Any) -> Optional[str]:
+    """SHA-256 of the canonical JSON of session plus derivation params.
+
+    Args:
+        session: Raw session data dict
+        **params: Extra inputs that change the derivation (e.g. allowlist_first)
+
+    Returns:
+        Hex digest, or None if session is not JSON-serializable (not cacheable)
+    """
+    try:
+        canonical = json.dumps(
+            {"v": DERIVATION_VERSION, "session": session, "params": params},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DerivationCache:
+    """Thread-safe LRU cache with per-entry TTL and a total byte bound.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 600.0):
+        """Initialize cache.
+
+        Args:
+            max_bytes: Upper bound on the summed size of cached entries
+            ttl_seconds: Entries older than this are treated as missing
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, key: Optional[Hashable]) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def pop(self, key: Optional[Hashable]) -> Optional[Any]:
+        """Like get(), but removes the entry (for single-use values)."""
+        value = self.get(key)
+        if value is not None:
+            with self._lock:
+                if key in self._entries:
+                    self._drop(key)
+        return value
+
+    def put(self, key: Optional[Hashable], value: Any, size: int):
+        """Cache value under key.
+
+        Args:
+            key: Cache key (None is ignored, for uncacheable inputs)
+            value: Value to cache
+            size: Approximate size of value in bytes
+        """
+        if key is None or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic(), size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evicted += 1
+
+    def _drop(self, key: Hashable):
+        """Remove key (caller holds the lock)."""
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters, size and hit ratio."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Drop all cached entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.hits = self.misses = self.expired = self.evicted = 0
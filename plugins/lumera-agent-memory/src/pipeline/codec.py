@@ -0,0 +1,135 @@
+"""Payload codecs: how a payload dict becomes the plaintext that is encrypted.
+
+Payloads used to be `json.dumps(payload).encode()`: ASCII-escaped JSON,
+slow to produce and parse and bloated by escapes on large raw sessions
+(newlines, quotes, non-ASCII text). Encoded payloads now start with a small
+header naming their codec:
+
+    "LMP" | format version (1 byte) | codec tag (1 byte) | encoded payload
+
+- json (tag 1): compact UTF-8 JSON, always available
+- msgpack (tag 2): binary MessagePack, with the optional `msgpack` package
+
+Plaintext without the header is a legacy payload and is parsed as JSON
+(legacy payloads start with "{", never with the header). More codecs can
+be added with register_codec().
+"""
+
+import json
+from typing import Any, Callable, Dict, List
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without msgpack
+    msgpack = None
+
+PAYLOAD_MAGIC = b"LMP"
+PAYLOAD_FORMAT_VERSION = 1
+PAYLOAD_HEADER_SIZE = len(PAYLOAD_MAGIC) + 2
+
+
+class PayloadCodec:
+    """A named serialization of payload dicts, identified by a one-byte tag."""
+
+    def __init__(
+        self, name: str, tag: int, encode: Callable[[Any], bytes], decode: Callable[[bytes], Any]
+    ):
+        """Initialize codec.
+
+        Args:
+            name: Codec name (LUMERA_PAYLOAD_CODEC)
+            tag: Header byte identifying the codec (1-255, unique)
+            encode: Payload -> bytes
+            decode: Bytes -> payload
+        """
+        self.name = name
+        self.tag = tag
+        self.encode = encode
+        self.decode = decode
+
+
+_CODECS_BY_NAME: Dict[str, PayloadCodec] = {}
+_CODECS_BY_TAG: Dict[int, PayloadCodec] = {}
+
+
+def register_codec(codec: PayloadCodec):
+    """Make a codec available for encoding and decoding.
+
+    Raises:
+        ValueError: If the tag is out of range or taken by another codec
+    """
+    if not 1 <= codec.tag <= 255:
+        raise ValueError(f"Codec tag must be 1-255, got {codec.tag}")
+    existing = _CODECS_BY_TAG.get(codec.tag)
+    if existing is not None and existing.name != codec.name:
+        raise ValueError(f"Codec tag {codec.tag} already used by {existing.name}")
+    _CODECS_BY_NAME[codec.name] = codec
+    _CODECS_BY_TAG[codec.tag] = codec
+
+
+def available_codecs() -> List[str]:
+    """Names of the registered codecs."""
+    return list(_CODECS_BY_NAME)
+
+
+def default_codec() -> str:
+    """Most compact available codec: msgpack if installed, else json."""
+    return "msgpack" if "msgpack" in _CODECS_BY_NAME else "json"
+
+
+def encode_payload(payload: Any, codec: str = "json") -> bytes:
+    """Serialize a payload with a codec header.
+
+    Args:
+        payload: JSON-compatible payload
+        codec: Registered codec name
+
+    Returns:
+        Header + encoded payload
+
+    Raises:
+        ValueError: If the codec is unknown (or its package is not installed)
+    """
+    if codec not in _CODECS_BY_NAME:
+        raise ValueError(
+            f"Unknown payload codec: {codec} (available: {', '.join(available_codecs())})"
+        )
+    selected = _CODECS_BY_NAME[codec]
+    return PAYLOAD_MAGIC + bytes((PAYLOAD_FORMAT_VERSION, selected.tag)) + selected.encode(payload)
+
+
+def decode_payload(data: bytes) -> Any:
+    """Parse a payload written by encode_payload(), or a legacy JSON payload.
+
+    Raises:
+        ValueError: If the header names an unknown format version or codec
+    """
+    if not data.startswith(PAYLOAD_MAGIC):
+        return json.loads(data.decode("utf-8"))
+    if len(data) < PAYLOAD_HEADER_SIZE or data[len(PAYLOAD_MAGIC)] != PAYLOAD_FORMAT_VERSION:
+        raise ValueError("Unsupported payload format version")
+    tag = data[PAYLOAD_HEADER_SIZE - 1]
+    if tag not in _CODECS_BY_TAG:
+        raise ValueError(f"Unknown payload codec tag: {tag} (is its package installed?)")
+    return _CODECS_BY_TAG[tag].decode(data[PAYLOAD_HEADER_SIZE:])
+
+
+register_codec(
+    PayloadCodec(
+        "json",
+        1,
+        lambda payload: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        ),
+        lambda data: json.loads(data.decode("utf-8")),
+    )
+)
+if msgpack is not None:
+    register_codec(
+        PayloadCodec(
+            "msgpack",
+            2,
+            lambda payload: msgpack.packb(payload, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False),
+        )
+    )
@@ -0,0 +1,145 @@
+"""Execution layer for the MCP server's blocking work.
+
+MCP tool handlers are coroutines on one event loop. A store that exported,
+redacted, encrypted and uploaded inline would freeze every other tool call
+until it finished. ExecutionLayer gives each kind of work its own pool:
+- io: threads for blocking calls that wait (the `cm` export subprocess,
+  Cascade get/put, SQLite writes)
+- cpu: redaction, card generation, SimHash and encryption. Threads by
+  default; with cpu_mode="process", redaction and extraction move to worker
+  processes (see derive_session(executor=...)), off the GIL that the event
+  loop and the query threads need
+- query: threads reserved for read-only tools, so a query never waits in a
+  pool queue behind store work
+
+Read-only tools also get priority over bulk stores through a PriorityGate:
+a store step waits to start CPU work while queries are running (for at most
+bulk_max_wait, so stores cannot starve). Together these keep query latency
+close to idle during store bursts.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Optional
+
+CPU_MODES = ("thread", "process")
+
+
+class PriorityGate:
+    """Lets read-only calls go first: bulk work yields while reads run."""
+
+    def __init__(self, bulk_max_wait: float = 0.25):
+        """Initialize gate.
+
+        Args:
+            bulk_max_wait: Longest a bulk step waits for reads to finish (seconds)
+        """
+        self.bulk_max_wait = bulk_max_wait
+        self.reads = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Stats
+        self.bulk_waits = 0
+        self.bulk_wait_seconds = 0.0
+
+    def _idle_event(self) -> asyncio.Event:
+        """Idle event of the running loop (events are bound to one loop)."""
+        loop = asyncio.get_running_loop()
+        if self._idle is None or self._loop is not loop:
+            self._idle = asyncio.Event()
+            self._loop = loop
+            if self.reads == 0:
+                self._idle.set()
+        return self._idle
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[None]:
+        """Context of one read-only call."""
+        idle = self._idle_event()
+        self.reads += 1
+        idle.clear()
+        try:
+            yield
+        finally:
+            self.reads -= 1
+            if self.reads == 0:
+                idle.set()
+
+    async def bulk_turn(self):
+        """Wait until no read runs (or bulk_max_wait has passed)."""
+        if self.reads == 0:
+            return
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._idle_event().wait(), self.bulk_max_wait)
+        except asyncio.TimeoutError:
+            pass
+        self.bulk_waits += 1
+        self.bulk_wait_seconds += time.perf_counter() - started
+
+
+class ExecutionLayer:
+    """Thread/process pools for blocking work, with reads ahead of bulk stores."""
+
+    def __init__(
+        self,
+        io_workers: int = 8,
+        cpu_workers: int = 2,
+        cpu_mode: str = "thread",
+        query_workers: int = 4,
+        bulk_max_wait: float = 0.25,
+    ):
+        """Initialize pools (processes start on first use).
+
+        Args:
+            io_workers: Threads for blocking I/O
+            cpu_workers: CPU threads; in process mode also worker processes
+            cpu_mode: "thread" or "process" (see module docstring)
+            query_workers: Threads reserved for read-only tools
+            bulk_max_wait: See PriorityGate
+
+        Raises:
+            ValueError: If cpu_mode is unknown
+        """
+        if cpu_mode not in CPU_MODES:
+            raise ValueError(
+                f"Unknown cpu_mode: {cpu_mode} (expected one of {', '.join(CPU_MODES)})"
+            )
+        self.cpu_mode = cpu_mode
+        self.io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="lumera-io")
+        self.cpu = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="lumera-cpu")
+        self.query = ThreadPoolExecutor(
+            max_workers=query_workers, thread_name_prefix="lumera-query"
+        )
+        self.processes: Optional[Executor] = (
+            ProcessPoolExecutor(max_workers=cpu_workers) if cpu_mode == "process" else None
+        )
+        self.gate = PriorityGate(bulk_max_wait)
+
+    @staticmethod
+    async def _run(executor: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+    async def run_io(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run blocking I/O on the io pool."""
+        return await self._run(self.io, fn, *args, **kwargs)
+
+    async def run_cpu(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run bulk CPU work on the cpu pool, after any running reads."""
+        await self.gate.bulk_turn()
+        return await self._run(self.cpu, fn, *args, **kwargs)
+
+    async def run_query(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a read-only call on the query pool, ahead of bulk work."""
+        async with self.gate.read():
+            return await self._run(self.query, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """Shut down every pool."""
+        for executor in (self.io, self.cpu, self.query, self.processes):
+            if executor is not None:
+                executor.shutdown(wait=wait)
@@ -0,0 +1,246 @@
+"""Parallel redaction + memory-card derivation for batch stores.
+
+redact_session() and generate_memory_card() are pure-Python, CPU-bound and
+hold the GIL, so threads cannot spread a batch across cores. derive_sessions()
+fans the work out to worker processes instead:
+- sessions are pickled to workers in chunks (one IPC round trip per chunk,
+  not per session)
+- each worker keeps its own RedactionMemo, so repeated strings within the
+  worker's share of the batch are redacted once
+- results come back in input order; RedactionError (fail-closed) becomes a
+  per-session error result instead of aborting the whole batch
+
+derive_session(executor=...) runs one session's redaction and extraction in
+a process pool the same way (the MCP server's process CPU mode). Only the
+TF-IDF keyword ranking stays in the caller, so the index's document
+frequencies are never pickled.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..enrich import generate_memory_card
+from ..enrich.engine import TextAnalysis, enrich, rank_keywords
+from ..enrich.incremental import EnrichmentState, enrich_incremental
+from ..enrich.memory_card import session_text
+from ..index import DocumentFrequencies
+from ..security import RedactionError, RedactionMemo, redact_session
+from ..security.redact import RedactionProfile
+from .cache import DerivationCache, session_digest
+
+# Below this many sessions, pool startup and IPC cost more than they save
+MIN_PARALLEL_BATCH = 8
+
+# Process-local memo used inside pool workers
+_worker_memo: Optional[RedactionMemo] = None
+
+
+def derive_session(
+    session: Dict[str, Any],
+    memo: Optional[RedactionMemo] = None,
+    time_budget: Optional[float] = None,
+    cache: Optional[DerivationCache] = None,
+    profile: Optional[RedactionProfile] = None,
+    df: Optional[DocumentFrequencies] = None,
+    incremental: bool = False,
+    previous_state: Optional[Dict[str, Any]] = None,
+    executor: Optional[Executor] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """Redact one session and build its memory card.
+
+    Args:
+        session: Raw session data dict
+        memo: Optional RedactionMemo for repeated strings
+        time_budget: Max seconds of redaction per string (fail-closed)
+        cache: Optional DerivationCache keyed by session content hash
+        profile: Optional per-rule redaction profile (empty on cache hits)
+        df: Optional document frequencies for TF-IDF keywords. Not part of
+            the cache key: a cached card keeps the DF it was built with.
+        incremental: Build the card with enrich_incremental() and return the
+            extractor state for the next, longer version of the session
+        previous_state: enrichment_state returned for an earlier version of
+            the session (incremental only); ignored if the text does not
+            extend that version's text
+        executor: Optional process pool for redaction and extraction (uses
+            the worker's memo instead of memo); blocks until it is done.
+            Cache lookups and keyword ranking stay in the calling thread.
+        timings: Optional dict that receives the seconds spent redacting
+            ("redact") and building the card ("card"); left empty on cache
+            hits and failures
+
+    Returns:
+        {"ok": True, "redacted", "redaction_report", "memory_card", "terms",
+        "content_sha256", "cached"} or {"ok": False, "error"} if redaction
+        failed closed. terms are the distinct keyword terms of the redacted,
+        allowlisted fields (for MemoryIndex.add_memory, whose index is
+        plaintext); content_sha256 is None when no cache is used.
+        Incremental results add "enrichment_state" (JSON-serializable) and
+        "enrichment_resumed" (False when the card was built from scratch).
+    """
+    params = {"incremental": True} if incremental else {}
+    digest = session_digest(session, **params) if cache is not None else None
+    if digest is not None:
+        cached = cache.get(digest)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    if executor is None:
+        derived = _redact_and_extract(
+            session, memo, time_budget, profile, df, incremental, previous_state
+        )
+    else:
+        derived, worker_profile = executor.submit(
+            _redact_and_extract_in_worker,
+            session,
+            time_budget,
+            profile,
+            incremental,
+            previous_state,
+        ).result()
+        if profile is not None:
+            profile.rules.update(worker_profile.rules)
+        if derived["ok"] and df is not None:
+            derived["extracted"]["keywords"] = rank_keywords(derived["term_counts"], df=df)
+    if not derived["ok"]:
+        return derived
+
+    card_started = time.perf_counter()
+    memory_card = generate_memory_card(session, extracted=derived["extracted"])
+    if timings is not None:
+        timings["redact"] = derived["timings"]["redact"]
+        timings["card"] = derived["timings"]["card"] + time.perf_counter() - card_started
+
+    result = {
+        "ok": True,
+        "redacted": derived["redacted"],
+        "redaction_report": derived["redaction_report"],
+        "memory_card": memory_card,
+        "terms": derived["terms"],
+        "content_sha256": digest,
+        "cached": False,
+    }
+    if incremental:
+        result["enrichment_state"] = derived["state"].to_dict()
+        result["enrichment_resumed"] = derived["state"].resumed
+    if digest is not None:
+        cache.put(digest, result, len(json.dumps(result, default=str)))
+    return result
+
+
+def _redact_and_extract(
+    session: Dict[str, Any],
+    memo: Optional[RedactionMemo],
+    time_budget: Optional[float],
+    profile: Optional[RedactionProfile],
+    df: Optional[DocumentFrequencies],
+    incremental: bool,
+    previous_state: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Redaction plus card extractor output and keyword term counts (uncached)."""
+    started = time.perf_counter()
+    try:
+        redacted, redaction_report = redact_session(
+            session, memo=memo, profile=profile, time_budget=time_budget
+        )
+    except RedactionError as e:
+        return {"ok": False, "error": str(e)}
+    redacted_at = time.perf_counter()
+
+    state = None
+    if incremental:
+        extracted, state, term_counts = enrich_incremental(
+            session_text(session), EnrichmentState.from_dict(previous_state), df=df
+        )
+    else:
+        analysis = TextAnalysis(session_text(session))
+        extracted = enrich(analysis, df=df)
+        term_counts = analysis.term_counts
+    return {
+        "ok": True,
+        "redacted": redacted,
+        "redaction_report": redaction_report,
+        "extracted": extracted,
+        "term_counts": term_counts,
+        # The index is plaintext: document frequencies only see what the
+        # payload keeps, never discarded fields such as output
+        "terms": list(TextAnalysis(session_text(redacted)).term_counts),
+        "state": state,
+        "timings": {"redact": redacted_at - started, "card": time.perf_counter() - redacted_at},
+    }
+
+
+def _redact_and_extract_in_worker(
+    session: Dict[str, Any],
+    time_budget: Optional[float],
+    profile: Optional[RedactionProfile],
+    incremental: bool,
+    previous_state: Optional[Dict[str, Any]],
+) -> Tuple[Dict[str, Any], RedactionProfile]:
+    """Pool entry point for derive_session(executor=...): keywords ranked by TF.
+
+    Returns the filled-in profile as well, since the caller's copy stays empty.
+    """
+    global _worker_memo
+    if _worker_memo is None:
+        _worker_memo = RedactionMemo()
+    profile = profile if profile is not None else RedactionProfile()
+    derived = _redact_and_extract(
+        session, _worker_memo, time_budget, profile, None, incremental, previous_state
+    )
+    return derived, profile
+
+
+def _derive_in_worker(
+    session: Dict[str, Any],
+    time_budget: Optional[float],
+    df: Optional[DocumentFrequencies],
+) -> Dict[str, Any]:
+    """Pool entry point: derive with the worker's process-local memo."""
+    global _worker_memo
+    if _worker_memo is None:
+        _worker_memo = RedactionMemo()
+    return derive_session(session, memo=_worker_memo, time_budget=time_budget, df=df)
+
+
+def derive_sessions(
+    sessions: Sequence[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    chunksize: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    memo: Optional[RedactionMemo] = None,
+    df: Optional[DocumentFrequencies] = None,
+) -> List[Dict[str, Any]]:
+    """Derive many sessions, fanning out across processes when worthwhile.
+
+    Args:
+        sessions: Raw session dicts
+        max_workers: Worker processes (default: os.cpu_count())
+        executor: Existing process pool to reuse (amortizes worker startup)
+        chunksize: Sessions per IPC round trip (default: ~4 chunks per worker)
+        time_budget: Max seconds of redaction per string (fail-closed)
+        memo: RedactionMemo for the in-process path (small batches, 1 worker)
+        df: Optional document frequencies for TF-IDF keywords (pickled once
+            per chunk, so prefer larger chunks with a large vocabulary)
+
+    Returns:
+        One derive_session() result per input session, in input order
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if executor is None and (workers <= 1 or len(sessions) < MIN_PARALLEL_BATCH):
+        return [derive_session(s, memo=memo, time_budget=time_budget, df=df) for s in sessions]
+
+    if chunksize is None:
+        chunksize = max(1, len(sessions) // (workers * 4))
+
+    task = partial(_derive_in_worker, time_budget=time_budget, df=df)
+    if executor is not None:
+        return list(executor.map(task, sessions, chunksize=chunksize))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(task, sessions, chunksize=chunksize))
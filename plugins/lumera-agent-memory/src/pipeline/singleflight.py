@@ -0,0 +1,85 @@
+"""Request coalescing: concurrent identical calls share one execution.
+
+When several agents pull the same incident memory at once, each retrieval
+would fetch, decrypt and parse the same blob, and identical queries would
+run the same FTS query side by side. A SingleFlight group keys in-flight
+calls on their normalized arguments: the first caller starts the work, and
+callers that arrive with the same key before it finishes await the same
+result (or exception) instead of starting their own.
+
+Only in-flight calls are shared; nothing is cached once a call completes.
+forget() makes later callers start fresh, e.g. after a write that would
+change the result, while callers that already joined keep their result.
+A caller that is cancelled stops waiting without cancelling the shared work
+other callers may still be waiting for.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def flight_key(operation: str, **arguments: Any) -> str:
+    """Canonical key of a call: operation plus its JSON-normalized arguments.
+
+    Arguments must be JSON-serializable; dict key order does not matter.
+    """
+    return operation + ":" + json.dumps(arguments, sort_keys=True, separators=(",", ":"))
+
+
+class SingleFlight:
+    """Group of in-flight async calls, at most one per key (one event loop)."""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(
+        self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any
+    ) -> Tuple[Any, bool]:
+        """Await fn(*args, **kwargs), or the identical call already in flight.
+
+        Args:
+            key: Identifies calls with the same result (see flight_key)
+            fn: Coroutine function; only the caller that starts a flight calls it
+            *args, **kwargs: Arguments of fn
+
+        Returns:
+            (result, joined): joined is True if the result came from a call
+            another caller started. The result is shared by every caller of
+            the flight and must be treated as read-only.
+
+        Raises:
+            Whatever fn raised, in every caller of the flight
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        # A flight left by a closed event loop cannot be awaited from this one
+        joined = flight is not None and flight.get_loop() is loop
+        if joined:
+            self.coalesced += 1
+        else:
+            flight = asyncio.ensure_future(fn(*args, **kwargs))
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+            self.calls += 1
+        return await asyncio.shield(flight), joined
+
+    def _land(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Marks the exception retrieved when every caller stopped waiting
+            flight.exception()
+
+    def forget(self, key: Optional[Hashable] = None):
+        """Let later calls with key (None: any key) start a new flight."""
+        if key is None:
+            self._flights.clear()
+        else:
+            self._flights.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Flights started, calls that joined one, and flights in progress."""
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._flights)}
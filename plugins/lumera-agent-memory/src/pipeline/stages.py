@@ -0,0 +1,128 @@
+"""Staged asyncio pipeline with bounded queues between stages.
+
+A batch store runs each session through export, derive, encrypt and put.
+Run strictly in sequence, the CPU sits idle while CASS exports or Cascade
+uploads are in flight, and vice versa. run_stages() instead gives every
+stage its own workers and connects stages with bounded asyncio queues:
+- a stage with an executor runs its function there (I/O stages on a thread
+  pool, so exports and uploads overlap with CPU work); a stage without one
+  runs on the event loop thread (cheap bookkeeping only, since it blocks
+  the loop)
+- a full queue blocks the stage feeding it, so at most queue_depth items
+  wait between two stages and memory stays bounded however large the batch
+- an item leaves the pipeline early when a stage returns None (e.g. a
+  dry run or a skipped duplicate), and a stage exception fails only that
+  item
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+_DONE = object()
+
+
+class Stage:
+    """One pipeline stage: fn applied to each item by workers concurrent tasks."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        workers: int = 1,
+        executor: Optional[Executor] = None,
+        before: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        """Initialize stage.
+
+        Args:
+            name: Stage name (reported with failures)
+            fn: Called with each item; returns the item for the next stage,
+                or None to finish the item here
+            workers: Items this stage processes concurrently
+            executor: Where fn runs (None: on the event loop thread)
+            before: Coroutine function awaited before each item (e.g.
+                PriorityGate.bulk_turn, to yield to higher-priority work)
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.executor = executor
+        self.before = before
+
+
+class StageFailure:
+    """Outcome of an item whose stage function raised."""
+
+    def __init__(self, stage: str, item: Any, error: BaseException):
+        self.stage = stage
+        self.item = item
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"StageFailure({self.stage!r}, {self.error!r})"
+
+
+async def run_stages(
+    items: Sequence[Any],
+    stages: Sequence[Stage],
+    queue_depth: int = 8,
+) -> List[Any]:
+    """Run items through stages concurrently.
+
+    Args:
+        items: Pipeline inputs
+        stages: Stages in order
+        queue_depth: Capacity of the queue in front of each stage
+
+    Returns:
+        One outcome per item, in input order: the last stage's return value;
+        the item as passed to the stage that returned None; or a
+        StageFailure if a stage raised
+    """
+    loop = asyncio.get_running_loop()
+    queues = [asyncio.Queue(maxsize=max(1, queue_depth)) for _ in stages]
+    running = [stage.workers for stage in stages]
+    outcomes: List[Any] = [None] * len(items)
+
+    async def feed():
+        for position, item in enumerate(items):
+            await queues[0].put((position, item))
+        for _ in range(stages[0].workers):
+            await queues[0].put(_DONE)
+
+    async def work(k: int, stage: Stage):
+        last = k == len(stages) - 1
+        while True:
+            entry = await queues[k].get()
+            if entry is _DONE:
+                break
+            position, item = entry
+            try:
+                if stage.before is not None:
+                    await stage.before()
+                if stage.executor is None:
+                    result = stage.fn(item)
+                else:
+                    result = await loop.run_in_executor(stage.executor, stage.fn, item)
+            except Exception as e:
+                outcomes[position] = StageFailure(stage.name, item, e)
+                continue
+            if result is None or last:
+                outcomes[position] = item if result is None else result
+            else:
+                await queues[k + 1].put((position, result))
+
+        # Last worker out closes the next stage
+        running[k] -= 1
+        if running[k] == 0 and not last:
+            for _ in range(stages[k + 1].workers):
+                await queues[k + 1].put(_DONE)
+
+    if not items or not stages:
+        return list(items)
+    await asyncio.gather(
+        feed(),
+        *(work(k, stage) for k, stage in enumerate(stages) for _ in range(stage.workers)),
+    )
+    return outcomes
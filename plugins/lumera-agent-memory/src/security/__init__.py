@@ -1,13 +1,21 @@
 """Security layer: fail-closed redaction + AES-256-GCM encryption."""
 
-from .redact import redact_session, RedactionError
+from .redact import redact_session, RedactionError, RedactionMemo
+from .stream import redact_stream
 from .encrypt import encrypt_blob, decrypt_blob, get_encryption_key, EncryptionError
+from .sections import encrypt_sections, decrypt_sections, read_sections, is_sectioned
 
 __all__ = [
     "redact_session",
     "RedactionError",
+    "RedactionMemo",
+    "redact_stream",
     "encrypt_blob",
     "decrypt_blob",
     "get_encryption_key",
     "EncryptionError",
+    "encrypt_sections",
+    "decrypt_sections",
+    "read_sections",
+    "is_sectioned",
 ]
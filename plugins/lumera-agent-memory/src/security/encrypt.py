@@ -1,10 +1,11 @@
 """Client-side encryption using AES-256-GCM.
 
-Key sourced from LUMERA_MEMORY_KEY environment variable.
+Key sourced from LUMERA_MEMORY_KEY environment variable. The cryptography
+package is imported on first use, so starting the MCP server (and tools
+that never encrypt) does not pay for it.
 """
 
 import os
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 
 class EncryptionError(Exception):
@@ -12,6 +13,13 @@ class EncryptionError(Exception):
     pass
 
 
+def _aesgcm(key: bytes):
+    """AES-GCM cipher for key."""
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    return AESGCM(key)
+
+
 def get_encryption_key() -> bytes:
     """Get encryption key from environment variable.
 
@@ -56,7 +64,7 @@ def encrypt_blob(data: bytes, key: bytes = None) -> bytes:
         key = get_encryption_key()
 
     try:
-        aesgcm = AESGCM(key)
+        aesgcm = _aesgcm(key)
         nonce = os.urandom(12)  # 96-bit IV for GCM
         ciphertext = aesgcm.encrypt(nonce, data, None)
         return nonce + ciphertext  # nonce + ciphertext + tag
@@ -81,7 +89,7 @@ def decrypt_blob(encrypted: bytes, key: bytes = None) -> bytes:
         key = get_encryption_key()
 
     try:
-        aesgcm = AESGCM(key)
+        aesgcm = _aesgcm(key)
         nonce = encrypted[:12]
         ciphertext = encrypted[12:]
         plaintext = aesgcm.decrypt(nonce, ciphertext, None)
@@ -7,7 +7,10 @@ Security Model:
 """
 
 import re
-from typing import Any, Dict, List, Tuple
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class RedactionError(Exception):
@@ -48,106 +51,543 @@ ALLOWED_FIELDS = {
 }
 
 
-def detect_critical_secrets(data: Any) -> Tuple[bool, str]:
+# Literal prefilters: each rule lists the anchors that must all be present
+# before its regex can match. Anchors are C-speed substring checks computed once
+# per string, so a clean string costs roughly one pass per anchor instead of
+# one regex per rule. A prefilter may pass strings the rule then rejects, but
+# must never reject a string the rule would match. Case-insensitive anchors are
+# checked against str.lower() and avoid the letters i and s, whose Unicode case
+# folds (ı, İ, ſ) match under re.IGNORECASE but do not survive str.lower().
+# The fold of k (the Kelvin sign) lowers to "k", so "key" is safe.
+ANCHOR_BEGIN = 1 << 0  # "-----BEGIN"
+ANCHOR_AT = 1 << 1  # "@"
+ANCHOR_DOT = 1 << 2  # "."
+ANCHOR_DIGIT = 1 << 3  # any \d
+ANCHOR_EYJ = 1 << 4  # "eyJ"
+ANCHOR_AKIA = 1 << 5  # "AKIA"
+ANCHOR_GH = 1 << 6  # "gh[pousr]_"
+ANCHOR_UTHOR = 1 << 7  # "uthor" (case-insensitive)
+ANCHOR_KEY = 1 << 8  # "key" (case-insensitive)
+ANCHOR_ECRET = 1 << 9  # "ecret" (case-insensitive)
+ANCHOR_BEARER = 1 << 10  # "bearer" (case-insensitive)
+
+RULE_ANCHORS = {
+    "ssh_private_key": ANCHOR_BEGIN,
+    "pgp_private_key": ANCHOR_BEGIN,
+    "auth_header": ANCHOR_UTHOR,
+    "api_key": ANCHOR_KEY,
+    "aws_access_key": ANCHOR_AKIA,
+    "aws_secret_key": ANCHOR_ECRET,
+    "github_token": ANCHOR_GH,
+    "bearer_token": ANCHOR_BEARER,
+    "email": ANCHOR_AT,
+    "credit_card": ANCHOR_DIGIT,
+    "phone": ANCHOR_DIGIT,
+    "ip_address": ANCHOR_DOT | ANCHOR_DIGIT,
+    "jwt": ANCHOR_EYJ,
+}
+
+# Rules whose regex backtracks super-linearly on long runs of the characters
+# it can match ("a.a.a...@" costs O(n^2) for email). Under a time budget they
+# are applied one maximal run of those characters at a time: no match spans a
+# character outside the run class, so the matches are the whole string's, and
+# the budget is checked between runs. Runs without the anchor cannot match and
+# are skipped; a run longer than the limit fails closed.
+# rule -> (run of characters a match may contain, anchor, max run length)
+WINDOWED_RULES = {
+    "email": (re.compile(r"[A-Za-z0-9._%+|@-]+"), "@", 4096),
+    "jwt": (re.compile(r"[A-Za-z0-9_.-]+"), "eyJ", 8192),
+}
+
+_ASCII_DIGITS = "0123456789"
+_UNICODE_DIGIT = re.compile(r"\d")
+_GITHUB_PREFIXES = ("ghp_", "gho_", "ghu_", "ghs_", "ghr_")
+_CASE_INSENSITIVE_ANCHORS = ANCHOR_UTHOR | ANCHOR_KEY | ANCHOR_ECRET | ANCHOR_BEARER
+
+
+def anchor_bits(text: str, wanted: int = -1) -> int:
+    """Compute which ANCHOR_* bits are present in text.
+
+    Args:
+        text: Input string
+        wanted: Only test these anchor bits (default: all)
+
+    Returns:
+        Bitmask of anchors found (restricted to ``wanted``)
+    """
+    bits = 0
+    if wanted & ANCHOR_BEGIN and "-----BEGIN" in text:
+        bits |= ANCHOR_BEGIN
+    if wanted & ANCHOR_AT and "@" in text:
+        bits |= ANCHOR_AT
+    if wanted & ANCHOR_DOT and "." in text:
+        bits |= ANCHOR_DOT
+    if wanted & ANCHOR_DIGIT:
+        if text.isascii():
+            for digit in _ASCII_DIGITS:
+                if digit in text:
+                    bits |= ANCHOR_DIGIT
+                    break
+        elif _UNICODE_DIGIT.search(text):
+            # \d also matches non-ASCII decimal digits
+            bits |= ANCHOR_DIGIT
+    if wanted & ANCHOR_EYJ and "eyJ" in text:
+        bits |= ANCHOR_EYJ
+    if wanted & ANCHOR_AKIA and "AKIA" in text:
+        bits |= ANCHOR_AKIA
+    if wanted & ANCHOR_GH and "gh" in text:
+        if any(prefix in text for prefix in _GITHUB_PREFIXES):
+            bits |= ANCHOR_GH
+    if wanted & _CASE_INSENSITIVE_ANCHORS:
+        lower = text.lower()
+        if wanted & ANCHOR_UTHOR and "uthor" in lower:
+            bits |= ANCHOR_UTHOR
+        if wanted & ANCHOR_KEY and "key" in lower:
+            bits |= ANCHOR_KEY
+        if wanted & ANCHOR_ECRET and "ecret" in lower:
+            bits |= ANCHOR_ECRET
+        if wanted & ANCHOR_BEARER and "bearer" in lower:
+            bits |= ANCHOR_BEARER
+    return bits
+
+
+class PrefilterStats:
+    """Per-rule counters of strings checked vs. skipped by the prefilter.
+
+    Shared by every thread that redacts (the store pools), so updates hold a lock.
+    """
+
+    def __init__(self):
+        self.checked: Dict[str, int] = {}
+        self.passed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, rules, candidates: List[str]):
+        with self._lock:
+            for rule in rules:
+                self.checked[rule] = self.checked.get(rule, 0) + 1
+            for rule in candidates:
+                self.passed[rule] = self.passed.get(rule, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return {rule: {"checked", "skipped", "skip_ratio"}}."""
+        with self._lock:
+            checked_counts = dict(self.checked)
+            passed = dict(self.passed)
+        result = {}
+        for rule, checked in checked_counts.items():
+            skipped = checked - passed.get(rule, 0)
+            result[rule] = {
+                "checked": checked,
+                "skipped": skipped,
+                "skip_ratio": round(skipped / checked, 4) if checked else 0.0,
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self.checked.clear()
+            self.passed.clear()
+
+
+PREFILTER_STATS = PrefilterStats()
+
+
+def get_prefilter_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-rule prefilter skip ratios since start (or last reset)."""
+    return PREFILTER_STATS.snapshot()
+
+
+def reset_prefilter_stats():
+    """Zero the prefilter counters."""
+    PREFILTER_STATS.reset()
+
+
+def candidate_rules(text: str, rules, record: bool = True) -> List[str]:
+    """Select the rules whose regex could match text, preserving rule order.
+
+    Args:
+        text: Input string
+        rules: Rule names to consider (e.g. CRITICAL_PATTERNS or REDACTABLE_PATTERNS)
+        record: Count the outcome in PREFILTER_STATS
+
+    Returns:
+        Rule names that passed their prefilter
+    """
+    wanted = 0
+    for rule in rules:
+        wanted |= RULE_ANCHORS[rule]
+    bits = anchor_bits(text, wanted)
+    if bits:
+        candidates = [r for r in rules if RULE_ANCHORS[r] & bits == RULE_ANCHORS[r]]
+    else:
+        candidates = []
+    if record:
+        PREFILTER_STATS.record(rules, candidates)
+    return candidates
+
+
+class RedactionProfile:
+    """Opt-in per-rule profile: time, match count and bytes scanned.
+
+    Pass one instance to redact_session() (or lower-level helpers) to collect
+    stats for that call. bytes_scanned counts characters handed to the regex
+    (equal to bytes for ASCII text). Prefilter skips and memo hits do not scan.
+    """
+
+    def __init__(self):
+        self.rules: Dict[str, Dict[str, int]] = {}
+
+    def _rule(self, rule: str) -> Dict[str, int]:
+        stats = self.rules.get(rule)
+        if stats is None:
+            stats = {"evaluations": 0, "skipped": 0, "matches": 0, "bytes_scanned": 0, "time_ns": 0}
+            self.rules[rule] = stats
+        return stats
+
+    def record(self, rule: str, elapsed_ns: int, matches: int, scanned: int):
+        stats = self._rule(rule)
+        stats["evaluations"] += 1
+        stats["matches"] += matches
+        stats["bytes_scanned"] += scanned
+        stats["time_ns"] += elapsed_ns
+
+    def skip(self, rule: str):
+        self._rule(rule)["skipped"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return {rule: stats} sorted by total time, most expensive first."""
+        ordered = sorted(self.rules.items(), key=lambda item: item[1]["time_ns"], reverse=True)
+        return {
+            rule: {
+                "evaluations": stats["evaluations"],
+                "skipped": stats["skipped"],
+                "matches": stats["matches"],
+                "bytes_scanned": stats["bytes_scanned"],
+                "time_ms": round(stats["time_ns"] / 1e6, 3),
+            }
+            for rule, stats in ordered
+        }
+
+
+def _check_budget(started: float, time_budget: Optional[float], rule: str):
+    """Fail closed if redacting one string has exceeded its time budget."""
+    if time_budget is not None and time.perf_counter() - started > time_budget:
+        raise RedactionError(
+            f"Redaction time budget exceeded ({rule}, >{time_budget * 1000:.0f} ms per string). "
+            "Aborting storage for security: input may be adversarial."
+        )
+
+
+def _redact_windowed(
+    text: str, pattern_name: str, placeholder: str, started: float, time_budget: Optional[float]
+) -> Tuple[str, int]:
+    """Substitute a WINDOWED_RULES rule run by run: (redacted text, match count)."""
+    run_pattern, anchor, max_run = WINDOWED_RULES[pattern_name]
+    pattern = REDACTABLE_PATTERNS[pattern_name]
+    pieces = []
+    last = count = 0
+    for run in run_pattern.finditer(text):
+        start, end = run.span()
+        if text.find(anchor, start, end) < 0:
+            continue
+        if end - start > max_run:
+            raise RedactionError(
+                f"Redaction time budget exceeded ({pattern_name}: {end - start}-char run, "
+                f"max {max_run} per scan). Aborting storage for security: input may be adversarial."
+            )
+        # One character past the run keeps \b at its end as in the whole string
+        for match in pattern.finditer(text, start, end + 1):
+            pieces.append(text[last:match.start()])
+            pieces.append(placeholder)
+            last = match.end()
+            count += 1
+        _check_budget(started, time_budget, pattern_name)
+    if not count:
+        return text, 0
+    pieces.append(text[last:])
+    return "".join(pieces), count
+
+
+def detect_critical_secrets(
+    data: Any, prefilter: bool = True, profile: Optional[RedactionProfile] = None
+) -> Tuple[bool, str]:
     """Scan for CRITICAL secrets (fail-closed).
 
     Args:
         data: Session data structure
+        prefilter: Skip regexes whose literal anchors are absent (same result)
+        profile: Optional per-rule profile to record into
 
     Returns:
         (found, pattern_name) tuple
     """
     if isinstance(data, dict):
         for value in data.values():
-            found, pattern = detect_critical_secrets(value)
+            found, pattern = detect_critical_secrets(value, prefilter, profile)
             if found:
                 return found, pattern
     elif isinstance(data, list):
         for item in data:
-            found, pattern = detect_critical_secrets(item)
+            found, pattern = detect_critical_secrets(item, prefilter, profile)
             if found:
                 return found, pattern
     elif isinstance(data, str):
-        for pattern_name, pattern in CRITICAL_PATTERNS.items():
-            if pattern.search(data):
+        rules = candidate_rules(data, CRITICAL_PATTERNS) if prefilter else list(CRITICAL_PATTERNS)
+        if profile is not None:
+            for pattern_name in CRITICAL_PATTERNS:
+                if pattern_name not in rules:
+                    profile.skip(pattern_name)
+        for pattern_name in rules:
+            started = time.perf_counter_ns() if profile is not None else 0
+            match = CRITICAL_PATTERNS[pattern_name].search(data)
+            if profile is not None:
+                elapsed = time.perf_counter_ns() - started
+                profile.record(pattern_name, elapsed, int(match is not None), len(data))
+            if match:
                 return True, pattern_name
     return False, ""
 
 
-def redact_string(text: str, redaction_report: List[Dict]) -> str:
+def redact_string(
+    text: str,
+    redaction_report: List[Dict],
+    prefilter: bool = True,
+    profile: Optional[RedactionProfile] = None,
+    time_budget: Optional[float] = None,
+) -> str:
     """Redact PII/secrets from string with typed placeholders.
 
     Args:
         text: Input string
         redaction_report: List to append redaction events to
+        prefilter: Skip regexes whose literal anchors are absent (same result)
+        profile: Optional per-rule profile to record into
+        time_budget: Max seconds for this string; checked after each rule,
+            and between runs of the WINDOWED_RULES
 
     Returns:
         Redacted string
+
+    Raises:
+        RedactionError: If time_budget is exceeded (fail-closed)
     """
+    started = time.perf_counter()
     redacted = text
-
-    for pattern_name, pattern in REDACTABLE_PATTERNS.items():
-        matches = pattern.findall(redacted)
-        if matches:
-            count = len(matches)
+    rules = candidate_rules(text, REDACTABLE_PATTERNS) if prefilter else list(REDACTABLE_PATTERNS)
+    if profile is not None:
+        for pattern_name in REDACTABLE_PATTERNS:
+            if pattern_name not in rules:
+                profile.skip(pattern_name)
+
+    while rules:
+        pattern_name = rules.pop(0)
+        pattern = REDACTABLE_PATTERNS[pattern_name]
+        placeholder = f"<REDACTED:{pattern_name.upper()}>"
+        rule_started = time.perf_counter_ns() if profile is not None else 0
+        scanned = len(redacted)
+        if time_budget is not None and pattern_name in WINDOWED_RULES:
+            redacted, count = _redact_windowed(
+                redacted, pattern_name, placeholder, started, time_budget
+            )
+        else:
+            count = len(pattern.findall(redacted))
+            if count:
+                # Replace with typed placeholder
+                redacted = pattern.sub(placeholder, redacted)
+        if count:
             redaction_report.append({"rule": pattern_name, "count": count})
 
-            # Replace with typed placeholder
-            placeholder = f"<REDACTED:{pattern_name.upper()}>"
-            redacted = pattern.sub(placeholder, redacted)
+        if profile is not None:
+            elapsed = time.perf_counter_ns() - rule_started
+            profile.record(pattern_name, elapsed, count, scanned)
+        _check_budget(started, time_budget, pattern_name)
+
+        # Later rules see the substituted text; re-select their candidates
+        if count and prefilter and rules:
+            rules = candidate_rules(redacted, rules, record=False)
 
     return redacted
 
 
-def redact_data_structure(data: Any, redaction_report: List[Dict]) -> Any:
+class RedactionMemo:
+    """Bounded LRU memo of redact_string() results for repeated string values.
+
+    Agent sessions repeat the same strings (tool names, command templates,
+    file paths, boilerplate errors). Each entry stores the redacted output and
+    the rule hits, so cached occurrences still append their report events and
+    per-occurrence counts stay correct. Strings longer than max_string_length
+    bypass the memo so one huge log cannot evict everything else.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_string_length: int = 4096):
+        """Initialize memo.
+
+        Args:
+            max_entries: Maximum cached strings (least recently used evicted first)
+            max_string_length: Strings longer than this are never cached
+        """
+        self.max_entries = max_entries
+        self.max_string_length = max_string_length
+        self._entries: "OrderedDict[str, Tuple[str, Tuple[Tuple[str, int], ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def redact(
+        self,
+        text: str,
+        redaction_report: List[Dict],
+        profile: Optional[RedactionProfile] = None,
+        time_budget: Optional[float] = None,
+    ) -> str:
+        """Redact text, reusing a cached result for previously seen values.
+
+        Args:
+            text: Input string
+            redaction_report: List to append redaction events to
+            profile: Optional per-rule profile (cache hits scan nothing)
+            time_budget: Max seconds for this string (see redact_string)
+
+        Returns:
+            Redacted string
+        """
+        if len(text) > self.max_string_length:
+            self.bypassed += 1
+            return redact_string(text, redaction_report, profile=profile, time_budget=time_budget)
+
+        with self._lock:
+            entry = self._entries.get(text)
+            if entry is not None:
+                self._entries.move_to_end(text)
+                self.hits += 1
+        if entry is not None:
+            redacted, hits = entry
+            redaction_report.extend({"rule": rule, "count": count} for rule, count in hits)
+            return redacted
+
+        events = []
+        redacted = redact_string(text, events, profile=profile, time_budget=time_budget)
+        with self._lock:
+            self.misses += 1
+            self._entries[text] = (redacted, tuple((e["rule"], e["count"]) for e in events))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        redaction_report.extend(events)
+        return redacted
+
+    def stats(self) -> Dict[str, Any]:
+        """Return memo counters and hit ratio (hits / cacheable lookups)."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Drop all cached entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.bypassed = 0
+
+
+def redact_data_structure(
+    data: Any,
+    redaction_report: List[Dict],
+    memo: Optional[RedactionMemo] = None,
+    profile: Optional[RedactionProfile] = None,
+    time_budget: Optional[float] = None,
+) -> Any:
     """Recursively redact data structure.
 
     Args:
         data: Data structure (dict, list, str, or primitive)
         redaction_report: List to append redaction events to
+        memo: Optional memo for repeated string values
+        profile: Optional per-rule profile to record into
+        time_budget: Max seconds per string (fail-closed when exceeded)
 
     Returns:
         Redacted data structure
     """
     if isinstance(data, dict):
-        return {k: redact_data_structure(v, redaction_report) for k, v in data.items()}
+        return {
+            k: redact_data_structure(v, redaction_report, memo, profile, time_budget)
+            for k, v in data.items()
+        }
     elif isinstance(data, list):
-        return [redact_data_structure(item, redaction_report) for item in data]
+        return [
+            redact_data_structure(item, redaction_report, memo, profile, time_budget)
+            for item in data
+        ]
     elif isinstance(data, str):
-        return redact_string(data, redaction_report)
+        if memo is not None:
+            return memo.redact(data, redaction_report, profile, time_budget)
+        return redact_string(data, redaction_report, profile=profile, time_budget=time_budget)
     else:
         return data
 
 
-def redact_session(session: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict]]:
+def redact_session(
+    session: Dict[str, Any],
+    allowlist_first: bool = False,
+    memo: Optional[RedactionMemo] = None,
+    profile: Optional[RedactionProfile] = None,
+    time_budget: Optional[float] = None,
+) -> Tuple[Dict[str, Any], List[Dict]]:
     """Redact session data with typed placeholders.
 
+    By default the whole session is redacted and then projected onto
+    ALLOWED_FIELDS, so the report also counts hits in discarded fields.
+    With ``allowlist_first=True`` the session is projected first and only the
+    surviving values are redacted; large non-allowlisted fields (tool output,
+    API responses) are never regex-scanned. CRITICAL detection still covers
+    the full input in both modes (fail-closed); the literal prefilter keeps
+    that scan cheap on strings that cannot contain a CRITICAL pattern.
+
     Args:
         session: Raw session data dict
+        allowlist_first: Project onto ALLOWED_FIELDS before redacting
+        memo: Optional RedactionMemo shared across calls for repeated strings
+        profile: Optional RedactionProfile; records time, matches and bytes
+            scanned per rule for this call (opt-in, small overhead)
+        time_budget: Max seconds of redaction per string; exceeding it raises
+            RedactionError (fail-closed guard against catastrophic backtracking)
 
     Returns:
         (redacted_session, redaction_report) tuple
 
     Raises:
-        RedactionError: If CRITICAL secrets detected (fail-closed)
+        RedactionError: If CRITICAL secrets detected or time budget exceeded (fail-closed)
     """
-    # Step 1: Detect critical secrets (FAIL-CLOSED)
-    found, pattern = detect_critical_secrets(session)
+    # Step 1: Detect critical secrets over the FULL input (FAIL-CLOSED)
+    found, pattern = detect_critical_secrets(session, profile=profile)
     if found:
         raise RedactionError(
             f"CRITICAL secret detected ({pattern}). "
             "Aborting storage for security. Please remove secret from source data."
         )
 
-    # Step 2: Redact non-critical PII with typed placeholders
     redaction_report = []
-    redacted_data = redact_data_structure(session, redaction_report)
+    if allowlist_first:
+        # Steps 2+3: Extract allowlisted fields (default-deny), then redact survivors
+        projected = {k: v for k, v in session.items() if k in ALLOWED_FIELDS}
+        redacted = redact_data_structure(projected, redaction_report, memo, profile, time_budget)
+    else:
+        # Step 2: Redact non-critical PII with typed placeholders
+        redacted_data = redact_data_structure(
+            session, redaction_report, memo, profile, time_budget
+        )
 
-    # Step 3: Extract allowlisted fields only (default-deny)
-    redacted = {}
-    for field in ALLOWED_FIELDS:
-        if field in redacted_data:
-            redacted[field] = redacted_data[field]
+        # Step 3: Extract allowlisted fields only (default-deny)
+        redacted = {}
+        for field in ALLOWED_FIELDS:
+            if field in redacted_data:
+                redacted[field] = redacted_data[field]
 
     # Step 4: Ensure required fields present
     if "session_id" not in redacted:
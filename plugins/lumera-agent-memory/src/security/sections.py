@@ -0,0 +1,147 @@
+"""Sectioned AES-256-GCM blobs: parts that can be read and verified alone.
+
+A raw_plus_artifact payload is a small memory card and redaction report next
+to a possibly huge raw session. Encrypted as one AES-GCM blob, reading the
+card means fetching and decrypting all of it. A sectioned blob encrypts each
+part separately and lists the parts in an encrypted table of contents (TOC):
+
+    "LMS1" | TOC length (uint32, big-endian) | TOC | section | section | ...
+
+- TOC: nonce + AES-GCM of {"id": blob id, "sections": [[name, offset,
+  length], ...]} (offsets from the end of the TOC), with the magic as
+  associated data
+- section: nonce + AES-GCM of its plaintext, with magic + blob id + name as
+  associated data, so a section cannot be renamed or moved into another
+  blob without failing authentication
+
+With ranged reads, one section costs three reads (header, TOC, section),
+independent of the size of the other sections.
+"""
+
+import json
+import os
+import struct
+from typing import Callable, Dict, Iterable, Optional
+
+from .encrypt import EncryptionError, _aesgcm, get_encryption_key
+
+SECTION_MAGIC = b"LMS1"
+SECTION_HEADER_SIZE = len(SECTION_MAGIC) + 4
+NONCE_SIZE = 12
+
+
+def _section_aad(blob_id: bytes, name: str) -> bytes:
+    return SECTION_MAGIC + blob_id + name.encode("utf-8")
+
+
+def is_sectioned(blob_prefix: bytes) -> bool:
+    """Whether a blob (or its first SECTION_HEADER_SIZE bytes) starts like a sectioned blob.
+
+    A legacy single-section blob starts with a random nonce, so it matches
+    with probability 2^-32; readers fall back to the legacy format when the
+    TOC does not authenticate.
+    """
+    return len(blob_prefix) >= SECTION_HEADER_SIZE and blob_prefix.startswith(SECTION_MAGIC)
+
+
+def encrypt_sections(sections: Dict[str, bytes], key: bytes = None) -> bytes:
+    """Encrypt named sections into one sectioned blob.
+
+    Args:
+        sections: Section name -> plaintext, in blob order
+        key: 32-byte encryption key (uses env var if None)
+
+    Returns:
+        Sectioned blob (see module docstring)
+
+    Raises:
+        EncryptionError: If encryption fails
+    """
+    if key is None:
+        key = get_encryption_key()
+
+    try:
+        aesgcm = _aesgcm(key)
+        blob_id = os.urandom(16)
+        parts = []
+        entries = []
+        offset = 0
+        for name, plaintext in sections.items():
+            nonce = os.urandom(NONCE_SIZE)
+            part = nonce + aesgcm.encrypt(nonce, plaintext, _section_aad(blob_id, name))
+            entries.append([name, offset, len(part)])
+            parts.append(part)
+            offset += len(part)
+        toc_plaintext = json.dumps({"id": blob_id.hex(), "sections": entries}).encode("utf-8")
+        nonce = os.urandom(NONCE_SIZE)
+        toc = nonce + aesgcm.encrypt(nonce, toc_plaintext, SECTION_MAGIC)
+    except Exception as e:
+        raise EncryptionError(f"Encryption failed: {e}")
+
+    return SECTION_MAGIC + struct.pack(">I", len(toc)) + toc + b"".join(parts)
+
+
+def read_sections(
+    read: Callable[[int, int], bytes],
+    names: Optional[Iterable[str]] = None,
+    key: bytes = None,
+    header: Optional[bytes] = None,
+) -> Dict[str, bytes]:
+    """Decrypt sections of a sectioned blob through ranged reads.
+
+    Args:
+        read: read(offset, length) -> bytes of the blob
+        names: Sections to decrypt (None: all, in blob order)
+        key: 32-byte encryption key (uses env var if None)
+        header: First SECTION_HEADER_SIZE bytes, if the caller has read them
+
+    Returns:
+        Section name -> plaintext
+
+    Raises:
+        EncryptionError: If the blob is not sectioned, a section is missing,
+            or the TOC or a section fails authentication (wrong key or
+            tampered data)
+    """
+    if key is None:
+        key = get_encryption_key()
+    if header is None:
+        header = read(0, SECTION_HEADER_SIZE)
+    if not is_sectioned(header):
+        raise EncryptionError("Not a sectioned blob")
+    (toc_length,) = struct.unpack(">I", header[len(SECTION_MAGIC) : SECTION_HEADER_SIZE])
+
+    aesgcm = _aesgcm(key)
+    toc_blob = read(SECTION_HEADER_SIZE, toc_length)
+    try:
+        toc = json.loads(
+            aesgcm.decrypt(toc_blob[:NONCE_SIZE], toc_blob[NONCE_SIZE:], SECTION_MAGIC)
+        )
+        blob_id = bytes.fromhex(toc["id"])
+        entries = {name: (offset, length) for name, offset, length in toc["sections"]}
+    except Exception as e:
+        raise EncryptionError(f"Decryption failed (wrong key or tampered table of contents): {e}")
+
+    data_start = SECTION_HEADER_SIZE + toc_length
+    plaintexts = {}
+    for name in (entries if names is None else names):
+        if name not in entries:
+            raise EncryptionError(f"Blob has no section {name!r}")
+        offset, length = entries[name]
+        part = read(data_start + offset, length)
+        try:
+            plaintexts[name] = aesgcm.decrypt(
+                part[:NONCE_SIZE], part[NONCE_SIZE:], _section_aad(blob_id, name)
+            )
+        except Exception as e:
+            raise EncryptionError(
+                f"Decryption failed (wrong key or tampered section {name!r}): {e}"
+            )
+    return plaintexts
+
+
+def decrypt_sections(
+    blob: bytes, names: Optional[Iterable[str]] = None, key: bytes = None
+) -> Dict[str, bytes]:
+    """Decrypt sections of a sectioned blob held in memory (see read_sections)."""
+    return read_sections(lambda offset, length: blob[offset : offset + length], names, key)
@@ -0,0 +1,192 @@
+"""Chunked streaming redaction for very large text fields.
+
+redact_string() works on whole strings and copies the text once per rule
+substitution, so a multi-megabyte tool log is copied many times. The stream
+redactor instead buffers at most one chunk plus an overlap window, cuts the
+buffer only at positions no rule match can span, redacts the finished segment
+and yields it. Peak memory is bounded by chunk_size + overlap (plus any match
+straddling the cut), independent of total text length.
+
+Cut points are chosen so each segment redacts exactly like the same region
+of the whole string:
+- no CRITICAL or REDACTABLE match (found in the buffer) spans the cut
+- the cut sits between two non-word characters, so ``\\b`` at the segment
+  edges evaluates as it would in the full text
+- the cut is at least ``overlap`` characters before the end of the buffer,
+  so any match starting before it is fully visible
+
+Matches longer than ``overlap`` characters (e.g. a multi-kilobyte bearer
+token) are the one exception and may be split; the default overlap is far
+above any real secret length.
+"""
+
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .redact import (
+    CRITICAL_PATTERNS,
+    REDACTABLE_PATTERNS,
+    RedactionError,
+    RedactionProfile,
+    _check_budget,
+    candidate_rules,
+    detect_critical_secrets,
+    redact_string,
+)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_OVERLAP = 4096
+STREAM_MAX_BUFFER = 1024 * 1024
+
+# Position i such that text[i] and text[i + 1] are both non-word characters
+_NONWORD_PAIR = re.compile(r"\W(?=\W)")
+
+
+def _match_spans(buffer: str) -> List[Tuple[int, int]]:
+    """Spans of every CRITICAL/REDACTABLE match in buffer.
+
+    Scanning starts at index 0, where the previous segment was cut, so the
+    spans line up with the matches redact_string() finds in the whole text.
+    Starting later would shift a chain of adjacent matches (e.g. a list of
+    card numbers) off the real match boundaries.
+    """
+    spans = []
+    for patterns in (CRITICAL_PATTERNS, REDACTABLE_PATTERNS):
+        for pattern_name in candidate_rules(buffer, patterns, record=False):
+            for match in patterns[pattern_name].finditer(buffer):
+                if match.end() > match.start():
+                    spans.append((match.start(), match.end()))
+    return spans
+
+
+def _find_cut(buffer: str, limit: int, window: int) -> int:
+    """Find the largest safe cut in (limit - window, limit], or 0 if none exists.
+
+    Args:
+        buffer: Current buffer (not yet emitted)
+        limit: Highest acceptable cut (len(buffer) - overlap)
+        window: How far back from limit to look for a cut
+
+    Returns:
+        Cut position, or 0 if every candidate is inside a match
+    """
+    pos = max(0, limit - window)
+    spans = [(start, end) for start, end in _match_spans(buffer) if end > pos]
+
+    def blocked(cut: int) -> bool:
+        return any(start < cut < end for start, end in spans)
+
+    # Prefer cuts between two non-word characters (\b-neutral)
+    boundaries = [m.start() + 1 for m in _NONWORD_PAIR.finditer(buffer, pos, limit + 1)]
+    for cut in reversed(boundaries):
+        if cut > pos and not blocked(cut):
+            return cut
+
+    # Fall back to any position outside a match. A word|word cut can only make
+    # \b true where it was false, which over-redacts but never leaks.
+    cut = limit
+    while cut > pos:
+        blocking = [start for start, end in spans if start < cut < end]
+        if not blocking:
+            return cut
+        cut = min(blocking)
+    return 0
+
+
+def _redact_segment(
+    segment: str,
+    counts: Dict[str, int],
+    profile: Optional[RedactionProfile],
+    time_budget: Optional[float],
+) -> str:
+    """Fail closed on CRITICAL secrets, then redact one finished segment."""
+    found, pattern = detect_critical_secrets(segment, profile=profile)
+    if found:
+        raise RedactionError(
+            f"CRITICAL secret detected ({pattern}). "
+            "Aborting storage for security. Please remove secret from source data."
+        )
+
+    segment_report = []
+    redacted = redact_string(segment, segment_report, profile=profile, time_budget=time_budget)
+    for event in segment_report:
+        counts[event["rule"]] = counts.get(event["rule"], 0) + event["count"]
+    return redacted
+
+
+def redact_stream(
+    chunks: Iterable[str],
+    redaction_report: List[Dict],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    overlap: int = STREAM_OVERLAP,
+    max_buffer: int = STREAM_MAX_BUFFER,
+    profile: Optional[RedactionProfile] = None,
+    time_budget: Optional[float] = None,
+) -> Iterator[str]:
+    """Redact a stream of text chunks, yielding redacted output incrementally.
+
+    ``"".join(redact_stream(chunks, report))`` equals
+    ``redact_string("".join(chunks), report)`` except for matches longer than
+    ``overlap``. Report events are merged per rule and appended once the
+    stream is exhausted.
+
+    Output already yielded must be discarded if RedactionError is raised:
+    CRITICAL detection is per segment, so a secret late in the stream aborts
+    after earlier segments were emitted.
+
+    Args:
+        chunks: Iterable of text chunks (any sizes; re-chunked to chunk_size)
+        redaction_report: List to append redaction events to
+        chunk_size: Characters consumed per processing step
+        overlap: Characters held back so matches near the end stay whole
+        max_buffer: Fail closed if no safe cut is found within this many characters
+        profile: Optional per-rule profile to record into
+        time_budget: Max seconds for the whole stream, checked between segments
+
+    Yields:
+        Redacted text segments
+
+    Raises:
+        RedactionError: If CRITICAL secrets detected, no safe cut point exists,
+            or time_budget is exceeded
+    """
+    started = time.perf_counter()
+    counts: Dict[str, int] = {}
+    buffer = ""
+
+    def remaining() -> Optional[float]:
+        if time_budget is None:
+            return None
+        return time_budget - (time.perf_counter() - started)
+
+    for chunk in chunks:
+        for offset in range(0, len(chunk), chunk_size):
+            buffer += chunk[offset : offset + chunk_size]
+            limit = len(buffer) - overlap
+            if limit <= 0:
+                continue
+
+            cut = _find_cut(buffer, limit, overlap)
+            _check_budget(started, time_budget, "stream")
+            if cut:
+                yield _redact_segment(buffer[:cut], counts, profile, remaining())
+                buffer = buffer[cut:]
+            elif len(buffer) > max_buffer:
+                raise RedactionError(
+                    f"No safe redaction split point within {max_buffer} characters. "
+                    "Aborting storage for security."
+                )
+
+    if buffer:
+        yield _redact_segment(buffer, counts, profile, remaining())
+
+    for pattern_name in REDACTABLE_PATTERNS:
+        if pattern_name in counts:
+            redaction_report.append({"rule": pattern_name, "count": counts[pattern_name]})
+
+
+def iter_chunks(text: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Slice an in-memory string into chunks for redact_stream()."""
+    for offset in range(0, len(text), chunk_size):
+        yield text[offset : offset + chunk_size]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Stand-in for the `cm` CLI of the CASS memory system, for tests and benchmarks.
+
+Usage:
+    fake_cm.py context <session-id> --json   (one export, like `cm`)
+    fake_cm.py worker                        (export worker, see src.adapters.cm_worker)
+
+Any session ID exports a deterministic context, except IDs starting with
+"missing" (not found: exit status 1, or "context": null) and "broken"
+(the export fails). Environment:
+    FAKE_CM_STARTUP_MS  sleep at process start, like `cm` startup
+    FAKE_CM_LOG         file that gets a line "<mode> <pid>" per process start
+    FAKE_CM_EXIT_AFTER  worker exits after this many requests (a crash)
+"""
+
+import json
+import os
+import sys
+import time
+
+
+def context(session_id):
+    """Context for a session ID (None if not found); raises for broken ones."""
+    if session_id.startswith("missing"):
+        return None
+    if session_id.startswith("broken"):
+        raise RuntimeError(f"cannot read session {session_id}")
+    return {
+        "timestamp": "2025-12-20T10:00:00Z",
+        "tool": "fake-cm",
+        "success": True,
+        "summary": f"Exported {session_id} through the fake cm. "
+        "Decided to keep the forecast baseline.",
+        "tags": ["fake-cm"],
+    }
+
+
+def worker():
+    exit_after = int(os.getenv("FAKE_CM_EXIT_AFTER", "0"))
+    for served, line in enumerate(sys.stdin, 1):
+        request = json.loads(line)
+        try:
+            response = {"id": request["id"], "context": context(request["session_id"])}
+        except RuntimeError as e:
+            response = {"id": request["id"], "error": str(e)}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+        if exit_after and served >= exit_after:
+            sys.exit(3)
+
+
+def main(argv):
+    if os.getenv("FAKE_CM_LOG"):
+        with open(os.environ["FAKE_CM_LOG"], "a") as log:
+            log.write(f"{argv[0] if argv else '-'} {os.getpid()}\n")
+    time.sleep(float(os.getenv("FAKE_CM_STARTUP_MS", "0")) / 1000)
+
+    if argv == ["worker"]:
+        worker()
+        return 0
+    if len(argv) == 3 and argv[0] == "context" and argv[2] == "--json":
+        try:
+            data = context(argv[1])
+        except RuntimeError as e:
+            print(f"cm: {e}", file=sys.stderr)
+            return 2
+        if data is None:
+            print(f"cm: session not found: {argv[1]}", file=sys.stderr)
+            return 1
+        print(json.dumps(data))
+        return 0
+    print("usage: fake_cm.py context <session-id> --json | fake_cm.py worker", file=sys.stderr)
+    return 64
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
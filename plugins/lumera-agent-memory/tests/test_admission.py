@@ -0,0 +1,200 @@
+"""Tests for admission control of tool calls (limits, byte budget, wait queue)."""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import src.mcp_server as server
+from src.cascade import MockCascadeConnector
+from src.index import MemoryIndex
+from src.pipeline import AdmissionController, AdmissionRejected
+
+
+def test_limits_queue_in_order_per_tool():
+    """Calls over a tool's limit wait in FIFO order; other tools pass them."""
+    controller = AdmissionController({"store": 1, "query": 1}, queue_size=8, max_wait=1.0)
+    order = []
+
+    async def call(tool, name, seconds=0.02):
+        ticket = await controller.admit(tool)
+        order.append(name)
+        await asyncio.sleep(seconds)
+        ticket.release()
+
+    async def scenario():
+        first = asyncio.ensure_future(call("store", "store-1"))
+        await asyncio.sleep(0)
+        waiting = [asyncio.ensure_future(call("store", f"store-{n}")) for n in (2, 3)]
+        await asyncio.sleep(0)
+        assert controller.stats()["queue_depth"] == 2
+        # A query does not wait behind queued stores
+        await call("query", "query", 0)
+        await asyncio.gather(first, *waiting)
+
+    asyncio.run(scenario())
+    assert order == ["store-1", "query", "store-2", "store-3"]
+    stats = controller.stats()
+    assert stats["queue_depth"] == 0 and stats["queued"] == 2 and stats["admitted"] == 4
+    assert stats["store"] == {"in_flight": 0, "limit": 1, "queued": 0}
+
+    # Tools without a limit are not counted
+    ticket = asyncio.run(controller.admit("estimate"))
+    ticket.release()
+    assert controller.stats()["admitted"] == 4
+
+
+def test_full_queue_and_deadline_reject_with_retry_after():
+    """A full queue rejects at once; a waiter whose deadline passes is rejected too."""
+    controller = AdmissionController({"store": 1}, queue_size=1, max_wait=0.05)
+
+    async def scenario():
+        held = await controller.admit("store")
+        waiter = asyncio.ensure_future(controller.admit("store"))
+        await asyncio.sleep(0)
+
+        started = time.perf_counter()
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.admit("store")
+        fast = time.perf_counter() - started
+
+        with pytest.raises(AdmissionRejected) as late:
+            await waiter
+        held.release()
+        return full.value, fast, late.value
+
+    full, fast, late = asyncio.run(scenario())
+    assert fast < 0.01
+    assert "1 store calls in flight (limit 1)" in str(full) and full.retry_after > 0
+    assert "waited 0.05s" in str(late)
+    stats = controller.stats()
+    assert stats["rejected_queue_full"] == 1 and stats["rejected_timeout"] == 1
+    assert stats["store"]["in_flight"] == 0 and stats["queue_depth"] == 0
+    # The hint follows how long calls actually took
+    assert controller.retry_after("store") == pytest.approx(0.05, abs=0.05)
+
+
+def test_byte_budget_holds_back_payload_tools_only():
+    """Charged bytes over the budget hold back byte tools until released."""
+    controller = AdmissionController(
+        {"store": 0, "query": 0}, max_bytes=100, byte_tools=("store",), queue_size=4, max_wait=1.0
+    )
+
+    async def scenario():
+        big = await controller.admit("store")
+        big.charge(150)
+        assert controller.bytes_in_flight == 150
+        waiting = asyncio.ensure_future(controller.admit("store"))
+        query = await asyncio.wait_for(controller.admit("query"), 0.1)
+        query.release()
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        big.release()
+        big.release()  # idempotent
+        small = await waiting
+        small.release()
+
+    asyncio.run(scenario())
+    assert controller.bytes_in_flight == 0
+    assert controller.stats()["queued"] == 1
+
+
+def test_charge_after_release_is_dropped():
+    """Bytes charged by a call that already ended do not stay in flight."""
+    controller = AdmissionController({"store": 0}, max_bytes=100, byte_tools=("store",))
+    ticket = asyncio.run(controller.admit("store"))
+    ticket.charge(40)
+    ticket.release()
+    ticket.charge(60)
+    assert controller.bytes_in_flight == 0 and ticket.bytes == 40
+
+
+class SlowPutCascade(MockCascadeConnector):
+    """Blob store whose uploads take a while."""
+
+    def put(self, data):
+        time.sleep(0.1)
+        return super().put(data)
+
+
+@pytest.fixture
+def admitting_server(tmp_path, monkeypatch, mock_env_key):
+    """Server with a fresh index, slow uploads and tight admission limits."""
+    monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+    monkeypatch.setattr(server, "cascade", SlowPutCascade(cache_dir=tmp_path / "cascade"))
+    monkeypatch.setattr(server, "METRICS_FILE", None)
+    monkeypatch.setattr(
+        server,
+        "admission",
+        AdmissionController(
+            {"store_session_to_cascade": 1, "query_memories": 4},
+            max_bytes=1024 * 1024,
+            byte_tools=("store_session_to_cascade",),
+            queue_size=1,
+            max_wait=5.0,
+        ),
+    )
+    yield tmp_path
+    server.index.close()
+
+
+def test_store_burst_is_queued_then_rejected(admitting_server):
+    """Over the limit, stores queue, the overflow is rejected fast, queries keep going."""
+
+    async def call(name, arguments):
+        return json.loads((await server.call_tool(name, arguments))[0].text)
+
+    async def scenario():
+        stores = [
+            asyncio.ensure_future(call("store_session_to_cascade", {"session_id": session_id}))
+            for session_id in ("test-session-001", "test-session-002", "demo-bug-report")
+        ]
+        await asyncio.sleep(0.02)
+        query = await call("query_memories", {"query": "forecast"})
+        during = server.admission.stats()
+        return await asyncio.gather(*stores), query, during
+
+    stores, query, during = asyncio.run(scenario())
+    assert [store["ok"] for store in stores] == [True, True, False]
+    rejected = stores[2]
+    assert rejected["busy"] is True and rejected["retry_after_s"] > 0
+    assert "Server busy" in rejected["error"]
+    assert query["ok"]
+
+    assert during["queue_depth"] == 1
+    assert during["store_session_to_cascade"]["in_flight"] == 1
+    assert during["bytes_in_flight"] > 0
+    report = server.metrics.snapshot()["admission"]
+    assert report["rejected_queue_full"] == 1 and report["bytes_in_flight"] == 0
+
+
+def test_cancelled_store_leaves_no_bytes_in_flight(admitting_server, monkeypatch):
+    """A store cancelled while its export runs does not charge once the export ends."""
+    started, proceed = threading.Event(), threading.Event()
+
+    def export_session(session_id):
+        started.set()
+        proceed.wait(5)
+        return {"session_id": session_id, "summary": "Rebuilt the cache and reran the suite."}
+
+    monkeypatch.setattr(server, "cass", SimpleNamespace(export_session=export_session))
+
+    async def scenario():
+        store = asyncio.ensure_future(
+            server.call_tool("store_session_to_cascade", {"session_id": "s-1"})
+        )
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        store.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await store
+        proceed.set()
+        # Let the export thread return and charge its late bytes
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert server.admission.bytes_in_flight == 0
+    assert server.admission.stats()["store_session_to_cascade"]["in_flight"] == 0
@@ -0,0 +1,173 @@
+"""Tests for the batch store tool store_sessions_to_cascade."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import src.mcp_server as server
+from src.cascade import MockCascadeConnector
+from src.index import MemoryIndex
+
+SUMMARIES = {
+    "retry": (
+        "pytest tests/test_auth.py failed with status 1 after 4.2s. "
+        "AssertionError in test_token_refresh: expected 200, got 401. "
+        "Decided to pin the token clock skew to 30 seconds."
+    ),
+    "other": (
+        "Migrated the billing ledger to the new partition layout. "
+        "Copied 1.2M rows and verified checksums for every shard. "
+        "TODO: drop the legacy ledger table next sprint."
+    ),
+}
+
+
+def _session(session_id):
+    return {
+        "session_id": session_id,
+        "timestamp": "2025-12-20T10:00:00Z",
+        "tool_name": "bash",
+        "success": True,
+        "summary": SUMMARIES[session_id.split("-")[0]],
+    }
+
+
+class FailingPutCascade(MockCascadeConnector):
+    """Blob store whose uploads all fail."""
+
+    def put(self, data):
+        raise OSError("upload failed")
+
+
+@pytest.fixture
+def batch_server(tmp_path, monkeypatch, mock_env_key):
+    """Server with a fresh index whose CASS exports retries and one unrelated session."""
+    monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+    monkeypatch.setattr(server, "cascade", MockCascadeConnector(cache_dir=tmp_path / "cascade"))
+    monkeypatch.setattr(server, "cass", SimpleNamespace(export_session=_session))
+    monkeypatch.setattr(server, "METRICS_FILE", None)
+    yield server.index
+    server.index.close()
+
+
+def _call(name, arguments):
+    return json.loads(asyncio.run(server.call_tool(name, arguments))[0].text)
+
+
+def _store_batch(session_ids, policy, tags=None):
+    return _call(
+        "store_sessions_to_cascade",
+        {
+            "session_ids": session_ids,
+            "tags": tags or [],
+            "metadata": {"dedup_policy": policy},
+        },
+    )
+
+
+def _memories(index):
+    return index.conn.execute("""
+        SELECT m.id, m.pointer, m.source_session_id, m.tags_json, m.metadata_json, s.duplicate_of
+        FROM memories m LEFT JOIN memory_sketches s ON s.memory_id = m.id
+        ORDER BY m.id
+        """).fetchall()
+
+
+def test_links_within_batch_point_at_cluster_root(batch_server):
+    """Duplicates of an earlier session of the same batch link to its record."""
+    result = _store_batch(["retry-1", "retry-2", "other-1", "retry-3"], "link")
+
+    assert result["ok"] and result["stored"] == 4 and result["failed"] == 0
+    first, second, other, third = result["results"]
+    assert [r["session_id"] for r in result["results"]] == [
+        "retry-1",
+        "retry-2",
+        "other-1",
+        "retry-3",
+    ]
+    assert "dedup" not in first and "dedup" not in other
+    assert second["dedup"]["duplicate_of"] == first["cascade_uri"]
+    assert second["dedup"]["duplicate_of_session"] == "retry-1"
+    assert third["dedup"]["duplicate_of"] in (first["cascade_uri"], second["cascade_uri"])
+
+    rows = {row["source_session_id"]: row for row in _memories(batch_server)}
+    root = rows["retry-1"]["id"]
+    assert rows["retry-1"]["duplicate_of"] is None
+    assert rows["retry-2"]["duplicate_of"] == root
+    assert rows["retry-3"]["duplicate_of"] == root
+    assert rows["other-1"]["duplicate_of"] is None
+
+
+def test_links_to_indexed_memory_use_its_cluster(batch_server):
+    """Batch sessions matching an indexed memory join that memory's cluster."""
+    indexed = _call("store_session_to_cascade", {"session_id": "retry-0"})
+    result = _store_batch(["retry-1", "retry-2"], "link")
+
+    assert [r["dedup"]["duplicate_of"] for r in result["results"]] == [indexed["cascade_uri"]] * 2
+    rows = _memories(batch_server)
+    assert [row["duplicate_of"] for row in rows] == [None, rows[0]["id"], rows[0]["id"]]
+
+
+def test_merge_into_session_of_same_batch(batch_server):
+    """A merge into a session of the batch is folded into that session's record."""
+    result = _store_batch(["retry-1", "retry-2", "retry-3"], "merge", tags=["ci"])
+
+    assert result["stored"] == 1 and result["deduplicated"] == 2
+    first, second, third = result["results"]
+    assert second["cascade_uri"] == third["cascade_uri"] == first["cascade_uri"]
+    assert second["indexed"] is True and second["dedup"]["duplicate_of"] == first["cascade_uri"]
+
+    rows = _memories(batch_server)
+    assert len(rows) == 1
+    assert json.loads(rows[0]["tags_json"]) == ["ci"]
+    assert json.loads(rows[0]["metadata_json"])["merged_sessions"] == ["retry-2", "retry-3"]
+
+
+def test_skip_of_unstored_batch_session_fails(batch_server, monkeypatch, tmp_path):
+    """A skip whose target in the batch failed to upload is reported as not stored."""
+    monkeypatch.setattr(server, "cascade", FailingPutCascade(cache_dir=tmp_path / "failing"))
+    result = _store_batch(["retry-1", "retry-2"], "skip")
+
+    first, second = result["results"]
+    assert first["ok"] is False and "upload failed" in first["error"]
+    assert second == {
+        "ok": False,
+        "error": "Near-duplicate session retry-1 in this batch was not stored",
+        "session_id": "retry-2",
+    }
+    assert result["failed"] == 2 and result["stored"] == 0
+    assert _memories(batch_server) == []
+
+
+def test_indexing_failure_fails_stored_and_merged_sessions(batch_server, monkeypatch):
+    """If the batch transaction fails, every session it would have indexed fails."""
+    indexed = _call("store_session_to_cascade", {"session_id": "retry-0"})
+
+    def fail(records, merges):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(server.index, "add_memories", fail)
+    result = _store_batch(["retry-1", "other-1", "other-2"], "merge")
+
+    assert result["stored"] == 0 and result["failed"] == 3
+    for entry in result["results"]:
+        assert entry["ok"] is False
+        assert entry["error"] == "Storage failed: indexing failed: disk full"
+    assert [row["pointer"] for row in _memories(batch_server)] == [indexed["cascade_uri"]]
+    assert "merged_sessions" not in json.loads(_memories(batch_server)[0]["metadata_json"])
+
+
+def test_duplicate_session_ids_are_rejected_per_entry(batch_server):
+    """A session ID listed twice is stored once; the repeat gets an error in place."""
+    result = _store_batch(["retry-1", "other-1", "retry-1"], "off")
+
+    assert result["stored"] == 2 and result["failed"] == 1
+    repeat = result["results"][2]
+    assert repeat == {
+        "ok": False,
+        "error": "Duplicate session_id in batch: retry-1",
+        "session_id": "retry-1",
+    }
+    assert [row["source_session_id"] for row in _memories(batch_server)] == ["retry-1", "other-1"]
@@ -70,3 +70,17 @@ def test_content_addressing_deterministic(temp_cache_dir):
     pointer2 = cascade.put(data)
 
     assert pointer1 == pointer2
+
+
+def test_get_range_reads_part_of_blob(temp_cache_dir):
+    """get_range() should return the requested slice, short at the end."""
+    cascade = MockCascadeConnector(cache_dir=temp_cache_dir / "cascade")
+    data = bytes(range(256)) * 4
+    pointer = cascade.put(data)
+
+    assert cascade.get_range(pointer, 0, 8) == data[:8]
+    assert cascade.get_range(pointer, 1000, 100) == data[1000:]
+    with pytest.raises(NotFoundError):
+        cascade.get_range("cascade://" + "0" * 64, 0, 8)
+    with pytest.raises(ValidationError):
+        cascade.get_range("../etc/passwd", 0, 8)
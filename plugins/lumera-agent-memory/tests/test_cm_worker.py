@@ -0,0 +1,129 @@
+"""Tests for CASS exports through a long-lived cm worker (with the fake cm)."""
+
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+import src.mcp_server as server
+from src.adapters import CASSAdapter
+from src.adapters.cass_memory_system import MAX_WORKER_FAILURES
+from src.cascade import MockCascadeConnector
+from src.index import MemoryIndex
+
+FAKE_CM = Path(__file__).parent / "fake_cm.py"
+WORKER = [sys.executable, str(FAKE_CM), "worker"]
+
+
+@pytest.fixture
+def fake_cm(tmp_path, monkeypatch):
+    """Put the fake `cm` first on PATH; returns its log of process starts."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    shim = bin_dir / "cm"
+    shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_CM}" "$@"\n')
+    shim.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    log = tmp_path / "cm.log"
+    monkeypatch.setenv("FAKE_CM_LOG", str(log))
+    return log
+
+
+def _starts(log: Path) -> list:
+    return [line.split()[0] for line in log.read_text().splitlines()] if log.exists() else []
+
+
+def test_per_call_exports_spawn_a_process_each(fake_cm):
+    """Without a worker every export runs `cm context` (the fallback mode)."""
+    adapter = CASSAdapter()
+    assert adapter.is_cm_available()
+
+    session = adapter.export_session("cm-001")
+    assert session["session_id"] == "cm-001" and session["tool_name"] == "fake-cm"
+    assert adapter.export_session("missing-001") is None
+    assert _starts(fake_cm) == ["context", "context"]
+    assert adapter.stats()["call_exports"] == 2
+
+
+def test_worker_serves_concurrent_exports_from_one_process(fake_cm):
+    """One worker process answers pipelined exports from several threads."""
+    adapter = CASSAdapter(worker_command=WORKER)
+    session_ids = [f"cm-{n:03d}" for n in range(40)]
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            sessions = list(pool.map(adapter.export_session, session_ids))
+        assert adapter.export_session("missing-001") is None
+        with pytest.raises(RuntimeError, match="cannot read session broken-001"):
+            adapter.export_session("broken-001")
+        stats = adapter.stats()
+    finally:
+        adapter.close()
+
+    assert [session["session_id"] for session in sessions] == session_ids
+    # Same sessions as per-call exports
+    assert sessions[0] == CASSAdapter().export_session("cm-000")
+    assert _starts(fake_cm) == ["worker", "context"]
+    assert stats == {
+        "worker_exports": 41,
+        "call_exports": 0,
+        "worker_failures": 0,
+        "last_worker_error": None,
+        "worker_running": 1,
+    }
+
+
+def test_worker_failures_fall_back_to_per_call(fake_cm, monkeypatch):
+    """A crashed worker is restarted; after repeated failures exports stay per call."""
+    monkeypatch.setenv("FAKE_CM_EXIT_AFTER", "2")
+    adapter = CASSAdapter(worker_command=WORKER)
+    try:
+        sessions = [adapter.export_session(f"cm-{n:03d}") for n in range(12)]
+    finally:
+        adapter.close()
+
+    assert all(
+        session is not None and session["session_id"] == f"cm-{n:03d}"
+        for n, session in enumerate(sessions)
+    )
+    stats = adapter.stats()
+    assert stats["worker_failures"] == MAX_WORKER_FAILURES
+    assert stats["worker_exports"] + stats["call_exports"] == 12
+    assert _starts(fake_cm).count("worker") == MAX_WORKER_FAILURES
+    assert stats["last_worker_error"].startswith("cm worker ")
+
+    # A worker command that cannot start leaves exports per call
+    adapter = CASSAdapter(worker_command=[str(FAKE_CM.parent / "no-such-worker")])
+    assert adapter.export_session("cm-001")["session_id"] == "cm-001"
+    assert adapter.stats()["worker_failures"] == 1 and adapter.stats()["call_exports"] == 1
+    assert adapter.stats()["last_worker_error"].startswith("cm worker failed to start")
+
+
+def test_batch_store_exports_through_one_worker(fake_cm, tmp_path, monkeypatch, mock_env_key):
+    """A batch store of many sessions starts one export process, not one per session."""
+    monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+    monkeypatch.setattr(server, "cascade", MockCascadeConnector(cache_dir=tmp_path / "cascade"))
+    monkeypatch.setattr(server, "cass", CASSAdapter(worker_command=WORKER))
+    monkeypatch.setattr(server, "METRICS_FILE", None)
+    session_ids = [f"cm-{n:03d}" for n in range(25)]
+    try:
+        result = json.loads(
+            asyncio.run(
+                server.call_tool(
+                    "store_sessions_to_cascade",
+                    {
+                        "session_ids": session_ids,
+                        "metadata": {"dedup_policy": "off"},
+                    },
+                )
+            )[0].text
+        )
+    finally:
+        server.cass.close()
+        server.index.close()
+
+    assert result["stored"] == 25, result
+    assert _starts(fake_cm) == ["worker"]
@@ -0,0 +1,55 @@
+"""Tests for payload codecs and the payload header."""
+
+import json
+
+import pytest
+
+from src.pipeline import (
+    PayloadCodec,
+    available_codecs,
+    decode_payload,
+    encode_payload,
+    register_codec,
+)
+
+PAYLOAD = {
+    "artifact_type": "raw_plus_artifact",
+    "memory_card": {
+        "title": 'Fixed "flaky" test',
+        "keywords": ["auth", "token"],
+        "confidence": 0.75,
+    },
+    "raw_session": {
+        "output": "line 1\nline 2 — naïve café ✓",
+        "exit_code": 1,
+        "success": False,
+        "extra": None,
+    },
+}
+
+
+@pytest.mark.parametrize("codec", ["json", "msgpack"])
+def test_codecs_roundtrip_with_header(codec):
+    """encode_payload() tags the codec; decode_payload() picks it from the header."""
+    if codec not in available_codecs():
+        pytest.skip(f"{codec} not installed")
+    encoded = encode_payload(PAYLOAD, codec)
+    assert encoded.startswith(b"LMP\x01")
+    assert decode_payload(encoded) == PAYLOAD
+
+
+def test_legacy_json_payloads_still_decode():
+    """Plaintext without a header is a legacy json.dumps() payload."""
+    assert decode_payload(json.dumps(PAYLOAD).encode("utf-8")) == PAYLOAD
+
+
+def test_unknown_codecs_are_rejected():
+    """Unknown codec names, tags and versions raise ValueError."""
+    with pytest.raises(ValueError):
+        encode_payload(PAYLOAD, "pickle")
+    with pytest.raises(ValueError):
+        decode_payload(b"LMP\x01\xfe{}")
+    with pytest.raises(ValueError):
+        decode_payload(b"LMP\x09\x01{}")
+    with pytest.raises(ValueError):
+        register_codec(PayloadCodec("other-json", 1, json.dumps, json.loads))
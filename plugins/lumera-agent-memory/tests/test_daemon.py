@@ -0,0 +1,268 @@
+"""Tests for the shared memory daemon and its stdio proxy."""
+
+import asyncio
+import json
+import os
+import stat
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import src.mcp_server as server
+from src import daemon
+from src.cascade import MockCascadeConnector
+from src.pipeline import ExecutionLayer
+from src.security import EncryptionError, decrypt_blob
+
+ROOT = Path(__file__).parent.parent
+
+INITIALIZE = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {},
+    "clientInfo": {"name": "test-daemon", "version": "0"},
+}
+
+
+async def _hello(socket_path: Path, fingerprint):
+    """Open a connection and send the proxy handshake; returns (reader, writer, response)."""
+    reader, writer = await asyncio.open_unix_connection(str(socket_path))
+    writer.write((json.dumps({"key_fingerprint": fingerprint}) + "\n").encode())
+    return reader, writer, json.loads(await reader.readline())
+
+
+async def _client_session(socket_path: Path, bytes_count: int) -> dict:
+    """One MCP session over the daemon socket: handshake, list tools, one call."""
+    reader, writer, accepted = await _hello(socket_path, daemon.key_fingerprint())
+    assert accepted == {"ok": True}
+
+    async def rpc(request_id, method, params):
+        writer.write(
+            (
+                json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+                + "\n"
+            ).encode()
+        )
+        while True:
+            message = json.loads(await reader.readline())
+            if message.get("id") == request_id:
+                return message
+
+    await rpc(1, "initialize", INITIALIZE)
+    writer.write(
+        (json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}) + "\n").encode()
+    )
+    tools = await rpc(2, "tools/list", {})
+    call = await rpc(
+        3, "tools/call", {"name": "estimate_storage_cost", "arguments": {"bytes": bytes_count}}
+    )
+    writer.close()
+    return {
+        "tools": [tool["name"] for tool in tools["result"]["tools"]],
+        "estimate": json.loads(call["result"]["content"][0]["text"]),
+    }
+
+
+@pytest.fixture
+def daemon_executors(monkeypatch):
+    """Fresh execution layer for an in-process daemon (which shuts it down on exit)."""
+    monkeypatch.setattr(
+        server, "executors", ExecutionLayer(io_workers=2, cpu_workers=1, query_workers=1)
+    )
+
+
+def test_daemon_serves_concurrent_sessions_and_exits_when_idle(tmp_path, daemon_executors):
+    """Clients share one daemon; it refuses a second owner and exits after idling."""
+    socket_path = tmp_path / "run" / "daemon.sock"
+
+    async def scenario():
+        serving = asyncio.ensure_future(daemon.serve(socket_path, idle_seconds=0.3))
+        while not socket_path.exists():
+            await asyncio.sleep(0.01)
+        assert daemon.lock_path(socket_path).read_text().strip() == str(os.getpid())
+
+        # A second daemon for the same socket gives way to the first
+        assert await daemon.serve(socket_path, idle_seconds=0.3) is False
+
+        sessions = await asyncio.gather(
+            *(_client_session(socket_path, n * 1024**3) for n in (1, 2, 3))
+        )
+        return sessions, await asyncio.wait_for(serving, timeout=10)
+
+    sessions, served = asyncio.run(scenario())
+    assert served is True
+    assert not socket_path.exists()
+    for n, session in zip((1, 2, 3), sessions):
+        assert "query_memories" in session["tools"]
+        assert session["estimate"]["ok"] and session["estimate"]["gb"] == n
+
+
+def test_daemon_replaces_stale_socket(tmp_path, daemon_executors):
+    """A socket file left by a crashed daemon does not block a new one."""
+    socket_path = tmp_path / "daemon.sock"
+    socket_path.write_text("")
+
+    async def scenario():
+        serving = asyncio.ensure_future(daemon.serve(socket_path, idle_seconds=0.3))
+        session = None
+        for _ in range(500):
+            try:
+                session = await _client_session(socket_path, 1024**3)
+                break
+            except (ConnectionRefusedError, FileNotFoundError):
+                await asyncio.sleep(0.01)
+        await serving
+        return session
+
+    assert asyncio.run(scenario())["estimate"]["ok"]
+
+
+def test_socket_is_private_and_clients_need_the_same_key(tmp_path, daemon_executors, monkeypatch):
+    """Under a permissive umask the socket is still 0600; other keys are turned away."""
+    monkeypatch.setenv("LUMERA_MEMORY_KEY", os.urandom(32).hex())
+    socket_path = tmp_path / "run" / "daemon.sock"
+    other_key = daemon.key_fingerprint(os.urandom(32).hex())
+    assert other_key != daemon.key_fingerprint() and daemon.key_fingerprint("") is None
+
+    async def scenario():
+        serving = asyncio.ensure_future(daemon.serve(socket_path, idle_seconds=0.3))
+        while not socket_path.exists():
+            await asyncio.sleep(0.01)
+        modes = (
+            stat.S_IMODE(socket_path.stat().st_mode),
+            stat.S_IMODE(socket_path.parent.stat().st_mode),
+        )
+
+        reader, writer, refused = await _hello(socket_path, other_key)
+        closed = await reader.read()
+        writer.close()
+        reader, writer = await asyncio.open_unix_connection(str(socket_path))
+        writer.write(b'{"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}\n')
+        no_hello = json.loads(await reader.readline())
+        writer.close()
+        session = await _client_session(socket_path, 1024**3)
+        await serving
+        return modes, refused, closed, no_hello, session
+
+    previous = os.umask(0o002)
+    try:
+        modes, refused, closed, no_hello, session = asyncio.run(scenario())
+    finally:
+        os.umask(previous)
+    assert modes == (0o600, 0o700)
+    assert refused == {"ok": False, "error": "daemon uses a different LUMERA_MEMORY_KEY"}
+    assert closed == b""
+    assert no_hello["ok"] is False
+    assert session["estimate"]["ok"]
+
+
+def test_connect_without_daemon(tmp_path):
+    """No daemon: connect() fails without autostart, stop() reports nothing to stop."""
+    socket_path = tmp_path / "daemon.sock"
+    with pytest.raises(daemon.DaemonError):
+        daemon.connect(socket_path, autostart=False)
+
+    # An unlocked lock file is stale, whatever pid it holds
+    daemon.lock_path(socket_path).write_text(f"{os.getpid()}\n")
+    assert daemon.stop(socket_path) is False
+
+
+def _proxy_session(workdir: Path, env: dict, session_id: str) -> dict:
+    """One agent session through `python -m src.daemon`: store, then query.
+
+    Returns the responses and the proxy's stderr.
+    """
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.daemon"],
+        cwd=workdir,
+        env=env,
+        text=True,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    def rpc(request_id, method, params):
+        proc.stdin.write(
+            json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            + "\n"
+        )
+        proc.stdin.flush()
+        while True:
+            line = proc.stdout.readline()
+            assert line, proc.stderr.read()
+            message = json.loads(line)
+            if message.get("id") == request_id:
+                return message
+
+    try:
+        rpc(1, "initialize", INITIALIZE)
+        proc.stdin.write(
+            json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}) + "\n"
+        )
+        store = rpc(
+            2,
+            "tools/call",
+            {"name": "store_session_to_cascade", "arguments": {"session_id": session_id}},
+        )
+        query = rpc(3, "tools/call", {"name": "query_memories", "arguments": {"query": "forecast"}})
+    finally:
+        proc.stdin.close()
+        assert proc.wait(timeout=10) == 0
+    return {
+        "store": json.loads(store["result"]["content"][0]["text"]),
+        "query": json.loads(query["result"]["content"][0]["text"]),
+        "stderr": proc.stderr.read(),
+    }
+
+
+def test_proxy_starts_and_shares_one_daemon(tmp_path):
+    """Proxies auto-start one daemon in their working directory and reuse it."""
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(ROOT),
+        LUMERA_MEMORY_KEY=os.urandom(32).hex(),
+        LUMERA_DAEMON_IDLE_S="30",
+    )
+    env.pop("LUMERA_DAEMON_SOCKET", None)
+    socket_path = tmp_path / ".cache" / "lumera-daemon.sock"
+
+    try:
+        first = _proxy_session(tmp_path, env, "test-session-001")
+        pid = daemon.lock_path(socket_path).read_text().strip()
+        second = _proxy_session(tmp_path, env, "test-session-002")
+        assert daemon.lock_path(socket_path).read_text().strip() == pid
+    finally:
+        assert daemon.stop(socket_path)
+
+    assert first["store"]["ok"] and second["store"]["ok"]
+    # The second session sees both memories through the daemon's one index
+    assert second["query"]["ok"] and len(second["query"]["hits"]) == 2
+    assert not socket_path.exists()
+
+
+def test_proxy_with_other_key_serves_in_process(tmp_path):
+    """A proxy whose LUMERA_MEMORY_KEY differs from the daemon's is not served by it."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT), LUMERA_DAEMON_IDLE_S="30")
+    env.pop("LUMERA_DAEMON_SOCKET", None)
+    socket_path = tmp_path / ".cache" / "lumera-daemon.sock"
+    first_key, other_key = os.urandom(32).hex(), os.urandom(32).hex()
+
+    try:
+        first = _proxy_session(tmp_path, dict(env, LUMERA_MEMORY_KEY=first_key), "test-session-001")
+        pid = daemon.lock_path(socket_path).read_text().strip()
+        other = _proxy_session(tmp_path, dict(env, LUMERA_MEMORY_KEY=other_key), "test-session-002")
+        assert daemon.lock_path(socket_path).read_text().strip() == pid
+    finally:
+        assert daemon.stop(socket_path)
+
+    assert first["stderr"] == ""
+    assert "different LUMERA_MEMORY_KEY; serving in-process" in other["stderr"]
+    assert other["store"]["ok"]
+    # Stored with the proxy's own key, not the daemon's
+    blobs = MockCascadeConnector(cache_dir=tmp_path / ".cache" / "cascade-mock")
+    blob = blobs.get(other["store"]["cascade_uri"])
+    assert decrypt_blob(blob, bytes.fromhex(other_key))
+    with pytest.raises(EncryptionError):
+        decrypt_blob(blob, bytes.fromhex(first_key))
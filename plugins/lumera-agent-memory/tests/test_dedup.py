@@ -0,0 +1,142 @@
+"""Tests for near-duplicate handling at store time (link, skip, merge)."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import src.mcp_server as server
+from src.cascade import MockCascadeConnector
+from src.index import MemoryIndex
+
+SUMMARY = (
+    "pytest tests/test_auth.py failed with status 1 after 4.2s. "
+    "AssertionError in test_token_refresh: expected 200, got 401. "
+    "Decided to pin the token clock skew to 30 seconds."
+)
+RAW_EXPORT = {"allow_raw_export": True, "raw_export_ack": "I understand the risk"}
+
+
+def _session(session_id):
+    return {
+        "session_id": session_id,
+        "timestamp": "2025-12-20T10:00:00Z",
+        "tool_name": "bash",
+        "success": False,
+        "summary": SUMMARY,
+        "tags": ["auth"],
+    }
+
+
+@pytest.fixture
+def dedup_server(tmp_path, monkeypatch, mock_env_key):
+    """Server with a fresh index whose CASS exports retries of one failing test."""
+    monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+    monkeypatch.setattr(server, "cascade", MockCascadeConnector(cache_dir=tmp_path / "cascade"))
+    monkeypatch.setattr(server, "cass", SimpleNamespace(export_session=_session))
+    monkeypatch.setattr(server, "METRICS_FILE", None)
+    yield server.index
+    server.index.close()
+
+
+def _store(session_id, policy, tags=None, **metadata):
+    return json.loads(
+        asyncio.run(
+            server.call_tool(
+                "store_session_to_cascade",
+                {
+                    "session_id": session_id,
+                    "tags": tags or [],
+                    "metadata": {"dedup_policy": policy, **metadata},
+                },
+            )
+        )[0].text
+    )
+
+
+def _rows(index):
+    return index.conn.execute(
+        "SELECT id, pointer, artifact_type, tags_json, metadata_json FROM memories ORDER BY id"
+    ).fetchall()
+
+
+def test_link_stores_and_points_at_cluster(dedup_server):
+    """link stores the duplicate as a new memory linked to the first one's cluster."""
+    first = _store("retry-1", "link")
+    second = _store("retry-2", "link")
+
+    assert first["ok"] and "dedup" not in first
+    assert second["ok"] and second["indexed"] is True
+    assert second["cascade_uri"] != first["cascade_uri"]
+    assert second["dedup"]["policy"] == "link"
+    assert second["dedup"]["duplicate_of"] == first["cascade_uri"]
+
+    rows = _rows(dedup_server)
+    assert len(rows) == 2
+    duplicate_of = dedup_server.conn.execute(
+        "SELECT duplicate_of FROM memory_sketches WHERE memory_id = ?", (rows[1]["id"],)
+    ).fetchone()[0]
+    assert duplicate_of == rows[0]["id"]
+
+
+def test_skip_returns_existing_pointer_without_storing(dedup_server):
+    """skip answers with the existing memory and stores nothing."""
+    first = _store("retry-1", "skip")
+    second = _store("retry-2", "skip", tags=["ci"])
+
+    assert second["ok"] is True
+    assert second["cascade_uri"] == first["cascade_uri"]
+    assert second["indexed"] is False
+    assert second["artifact_type"] == "artifact_only"
+    assert second["dedup"]["policy"] == "skip"
+    rows = _rows(dedup_server)
+    assert len(rows) == 1
+    assert json.loads(rows[0]["tags_json"]) == []
+
+
+def test_merge_folds_tags_and_session_into_existing(dedup_server):
+    """merge adds the duplicate's tags and session ID to the existing memory."""
+    first = _store("retry-1", "merge", tags=["auth"])
+    second = _store("retry-2", "merge", tags=["auth", "ci"])
+
+    assert second["ok"] is True
+    assert second["cascade_uri"] == first["cascade_uri"]
+    assert second["indexed"] is True
+    assert second["dedup"]["policy"] == "merge"
+    rows = _rows(dedup_server)
+    assert len(rows) == 1
+    assert json.loads(rows[0]["tags_json"]) == ["auth", "ci"]
+    assert json.loads(rows[0]["metadata_json"])["merged_sessions"] == ["retry-2"]
+
+
+@pytest.mark.parametrize("policy", ["skip", "merge"])
+def test_raw_export_is_not_collapsed_onto_artifact_only(dedup_server, policy):
+    """An opted-in raw export is stored even when an artifact-only near-duplicate exists."""
+    first = _store("retry-1", policy)
+    raw = _store("retry-2", policy, **RAW_EXPORT)
+
+    assert raw["ok"] is True and raw["indexed"] is True
+    assert raw["cascade_uri"] != first["cascade_uri"]
+    assert raw["artifact_type"] == "raw_plus_artifact"
+    assert "dedup" not in raw
+    assert [row["artifact_type"] for row in _rows(dedup_server)] == [
+        "artifact_only",
+        "raw_plus_artifact",
+    ]
+
+    # A second raw export is a duplicate of the raw one, not the artifact-only one
+    again = _store("retry-3", policy, **RAW_EXPORT)
+    assert again["cascade_uri"] == raw["cascade_uri"]
+    assert again["artifact_type"] == "raw_plus_artifact"
+    assert len(_rows(dedup_server)) == 2
+
+
+def test_link_crosses_artifact_types(dedup_server):
+    """link only records the relation, so it may point at another artifact type."""
+    first = _store("retry-1", "link")
+    raw = _store("retry-2", "link", **RAW_EXPORT)
+
+    assert raw["artifact_type"] == "raw_plus_artifact"
+    assert raw["dedup"]["duplicate_of"] == first["cascade_uri"]
+    assert len(_rows(dedup_server)) == 2
@@ -2,7 +2,16 @@
 
 import os
 import pytest
-from src.security import encrypt_blob, decrypt_blob, get_encryption_key, EncryptionError
+from src.security import (
+    encrypt_blob,
+    decrypt_blob,
+    get_encryption_key,
+    EncryptionError,
+    encrypt_sections,
+    decrypt_sections,
+    read_sections,
+    is_sectioned,
+)
 
 
 def test_encrypt_decrypt_roundtrip(mock_env_key):
@@ -75,3 +84,45 @@ def test_get_encryption_key_validates_length(monkeypatch):
 
     with pytest.raises(EncryptionError, match="must be 32 bytes"):
         get_encryption_key()
+
+
+def test_sections_roundtrip_and_ranged_reads(mock_env_key):
+    """A sectioned blob decrypts whole or one section at a time."""
+    sections = {"card": b'{"title": "t"}', "raw_session": os.urandom(1 << 20)}
+    blob = encrypt_sections(sections)
+
+    assert is_sectioned(blob) and not is_sectioned(encrypt_blob(b"x")[:3])
+    assert decrypt_sections(blob) == sections
+
+    # Reading the card touches the header, the TOC and the card only
+    reads = []
+
+    def read(offset, length):
+        reads.append(length)
+        return blob[offset:offset + length]
+
+    assert read_sections(read, ["card"]) == {"card": sections["card"]}
+    assert len(reads) == 3 and sum(reads) < 512
+
+    with pytest.raises(EncryptionError):
+        decrypt_sections(blob, ["missing"])
+    with pytest.raises(EncryptionError):
+        decrypt_sections(encrypt_blob(b"legacy"))
+
+
+def test_sections_fail_when_tampered_or_swapped(mock_env_key):
+    """Sections are authenticated alone and bound to their blob and name."""
+    blob = encrypt_sections({"card": b"card", "raw_session": b"raw"})
+    with pytest.raises(EncryptionError):
+        decrypt_sections(blob[:-1] + bytes([blob[-1] ^ 1]))
+    # The untouched card section still reads
+    assert decrypt_sections(blob[:-1] + bytes([blob[-1] ^ 1]), ["card"]) == {"card": b"card"}
+
+    # The same sections moved into another blob do not authenticate
+    other = encrypt_sections({"card": b"card", "raw_session": b"raw"})
+    header_size = len(other) - len(b"card") - len(b"raw") - 2 * 28
+    with pytest.raises(EncryptionError):
+        decrypt_sections(other[:header_size] + blob[header_size:])
+
+    with pytest.raises(EncryptionError):
+        decrypt_sections(blob, key=os.urandom(32))
@@ -0,0 +1,220 @@
+"""Golden tests: the enrichment engine must match the per-field extractors exactly."""
+
+import random
+import sys
+import threading
+
+import pytest
+
+from src.adapters.fixtures import FIXTURE_SESSIONS
+from src.enrich import generate_memory_card
+from src.enrich import memory_card as legacy
+from src.enrich.engine import TextAnalysis, enrich_text
+from src.enrich.incremental import EnrichmentState, enrich_incremental
+
+EXTRACTORS = {
+    "decisions": legacy.extract_decisions,
+    "todos": legacy.extract_todos,
+    "entities": legacy.extract_entities,
+    "keywords": legacy.extract_keywords,
+    "notable_quotes": legacy.extract_notable_quotes,
+}
+
+# fmt: off
+VOCAB = [
+    "decided to", "chose", "will", "going to", "approved", "rejected", "TODO:", "FIXME:",
+    "action:", "need to", "must", "should", "next steps:", "Action Items:", "Lumera Protocol",
+    "Cascade Storage Layer", "SQLite", "MCP-Server", "pytest", "numpy", "cache", "index",
+    "'quoted phrase here'", '"another quoted phrase"', "'", '"', ".", "!", "?", "\n",
+    "the", "and", "İstanbul", "ſecret", "KelvinK", "naïve", "café", "x", "y",
+]
+# fmt: on
+
+
+def _golden_texts():
+    texts = ["", "short", "a " * 50]
+    for session in FIXTURE_SESSIONS.values():
+        texts.append(
+            " ".join(
+                str(session.get(k, "")) for k in ("summary", "tool_name", "error_message", "output")
+            )
+        )
+    rng = random.Random(32)
+    ascii_vocab = [w for w in VOCAB if w.isascii()]
+    for i in range(300):
+        # Alternate ASCII-only texts (anchor-skipping path) and mixed texts (full scans)
+        vocab = ascii_vocab if i % 2 else VOCAB
+        texts.append(" ".join(rng.choice(vocab) for _ in range(rng.randint(5, 400))))
+    texts.append("plain log line without any extractor keywords " * 20)
+    # Many frequency ties: order must follow first occurrence
+    texts.append(" ".join(f"w{chr(97 + i % 26)}{chr(97 + i // 26)}x" for i in range(200)))
+    return texts
+
+
+GOLDEN = _golden_texts()
+
+
+@pytest.mark.parametrize("index", range(len(GOLDEN)))
+def test_engine_matches_extractors(index):
+    text = GOLDEN[index]
+    expected = {field: fn(text) for field, fn in EXTRACTORS.items()}
+    assert enrich_text(text) == expected
+
+
+def test_memory_card_unchanged():
+    """generate_memory_card output equals the field-by-field composition."""
+    for session in FIXTURE_SESSIONS.values():
+        full_text = " ".join(
+            str(session[k])
+            for k in ("summary", "tool_name", "error_message", "output")
+            if session.get(k)
+        )
+        card = generate_memory_card(session)
+        for field, fn in EXTRACTORS.items():
+            assert card[field] == fn(full_text)
+        assert list(card) == [
+            "title",
+            "summary_bullets",
+            "decisions",
+            "todos",
+            "entities",
+            "keywords",
+            "notable_quotes",
+        ]
+
+
+def test_analysis_tokenizes_once():
+    analysis = TextAnalysis("Cache cache CACHE index")
+    assert analysis.tokens is analysis.tokens
+    assert analysis.term_counts == {"cache": 3, "index": 1}
+    assert analysis.scan_start(("index", "cache")) == 0
+    assert analysis.scan_start(("todo",)) == -1
+    assert TextAnalysis("İ todo").scan_start(("todo",)) == 0
+
+
+def test_tfidf_demotes_corpus_wide_terms():
+    from src.index import DocumentFrequencies
+
+    text = "session session session error error pandas"
+    assert enrich_text(text)["keywords"] == ["session", "error", "pandas"]
+
+    df = DocumentFrequencies({"session": 99, "error": 30}, docs=100)
+    assert enrich_text(text, df=df)["keywords"] == ["pandas", "error", "session"]
+
+    # Empty corpus: every idf is 1, so ranking matches plain term frequency
+    empty = DocumentFrequencies()
+    for text in GOLDEN[:50]:
+        assert enrich_text(text, df=empty)["keywords"] == legacy.extract_keywords(text)
+
+
+def _backfill_sessions():
+    return [
+        {"session_id": f"s{i}", "summary": GOLDEN[i], "output": GOLDEN[(i * 7) % len(GOLDEN)]}
+        for i in range(len(GOLDEN))
+    ]
+
+
+def test_batch_cards_match_single_session():
+    from collections import Counter
+
+    from src.enrich import generate_memory_cards
+    from src.index import DocumentFrequencies
+
+    sessions = _backfill_sessions()
+    df = DocumentFrequencies(
+        Counter(w for t in GOLDEN for w in set(t.lower().split())), len(GOLDEN)
+    )
+    for snapshot in (None, df):
+        expected = [generate_memory_card(s, df=snapshot) for s in sessions]
+        assert generate_memory_cards(sessions, df=snapshot) == expected
+
+
+def test_batch_cards_across_processes():
+    from concurrent.futures import ProcessPoolExecutor
+
+    from src.enrich import generate_memory_cards
+    from src.index import DocumentFrequencies
+
+    sessions = _backfill_sessions()[:40]
+    df = DocumentFrequencies({"decided": 30, "cache": 5}, docs=40)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        cards = generate_memory_cards(sessions, df=df, executor=pool, chunksize=7)
+    assert cards == [generate_memory_card(s, df=df) for s in sessions]
+
+
+def test_idf_memo_resets_on_new_documents():
+    from src.index import DocumentFrequencies
+
+    df = DocumentFrequencies({"cache": 1}, docs=1)
+    before = df.idf_many(["cache", "index"])
+    df.add_document(["index"])
+    assert df.idf_many(["cache", "index"]) == [df.idf("cache"), df.idf("index")]
+    assert df.idf_many(["index"]) != [before[1]]
+
+
+def test_idf_lookups_race_with_new_documents():
+    """Stores rank against a snapshot while other stores add to it: no lookup may fail."""
+    from src.index import DocumentFrequencies
+
+    df = DocumentFrequencies({}, docs=0)
+    terms = [f"term{n}" for n in range(200)]
+    errors = []
+    done = threading.Event()
+
+    def rank():
+        try:
+            while not done.is_set():
+                assert len(df.idf_many(terms)) == len(terms)
+        except Exception as e:  # noqa: BLE001 - reported below
+            errors.append(e)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        rankers = [threading.Thread(target=rank) for _ in range(4)]
+        for thread in rankers:
+            thread.start()
+        for n in range(2000):
+            df.add_document(terms[n % 10 : n % 10 + 5])
+        done.set()
+        for thread in rankers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert df.idf_many(terms) == [df.idf(term) for term in terms]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_incremental_matches_full_enrichment(seed):
+    """Folding a growing text chunk by chunk must give the full-text result every time."""
+    rng = random.Random(seed)
+    vocab = VOCAB if seed % 2 else [w for w in VOCAB if w.isascii()]
+    text, state = "", None
+    for _ in range(rng.randint(2, 12)):
+        chunk = " ".join(rng.choice(vocab) for _ in range(rng.randint(0, 60)))
+        # Cut mid-word sometimes, so chunks do not end on a barrier
+        text += chunk[: rng.randint(0, len(chunk))] if rng.random() < 0.3 else chunk + " "
+        # Round-trip through JSON like the index does
+        restored = EnrichmentState.from_dict(state.to_dict()) if state else None
+        extracted, state, term_counts = enrich_incremental(text, restored)
+        analysis = TextAnalysis(text)
+        assert extracted == enrich_text(text)
+        assert list(term_counts.items()) == list(analysis.term_counts.items())
+
+
+def test_incremental_scans_only_the_delta():
+    """A resumed state starts scanning near the end of the previous text."""
+    text = "Decided to pin numpy. TODO: add backoff. " + "ran step and it passed.\n" * 2000
+    _, state, _ = enrich_incremental(text)
+    grown = text + "Will retry the Cascade upload tomorrow. "
+    extracted, resumed, _ = enrich_incremental(grown, state)
+    assert resumed.resumed
+    assert resumed.scanned_from >= len(text) - 50
+    assert extracted == enrich_text(grown)
+
+    # Text that does not extend the old one is enriched from scratch
+    changed = "Chose a different plan. " + grown
+    extracted, fresh, _ = enrich_incremental(changed, resumed)
+    assert not fresh.resumed
+    assert extracted == enrich_text(changed)
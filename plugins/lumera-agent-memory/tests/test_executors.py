@@ -0,0 +1,70 @@
+"""Tests for the execution layer (pools and read-over-bulk priority)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.pipeline import ExecutionLayer, PriorityGate
+
+
+def test_bulk_work_waits_for_running_reads():
+    """bulk_turn() should return once reads finish, or after bulk_max_wait."""
+    gate = PriorityGate(bulk_max_wait=0.5)
+
+    async def scenario():
+        order = []
+
+        async def read():
+            async with gate.read():
+                await asyncio.sleep(0.05)
+                order.append("read")
+
+        async def bulk():
+            await asyncio.sleep(0)  # let the read start first
+            await gate.bulk_turn()
+            order.append("bulk")
+
+        await asyncio.gather(read(), bulk())
+        return order
+
+    assert asyncio.run(scenario()) == ["read", "bulk"]
+    assert gate.bulk_waits == 1 and gate.reads == 0
+
+    # A read that never ends cannot starve bulk work
+    gate = PriorityGate(bulk_max_wait=0.02)
+
+    async def starved():
+        async with gate.read():
+            started = time.perf_counter()
+            await gate.bulk_turn()
+            return time.perf_counter() - started
+
+    assert 0.015 < asyncio.run(starved()) < 0.5
+
+
+def test_execution_layer_runs_work_off_the_event_loop():
+    """Each pool runs its calls in its own threads; the loop thread stays free."""
+    layer = ExecutionLayer(io_workers=2, cpu_workers=1, query_workers=1)
+    loop_thread = threading.get_ident()
+
+    def where(tag):
+        return tag, threading.current_thread().name, threading.get_ident()
+
+    async def scenario():
+        return await asyncio.gather(
+            layer.run_io(where, "io"),
+            layer.run_cpu(where, "cpu"),
+            layer.run_query(where, tag="query"),
+        )
+
+    try:
+        for tag, name, ident in asyncio.run(scenario()):
+            assert name.startswith(f"lumera-{tag}")
+            assert ident != loop_thread
+    finally:
+        layer.shutdown()
+
+    with pytest.raises(ValueError):
+        ExecutionLayer(cpu_mode="fiber")
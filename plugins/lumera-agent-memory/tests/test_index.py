@@ -1,5 +1,9 @@
 """Tests for local SQLite index."""
 
+import sqlite3
+import threading
+import time
+
 import pytest
 from pathlib import Path
 from src.index import MemoryIndex
@@ -92,3 +96,342 @@ def test_delete_memory(temp_cache_dir):
 
     memory = index.get_memory_by_pointer(pointer)
     assert memory is None
+
+
+def test_document_frequencies_incremental(temp_cache_dir):
+    """add_memory(terms=...) maintains DF; deletes take terms back out."""
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+
+    index.add_memory("cascade://ptr1", "hash1", terms=["session", "error", "pandas"])
+    index.add_memory("cascade://ptr2", "hash2", terms=["session", "error", "error"])
+    index.add_memory("cascade://ptr3", "hash3")  # No terms: not part of the DF corpus
+
+    df = index.document_frequencies()
+    assert df.docs == 2
+    assert df.counts == {"session": 2, "error": 2, "pandas": 1}
+
+    index.delete_memory("cascade://ptr1")
+    df = index.document_frequencies()
+    assert df.docs == 1
+    assert df.counts == {"session": 1, "error": 1}
+
+    index.delete_memory("cascade://ptr3")
+    assert index.document_frequencies().docs == 1
+
+
+def test_document_frequencies_cache_refresh(temp_cache_dir):
+    """Own inserts update the cached snapshot in place; other writers force a reload."""
+    db_path = temp_cache_dir / "test.db"
+    index = MemoryIndex(db_path=db_path)
+    other = MemoryIndex(db_path=db_path)
+
+    df = index.document_frequencies()
+    index.add_memory("cascade://ptr1", "hash1", terms=["cache"])
+    assert index.document_frequencies() is df
+    assert df.counts == {"cache": 1}
+
+    other.add_memory("cascade://ptr2", "hash2", terms=["cache", "index"])
+    refreshed = index.document_frequencies()
+    assert refreshed is not df
+    assert refreshed.docs == 2
+    assert refreshed.counts == {"cache": 2, "index": 1}
+
+
+def _add_cards(index):
+    index.add_memory(
+        "cascade://auth", "h1", tags=["prod"], title="JWT auth token validation failing",
+        snippet="Decode error in auth service | rolled back", source_tool="debugger",
+    )
+    index.add_memory(
+        "cascade://forecast", "h2", tags=["ml"], title="Baseline forecast with AutoETS",
+        snippet="Chose AutoETS for production", source_tool="forecaster",
+    )
+    index.add_memory(
+        "cascade://backup", "h3", tags=["ops"], title="Synced forecast results to BigQuery",
+        snippet="TODO: automated backups", source_tool="sync",
+    )
+
+
+def test_vector_search_finds_partial_matches(temp_cache_dir):
+    """FTS5 needs every term; vector search ranks partial overlap."""
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    _add_cards(index)
+
+    assert index.query_memories(query="auth token bug") == []
+
+    hits = index.query_memories(query="auth token bug", search_mode="vector")
+    assert [h["pointer"] for h in hits] == ["cascade://auth"]
+    assert 0 < hits[0]["score"] <= 1
+
+    # Inflections overlap through character n-grams
+    hits = index.query_memories(query="forecasting", search_mode="vector")
+    assert hits[0]["pointer"] == "cascade://forecast"
+
+
+def test_hybrid_search_fuses_rankings_and_filters(temp_cache_dir):
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    _add_cards(index)
+
+    hits = index.query_memories(query="forecast", search_mode="hybrid")
+    assert {h["pointer"] for h in hits} == {"cascade://forecast", "cascade://backup"}
+    assert hits[0]["score"] >= hits[1]["score"]
+
+    hits = index.query_memories(query="forecast", tags=["ops"], search_mode="hybrid")
+    assert [h["pointer"] for h in hits] == ["cascade://backup"]
+
+    # Lexical query + tag filter (tags_json exists in both joined tables)
+    hits = index.query_memories(query="forecast", tags=["ops"])
+    assert [h["pointer"] for h in hits] == ["cascade://backup"]
+
+    hits = index.query_memories(query="forecast", search_mode="vector", limit=1, offset=1)
+    assert len(hits) == 1
+
+    with pytest.raises(ValueError):
+        index.query_memories(query="forecast", search_mode="semantic")
+
+
+@pytest.mark.parametrize("query", ['"forecast', "forecast AND", "forecast)"])
+def test_hybrid_search_survives_fts_syntax_errors(temp_cache_dir, query):
+    """A query FTS5 cannot parse still gets the vector ranking in hybrid mode."""
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    _add_cards(index)
+
+    with pytest.raises(sqlite3.OperationalError):
+        index.query_memories(query=query)
+
+    hits = index.query_memories(query=query, search_mode="hybrid")
+    vector = index.query_memories(query=query, search_mode="vector", limit=len(hits))
+    assert hits and [h["pointer"] for h in hits] == [h["pointer"] for h in vector]
+
+
+def test_vector_cache_tracks_writes(temp_cache_dir):
+    db_path = temp_cache_dir / "test.db"
+    index = MemoryIndex(db_path=db_path)
+    other = MemoryIndex(db_path=db_path)
+    _add_cards(index)
+    assert len(index.query_memories(query="auth token", search_mode="vector")) == 1
+
+    other.add_memory("cascade://auth2", "h4", title="Auth token refresh bug")
+    assert len(index.query_memories(query="auth token", search_mode="vector")) == 2
+
+    index.delete_memory("cascade://auth")
+    hits = index.query_memories(query="auth token", search_mode="vector")
+    assert [h["pointer"] for h in hits] == ["cascade://auth2"]
+
+
+def test_vector_scan_without_numpy(monkeypatch):
+    """The pure-Python scan ranks like the NumPy scan."""
+    from src.index import vectors
+
+    texts = ["auth token bug", "jwt validation", "forecast model", "auth service outage", "backup"]
+    matrix = vectors.VectorMatrix(
+        (i, vectors.quantize(vectors.embed_text(t))) for i, t in enumerate(texts)
+    )
+    query = vectors.embed_text("auth token")
+    with_numpy = matrix.search(query, k=3)
+    monkeypatch.setattr(vectors, "np", None)
+    without = matrix.search(query, k=3)
+
+    assert [i for i, _ in without] == [i for i, _ in with_numpy]
+    assert [round(s, 4) for _, s in without] == [round(s, 4) for _, s in with_numpy]
+    assert len(vectors.quantize(query)) == vectors.VECTOR_DIM
+
+
+def _retry_card(status, seconds):
+    """Memory card of one run of a flaky test (varies only in status/timing)."""
+    return {
+        "summary_bullets": [
+            "Tool: bash (failed)",
+            f"pytest tests/test_auth.py failed with status {status} after {seconds}s",
+            "AssertionError in test_token_refresh: expected 200",
+        ],
+        "keywords": ["pytest", "auth", "token", "refresh", "assertionerror"],
+    }
+
+
+def test_near_duplicates_found_by_band_lookup(temp_cache_dir):
+    """Retried sessions should match each other but not unrelated memories."""
+    from src.index.sketch import simhash64, sketch_text
+
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    _add_cards(index)
+    first = index.add_memory(
+        "cascade://retry1", "h4", title="test_token_refresh failing",
+        metadata={"memory_card": _retry_card(1, 4.2)},
+    )
+
+    signature = simhash64(sketch_text("test_token_refresh failing", None, _retry_card(2, 3.9)))
+    matches = index.find_near_duplicates(signature)
+    assert [m["pointer"] for m in matches] == ["cascade://retry1"]
+    assert matches[0]["cluster_id"] == first
+    assert index.find_near_duplicates(signature, artifact_type="raw_plus_artifact") == []
+
+    # A linked duplicate points at the cluster's first memory
+    index.add_memory(
+        "cascade://retry2", "h5", title="test_token_refresh failing",
+        metadata={"memory_card": _retry_card(2, 3.9)}, duplicate_of=first,
+    )
+    assert {m["cluster_id"] for m in index.find_near_duplicates(signature)} == {first}
+
+    # Sketch rows go away with their memory
+    index.delete_memory("cascade://retry1")
+    assert [m["pointer"] for m in index.find_near_duplicates(signature)] == ["cascade://retry2"]
+
+
+def test_query_collapses_duplicate_clusters(temp_cache_dir):
+    """collapse_duplicates should keep one hit per cluster and honor limit."""
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    first = index.add_memory("cascade://retry0", "h0", title="flaky token refresh test")
+    for i in range(1, 12):
+        index.add_memory(
+            f"cascade://retry{i}", f"h{i}", title="flaky token refresh test", duplicate_of=first
+        )
+    index.add_memory("cascade://other", "hx", title="token cache warmup")
+
+    assert len(index.query_memories(query="token", limit=5)) == 5
+    collapsed = index.query_memories(query="token", limit=5, collapse_duplicates=True)
+    pointers = [m["pointer"] for m in collapsed]
+    assert len(pointers) == 2
+    assert "cascade://other" in pointers
+    assert sum(p.startswith("cascade://retry") for p in pointers) == 1
+
+
+def test_merge_into_unions_tags(temp_cache_dir):
+    """merge_into() should add new tags and record the merged session."""
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    memory_id = index.add_memory("cascade://m", "h", tags=["ci"], source_session_id="s1")
+
+    assert index.merge_into(memory_id, ["ci", "flaky"], "s2")
+    memory = index.get_memory_by_pointer("cascade://m")
+    assert memory["tags"] == ["ci", "flaky"]
+    assert memory["metadata"]["merged_sessions"] == ["s2"]
+    assert index.query_memories(tags=["flaky"])[0]["pointer"] == "cascade://m"
+    assert not index.merge_into(999, ["x"], "s3")
+
+
+def test_enrichment_state_tracks_latest_version(temp_cache_dir):
+    """Each stored version replaces the session's state and bumps its version."""
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    assert index.get_enrichment_state("grow") is None
+
+    index.add_memory(
+        "cascade://v1", "h1", source_session_id="grow", enrichment_state={"length": 10}
+    )
+    index.add_memory(
+        "cascade://v2", "h2", source_session_id="grow", enrichment_state={"length": 25}
+    )
+    latest = index.get_enrichment_state("grow")
+    assert latest["pointer"] == "cascade://v2"
+    assert latest["version"] == 2
+    assert latest["state"] == {"length": 25}
+
+    # Deleting the version the state belongs to drops the state
+    index.delete_memory("cascade://v2")
+    assert index.get_enrichment_state("grow") is None
+
+
+def test_add_memories_single_transaction(temp_cache_dir):
+    """add_memories() should write all records and merges, or nothing."""
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    target = index.add_memory("cascade://old", "h0", tags=["ci"], source_session_id="s0")
+    index.document_frequencies()
+
+    ids = index.add_memories(
+        [
+            {
+                "pointer": "cascade://a",
+                "content_hash": "ha",
+                "title": "flaky token test",
+                "terms": ["token"],
+            },
+            {
+                "pointer": "cascade://b",
+                "content_hash": "hb",
+                "title": "flaky token test",
+                "duplicate_of_record": 0,
+            },
+            {"pointer": "cascade://c", "content_hash": "hc", "duplicate_of": target},
+        ],
+        merges=[(target, ["flaky"], "s9")],
+    )
+    assert len(ids) == 3 and index.count_memories() == 4
+    assert index.get_memory_by_pointer("cascade://old")["tags"] == ["ci", "flaky"]
+    assert index.document_frequencies().counts["token"] == 1
+    # The in-batch duplicate joined the first record's cluster
+    assert len(index.query_memories(query="token")) == 2
+    assert len(index.query_memories(query="token", collapse_duplicates=True)) == 1
+
+    # A failing record rolls back the whole batch, merges included
+    with pytest.raises(sqlite3.IntegrityError):
+        index.add_memories(
+            [
+                {"pointer": "cascade://d", "content_hash": "hd"},
+                {"pointer": "cascade://a", "content_hash": "ha"},
+            ],
+            merges=[(target, ["lost"], "s10")],
+        )
+    assert index.count_memories() == 4
+    assert index.get_memory_by_pointer("cascade://d") is None
+    assert "lost" not in index.get_memory_by_pointer("cascade://old")["tags"]
+    with pytest.raises(ValueError):
+        index.add_memories(
+            [{"pointer": "cascade://e", "content_hash": "he", "duplicate_of_record": 0}]
+        )
+
+
+def test_queries_read_committed_state_during_open_write(temp_cache_dir):
+    """A search must not wait for another thread's open write transaction."""
+    index = MemoryIndex(db_path=temp_cache_dir / "test.db")
+    index.add_memory("cascade://committed", "h0", title="token refresh")
+    assert len(index.query_memories(query="token", search_mode="vector")) == 1
+
+    writing, release = threading.Event(), threading.Event()
+
+    def long_write():
+        with index._lock:
+            index._insert_memory(
+                index._prepare_memory("cascade://pending", "h1", title="token pending")
+            )
+            writing.set()
+            release.wait(5)
+            index.conn.commit()
+
+    writer = threading.Thread(target=long_write)
+    writer.start()
+    try:
+        assert writing.wait(5)
+        started = time.perf_counter()
+        hits = index.query_memories(query="token")
+        assert time.perf_counter() - started < 1
+        assert [m["pointer"] for m in hits] == ["cascade://committed"]
+    finally:
+        release.set()
+        writer.join()
+
+    # Committed rows show up in searches, vector cache included
+    assert len(index.query_memories(query="token")) == 2
+    assert len(index.query_memories(query="token", search_mode="vector")) == 2
+
+
+def test_schema_script_runs_only_for_other_versions(temp_cache_dir):
+    """Opening a database at the current schema version skips schema.sql."""
+    db_path = temp_cache_dir / "test.db"
+    index = MemoryIndex(db_path=db_path)
+    index.conn.execute("DROP TABLE memory_vectors")
+    index.conn.commit()
+    index.close()
+
+    index = MemoryIndex(db_path=db_path)
+    tables = {
+        row[0] for row in index.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    assert "memory_vectors" not in tables
+    index.conn.execute("PRAGMA user_version = 0")
+    index.conn.commit()
+    index.close()
+
+    # Any other version (older database, edited schema.sql) re-runs the script
+    index = MemoryIndex(db_path=db_path)
+    index.add_memory("cascade://x", "h", title="token refresh")
+    assert len(index.query_memories(query="token", search_mode="vector")) == 1
+    assert index.conn.execute("PRAGMA user_version").fetchone()[0] != 0
@@ -0,0 +1,178 @@
+"""Tests for stage latency histograms, counters and the metrics tool."""
+
+import asyncio
+import json
+
+import pytest
+
+import src.mcp_server as server
+from src.cascade import MockCascadeConnector
+from src.index import MemoryIndex
+from src.metrics import Histogram, Metrics
+
+
+def test_histogram_buckets_and_quantiles():
+    """Values land in fixed buckets; quantiles interpolate within [min, max]."""
+    histogram = Histogram(bounds=(1, 10, 100))
+    for value in (0.5, 2, 3, 4, 50, 500):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 3, 1, 1]
+    snapshot = histogram.snapshot(include_buckets=True)
+    assert snapshot["count"] == 6 and snapshot["sum_ms"] == 559.5
+    assert snapshot["min_ms"] == 0.5 and snapshot["max_ms"] == 500
+    assert snapshot["buckets"] == {"1": 1, "10": 3, "100": 1, "+Inf": 1}
+    assert 1 <= snapshot["p50_ms"] <= 10
+    assert snapshot["p99_ms"] <= 500
+
+    single = Histogram(bounds=(1, 10))
+    single.observe(7)
+    assert single.quantile(0.5) == 7
+
+
+def test_sampling_off_keeps_counters_only():
+    """Unsampled calls time nothing; bytes and events are still exact."""
+    metrics = Metrics(sample_rate=0.0)
+    trace = metrics.trace("store")
+    with trace.stage("encrypt"):
+        pass
+    trace.record("redact", 0.001)
+    trace.add_bytes("encrypt", 100)
+    trace.count("blob_reused")
+    trace.finish(ok=True)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["latency_ms"] == {}
+    assert snapshot["bytes"] == {"store": {"encrypt": 100}}
+    assert snapshot["events"] == {"store": {"blob_reused": 1, "ok": 1}}
+
+    metrics = Metrics(sample_rate=1.0)
+    trace = metrics.trace("retrieve")
+    with trace.stage("get"):
+        pass
+    trace.finish(ok=False)
+    latency = metrics.snapshot()["latency_ms"]["retrieve"]
+    assert latency["get"]["count"] == 1 and latency["total"]["count"] == 1
+    assert metrics.snapshot()["events"]["retrieve"] == {"error": 1}
+
+    metrics.reset()
+    assert metrics.snapshot()["latency_ms"] == {} and metrics.snapshot()["events"] == {}
+
+
+def test_prometheus_text(tmp_path):
+    """Cumulative buckets in seconds, counters, collector gauges, one block per metric."""
+    metrics = Metrics(buckets_ms=(1, 10))
+    metrics.add_collector("memo", lambda: {"hits": 3, "hit_ratio": 0.5})
+    metrics.add_collector(
+        "prefilter",
+        lambda: {"email": {"checked": 4, "skipped": 1}, "ipv4": {"checked": 2, "skipped": 2}},
+    )
+    trace = metrics.trace("store")
+    trace.record("encrypt", 0.0005)
+    trace.record("encrypt", 0.005)
+    trace.record("encrypt", 0.05)
+    trace.add_bytes("encrypt", 2048)
+
+    text = metrics.prometheus_text()
+    assert (
+        'lumera_stage_latency_seconds_bucket{operation="store",stage="encrypt",le="0.001"} 1'
+        in text
+    )
+    assert (
+        'lumera_stage_latency_seconds_bucket{operation="store",stage="encrypt",le="0.01"} 2' in text
+    )
+    assert (
+        'lumera_stage_latency_seconds_bucket{operation="store",stage="encrypt",le="+Inf"} 3' in text
+    )
+    assert 'lumera_stage_latency_seconds_count{operation="store",stage="encrypt"} 3' in text
+    assert 'lumera_stage_bytes_total{operation="store",stage="encrypt"} 2048' in text
+    assert "lumera_memo_hits 3" in text
+    assert 'lumera_prefilter_skipped{key="ipv4"} 2' in text
+
+    # The exposition format wants the samples of a metric in one block
+    names = [
+        line.split("{")[0].split(" ")[0] for line in text.splitlines() if not line.startswith("#")
+    ]
+    names = [
+        name.rsplit("_bucket", 1)[0].rsplit("_sum", 1)[0].rsplit("_count", 1)[0] for name in names
+    ]
+    blocks = [name for i, name in enumerate(names) if i == 0 or names[i - 1] != name]
+    assert len(blocks) == len(set(blocks))
+
+    path = tmp_path / "textfile" / "lumera.prom"
+    metrics.write_prometheus(path)
+    assert path.read_text() == text
+    assert [p.name for p in path.parent.iterdir()] == ["lumera.prom"]
+
+
+@pytest.fixture
+def metered_server(tmp_path, monkeypatch, mock_env_key):
+    """Server with a fresh index, blob store and zeroed metrics."""
+    monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+    monkeypatch.setattr(server, "cascade", MockCascadeConnector(cache_dir=tmp_path / "cascade"))
+    monkeypatch.setattr(server, "METRICS_FILE", str(tmp_path / "lumera.prom"))
+    server.metrics.reset()
+    server.derivation_cache.clear()
+    yield tmp_path
+    server.index.close()
+
+
+def test_metrics_tool_reports_store_and_retrieve_stages(metered_server):
+    """get_memory_metrics shows every stage a store and a retrieval went through."""
+
+    async def call(name, arguments):
+        return json.loads((await server.call_tool(name, arguments))[0].text)
+
+    async def scenario():
+        preview = await call(
+            "store_session_to_cascade",
+            {"session_id": "demo-bug-report", "metadata": {"dry_run": True}},
+        )
+        stored = await call("store_session_to_cascade", {"session_id": "demo-bug-report"})
+        await call("retrieve_session_from_cascade", {"cascade_uri": stored["cascade_uri"]})
+        await call(
+            "retrieve_session_from_cascade",
+            {"cascade_uri": stored["cascade_uri"], "card_only": True},
+        )
+        await call("retrieve_session_from_cascade", {"cascade_uri": "cascade://" + "0" * 64})
+        report = await call("get_memory_metrics", {"reset": True})
+        exported = (metered_server / "lumera.prom").read_text()
+        return preview, stored, report, exported, await call("get_memory_metrics", {})
+
+    preview, stored, report, exported, after_reset = asyncio.run(scenario())
+    assert preview["ok"] and stored["ok"]
+    assert report["ok"]
+
+    store = report["latency_ms"]["store"]
+    for stage in (
+        "export",
+        "lookup",
+        "redact",
+        "card",
+        "dedup",
+        "serialize",
+        "encrypt",
+        "put",
+        "index",
+        "total",
+    ):
+        assert store[stage]["count"] >= 1, stage
+    assert store["total"]["count"] == 2
+    # The store reused the dry run's derivation and blob
+    assert store["redact"]["count"] == 1 and store["encrypt"]["count"] == 1
+    assert report["events"]["store"] == {"blob_reused": 1, "derivation_cached": 1, "ok": 2}
+    assert report["bytes"]["store"]["put"] == stored["crypto"]["bytes"]
+
+    retrieve = report["latency_ms"]["retrieve"]
+    for stage in ("lookup", "get", "decrypt", "hash", "parse"):
+        assert retrieve[stage]["count"] >= 1, stage
+    assert report["events"]["retrieve"] == {"served_from_index": 1, "ok": 2, "error": 1}
+    assert report["bytes"]["retrieve"]["get"] == stored["crypto"]["bytes"]
+
+    for section in ("redaction_memo", "derivation_cache", "prefilter", "gate"):
+        assert section in report
+    assert report["derivation_cache"]["hits"] >= 1
+
+    assert report["prometheus_file"] == str(metered_server / "lumera.prom")
+    assert 'lumera_stage_latency_seconds_count{operation="retrieve",stage="decrypt"} 1' in exported
+    assert after_reset["latency_ms"] == {}
@@ -8,11 +8,15 @@ Validates:
 - Query returns URIs and snippets based on memory_card
 """
 
+import asyncio
 import json
 import os
 import pytest
 import tempfile
 from pathlib import Path
+from types import SimpleNamespace
+
+import src.mcp_server as server
 
 from src.security import redact_session, RedactionError
 from src.index import MemoryIndex
@@ -404,5 +408,79 @@ class TestE2EPrivacyFirstWorkflow:
                    True  # Email was in original, redacted in memory_card generation
 
 
+class TestPlaintextIndex:
+    """The local index is plaintext: it must not hold text the payload drops."""
+
+    SESSION = {
+        "session_id": "plain-001",
+        "timestamp": "2025-12-22T12:00:00Z",
+        "tool_name": "deployer",
+        "summary": "Rollout finished after a retry.",
+        "output": "login alicesmith password hunterpass",
+        "error_message": "Jane Doe at Acme rejected the change",
+    }
+
+    def test_store_keeps_discarded_fields_out_of_index_tables(
+        self, tmp_path, monkeypatch, mock_env_key
+    ):
+        """memory_terms only holds terms of the redacted, allowlisted fields."""
+        monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+        monkeypatch.setattr(server, "cascade", MockCascadeConnector(cache_dir=tmp_path / "cascade"))
+        monkeypatch.setattr(
+            server, "cass", SimpleNamespace(export_session=lambda _: dict(self.SESSION))
+        )
+        monkeypatch.setattr(server, "METRICS_FILE", None)
+        try:
+            result = json.loads(asyncio.run(server.call_tool(
+                "store_session_to_cascade", {"session_id": "plain-001"}
+            ))[0].text)
+            assert result["ok"], result
+            terms = {row[0] for row in server.index.conn.execute("SELECT term FROM memory_terms")}
+        finally:
+            server.index.close()
+
+        assert {"deployer", "rollout", "retry"} <= terms
+        assert not terms & {"alicesmith", "hunterpass", "login", "password", "jane", "doe", "acme"}
+
+    def test_enrichment_state_is_sealed_and_still_resumes(
+        self, tmp_path, monkeypatch, mock_env_key
+    ):
+        """Incremental extractor state is encrypted in the index; a grown session resumes."""
+        session = dict(self.SESSION)
+        monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+        monkeypatch.setattr(server, "cascade", MockCascadeConnector(cache_dir=tmp_path / "cascade"))
+        monkeypatch.setattr(server, "cass", SimpleNamespace(export_session=lambda _: dict(session)))
+        monkeypatch.setattr(server, "METRICS_FILE", None)
+        monkeypatch.setattr(server, "INCREMENTAL_CARDS", True)
+
+        def store():
+            return json.loads(
+                asyncio.run(
+                    server.call_tool(
+                        "store_session_to_cascade",
+                        {"session_id": "plain-001", "metadata": {"dedup_policy": "off"}},
+                    )
+                )[0].text
+            )
+
+        try:
+            first = store()
+            session["output"] += " Decided to rotate the deploy credentials tonight. "
+            second = store()
+            states = [
+                row[0]
+                for row in server.index.conn.execute("SELECT state_json FROM enrichment_state")
+            ]
+        finally:
+            server.index.close()
+
+        assert first["enrichment"]["resumed"] is False
+        assert second["enrichment"]["resumed"] is True
+        assert second["enrichment"]["card_version"] == 2
+        assert len(states) == 1
+        for secret in ("alicesmith", "hunterpass", "term_counts", "text_sha256"):
+            assert secret not in states[0]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
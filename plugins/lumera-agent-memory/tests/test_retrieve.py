@@ -0,0 +1,276 @@
+"""Tests for retrieving memories (card_only from the index, batch retrieve tool)."""
+
+import asyncio
+import json
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+import src.mcp_server as server
+from src.cascade import MockCascadeConnector
+from src.index import MemoryIndex
+
+MISSING_URI = "cascade://" + "0" * 64
+RAW_EXPORT = {"allow_raw_export": True, "raw_export_ack": "I understand the risk"}
+
+
+class CountingCascade(MockCascadeConnector):
+    """Blob store that counts reads and can make some whole-blob reads slow."""
+
+    def __init__(self, cache_dir):
+        super().__init__(cache_dir=cache_dir)
+        self.gets = Counter()
+        self.ranges = Counter()
+        self.slow = {}
+
+    def get_range(self, pointer, offset, length):
+        self.ranges[pointer] += 1
+        return super().get_range(pointer, offset, length)
+
+    def get(self, pointer):
+        self.gets[pointer] += 1
+        time.sleep(self.slow.get(pointer, 0))
+        return super().get(pointer)
+
+
+def _session(session_id):
+    return {
+        "session_id": session_id,
+        "timestamp": "2025-12-20T10:00:00Z",
+        "tool_name": "bash",
+        "success": True,
+        "summary": f"Session {session_id}: rebuilt the {session_id} cache and reran the suite.",
+    }
+
+
+@pytest.fixture
+def stored(tmp_path, monkeypatch, mock_env_key):
+    """Server with three stored sessions; returns their pointers in store order."""
+    monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+    monkeypatch.setattr(server, "cascade", CountingCascade(tmp_path / "cascade"))
+    monkeypatch.setattr(server, "cass", SimpleNamespace(export_session=_session))
+    monkeypatch.setattr(server, "METRICS_FILE", None)
+    pointers = []
+    for session_id in ("alpha", "bravo", "charlie"):
+        result = _call(
+            "store_session_to_cascade",
+            {
+                "session_id": session_id,
+                "metadata": {"dedup_policy": "off"},
+            },
+        )
+        assert result["ok"], result
+        pointers.append(result["cascade_uri"])
+    server.cascade.gets.clear()
+    server.cascade.ranges.clear()
+    yield pointers
+    server.index.close()
+
+
+def _call(name, arguments):
+    return json.loads(asyncio.run(server.call_tool(name, arguments))[0].text)
+
+
+def _retrieve(cascade_uri, **arguments):
+    return _call("retrieve_session_from_cascade", {"cascade_uri": cascade_uri, **arguments})
+
+
+def _retrieve_batch(cascade_uris, **arguments):
+    return _call("retrieve_sessions_from_cascade", {"cascade_uris": cascade_uris, **arguments})
+
+
+def _set_index_column(cascade_uri, column, value):
+    server.index.conn.execute(
+        f"UPDATE memories SET {column} = ? WHERE pointer = ?", (value, cascade_uri)
+    )
+    server.index.conn.commit()
+
+
+def _store_raw(session_id):
+    result = _call(
+        "store_session_to_cascade",
+        {
+            "session_id": session_id,
+            "metadata": {"dedup_policy": "off", **RAW_EXPORT},
+        },
+    )
+    assert result["ok"] and result["artifact_type"] == "raw_plus_artifact", result
+    server.cascade.gets.clear()
+    server.cascade.ranges.clear()
+    return result["cascade_uri"]
+
+
+def test_card_only_is_served_from_index(stored):
+    """card_only answers from the index copy of the card without reading Cascade."""
+    raw_uri = _store_raw("delta")
+    result = _retrieve(raw_uri, card_only=True)
+
+    assert result["ok"] and result["source"] == "index"
+    assert result["artifact_type"] == "raw_plus_artifact"
+    assert result["artifact"]["session_id"] == "delta"
+    assert "raw_session" not in result["artifact"]
+    assert result["crypto"]["verified"] is False
+    assert not server.cascade.gets and not server.cascade.ranges
+
+    # The card is the one stored in the blob
+    full = _retrieve(raw_uri)
+    assert full["source"] == "cascade" and full["crypto"]["verified"] is True
+    assert full["artifact"]["raw_session"]["session_id"] == "delta"
+    assert result["artifact"]["memory_card"] == full["artifact"]["memory_card"]
+    assert result["crypto"]["ciphertext_sha256"] == full["crypto"]["ciphertext_sha256"]
+
+
+def test_card_only_falls_back_to_cascade_without_index_card(stored):
+    """Memories indexed without a card copy are read from Cascade, still without raw_session."""
+    alpha = stored[0]
+    raw_uri = _store_raw("delta")
+    for cascade_uri in (alpha, raw_uri):
+        _set_index_column(cascade_uri, "metadata_json", json.dumps({}))
+
+    plain = _retrieve(alpha, card_only=True)
+    assert plain["ok"] and plain["source"] == "cascade" and plain["crypto"]["verified"] is True
+    assert plain["artifact"]["session_id"] == "alpha"
+    assert server.cascade.gets[alpha] == 1
+
+    # A sectioned raw export: only the card section is read and decrypted
+    raw = _retrieve(raw_uri, card_only=True)
+    assert raw["ok"] and raw["source"] == "cascade"
+    assert "raw_session" not in raw["artifact"]
+    assert raw["artifact"]["memory_card"]["title"]
+    assert server.cascade.gets[raw_uri] == 0 and server.cascade.ranges[raw_uri] > 0
+
+
+def test_mismatched_content_hash_fails_integrity_check(stored):
+    """A blob whose SHA-256 differs from the indexed content_hash is rejected."""
+    alpha, bravo, _ = stored
+    _set_index_column(alpha, "content_hash", "f" * 64)
+
+    result = _retrieve(alpha)
+    assert result["ok"] is False
+    assert result["error"].startswith("Integrity check failed: blob sha256 ")
+    assert result["error"].endswith(f"does not match indexed content_hash {'f' * 64}")
+
+    batch = _retrieve_batch([alpha, bravo])
+    assert batch["results"][0]["error"].startswith("Integrity check failed")
+    assert batch["results"][1]["ok"] is True
+    assert (batch["retrieved"], batch["failed"]) == (1, 1)
+
+
+def test_batch_card_only_served_from_index(stored):
+    """Batch card_only reads no blobs for indexed cards and fetches the rest."""
+    alpha, bravo, charlie = stored
+    _set_index_column(charlie, "metadata_json", json.dumps({}))
+
+    result = _retrieve_batch([alpha, bravo, charlie, MISSING_URI], card_only=True)
+
+    assert [r.get("source") for r in result["results"]] == ["index", "index", "cascade", None]
+    assert result["results"][3]["error"] == f"Cascade URI not found: {MISSING_URI}"
+    read = set(server.cascade.gets) | set(server.cascade.ranges)
+    assert charlie in read and not read & {alpha, bravo}
+    assert result["total_bytes"] == len(MockCascadeConnector.get(server.cascade, charlie))
+
+
+def test_batch_results_in_input_order(stored):
+    """Results line up with the input pointers, whatever order fetches finish in."""
+    alpha, bravo, charlie = stored
+    server.cascade.slow[alpha] = 0.1
+    result = _retrieve_batch([charlie, alpha, bravo])
+
+    assert result["ok"] and result["retrieved"] == 3 and result["failed"] == 0
+    assert [r["cascade_uri"] for r in result["results"]] == [charlie, alpha, bravo]
+    assert [r["artifact"]["session_id"] for r in result["results"]] == ["charlie", "alpha", "bravo"]
+    assert all(r["crypto"]["verified"] for r in result["results"])
+
+
+def test_repeated_pointer_is_fetched_once(stored):
+    """A pointer listed several times is fetched and decrypted once."""
+    alpha, bravo, _ = stored
+    result = _retrieve_batch([alpha, bravo, alpha, alpha])
+
+    assert result["retrieved"] == 4
+    assert server.cascade.gets == {alpha: 1, bravo: 1}
+    assert result["results"][0]["artifact"] == result["results"][2]["artifact"]
+    # Each listed pointer counts against the byte budget
+    assert result["total_bytes"] == 3 * len(server.cascade.get(alpha)) + len(
+        server.cascade.get(bravo)
+    )
+
+
+def test_byte_budget_skips_the_rest_and_cancels_their_fetches(stored):
+    """From the first blob over budget on, pointers are skipped and pending fetches cancelled."""
+    alpha, bravo, charlie = stored
+    sizes = [len(MockCascadeConnector.get(server.cascade, uri)) for uri in stored]
+    server.cascade.slow[charlie] = 1.0
+
+    started = time.perf_counter()
+    result = _retrieve_batch(stored, max_total_bytes=sizes[0] + sizes[1] - 1)
+    elapsed = time.perf_counter() - started
+
+    first, second, third = result["results"]
+    assert first["ok"] and first["artifact"]["session_id"] == "alpha"
+    assert second == {
+        "ok": False,
+        "skipped": True,
+        "error": f"Byte budget exhausted: {sizes[1]} bytes would exceed "
+        f"max_total_bytes={sizes[0] + sizes[1] - 1} ({sizes[0]} used)",
+        "cascade_uri": bravo,
+    }
+    assert third == {
+        "ok": False,
+        "skipped": True,
+        "error": "Byte budget exhausted",
+        "cascade_uri": charlie,
+    }
+    assert (result["retrieved"], result["skipped"], result["failed"]) == (1, 2, 0)
+    assert result["total_bytes"] == sizes[0]
+    # The slow fetch was not waited for
+    assert elapsed < 0.8
+
+    # A budget of 0 skips everything; exactly enough retrieves everything
+    assert _retrieve_batch(stored, max_total_bytes=0)["skipped"] == 3
+    assert _retrieve_batch([alpha, bravo], max_total_bytes=sizes[0] + sizes[1])["retrieved"] == 2
+
+
+def test_per_pointer_errors(stored):
+    """Missing and malformed pointers fail on their own; the rest are retrieved."""
+    alpha = stored[0]
+    result = _retrieve_batch([MISSING_URI, alpha, "cascade://../etc/passwd"])
+
+    missing, found, invalid = result["results"]
+    assert missing == {
+        "ok": False,
+        "error": f"Cascade URI not found: {MISSING_URI}",
+        "cascade_uri": MISSING_URI,
+    }
+    assert found["ok"] and found["cascade_uri"] == alpha
+    assert invalid["ok"] is False and invalid["error"].startswith("Invalid Cascade URI: ")
+    assert invalid["cascade_uri"] == "cascade://../etc/passwd"
+    assert (result["ok"], result["retrieved"], result["failed"]) == (True, 1, 2)
+
+
+@pytest.mark.parametrize(
+    "arguments, error",
+    [
+        ({"mode": "live"}, server.LIVE_MODE_ERROR),
+        ({"max_total_bytes": -1}, "max_total_bytes must be a non-negative integer, got -1"),
+        ({"max_total_bytes": 1.5}, "max_total_bytes must be a non-negative integer, got 1.5"),
+        ({"max_total_bytes": "100"}, "max_total_bytes must be a non-negative integer, got '100'"),
+        ({"max_total_bytes": True}, "max_total_bytes must be a non-negative integer, got True"),
+    ],
+)
+def test_argument_validation(stored, arguments, error):
+    """Invalid calls fail as a whole, before anything is fetched."""
+    result = _retrieve_batch(stored, **arguments)
+    assert result["ok"] is False and error in result["error"]
+    assert "results" not in result
+    assert not server.cascade.gets
+
+
+def test_pointer_limit(stored, monkeypatch):
+    """More than MAX_BATCH_RETRIEVE pointers are rejected."""
+    monkeypatch.setattr(server, "MAX_BATCH_RETRIEVE", 2)
+    result = _retrieve_batch(stored)
+    assert result == {"ok": False, "error": "Too many pointers: 3 (max 2 per call)"}
+    assert _retrieve_batch(stored[:2])["retrieved"] == 2
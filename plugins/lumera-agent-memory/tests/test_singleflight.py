@@ -0,0 +1,211 @@
+"""Tests for coalescing concurrent identical retrievals and queries."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+import src.mcp_server as server
+from src.cascade import MockCascadeConnector
+from src.index import MemoryIndex
+from src.pipeline import AdmissionController, SingleFlight, Ticket, flight_key
+
+
+def test_flight_key_normalizes_arguments():
+    """Keyword and dict key order do not change a key; values and operation do."""
+    assert flight_key("query", query="x", time_range={"start": "a", "end": "b"}) == flight_key(
+        "query", time_range={"end": "b", "start": "a"}, query="x"
+    )
+    assert flight_key("query", query="x") != flight_key("query", query="y")
+    assert flight_key("query", query="x") != flight_key("retrieve", query="x")
+
+
+def test_concurrent_calls_share_one_execution():
+    """Callers with the same key await the first caller's call, results and errors alike."""
+    flights = SingleFlight()
+    started = []
+
+    async def work(value):
+        started.append(value)
+        await asyncio.sleep(0.05)
+        if value == "boom":
+            raise ValueError(value)
+        return {"value": value}
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(flights.do("a", work, "first") for _ in range(4)), flights.do("b", work, "other")
+        )
+        errors = await asyncio.gather(
+            *(flights.do("c", work, "boom") for _ in range(2)), return_exceptions=True
+        )
+        # Completed flights are not cached
+        again = await flights.do("a", work, "second")
+        return results, errors, again
+
+    results, errors, again = asyncio.run(scenario())
+    assert started == ["first", "other", "boom", "second"]
+    assert [joined for _, joined in results] == [False, True, True, True, False]
+    assert all(result is results[0][0] for result, _ in results[:4])
+    assert results[4][0] == {"value": "other"}
+    assert [type(e) for e in errors] == [ValueError, ValueError]
+    assert again == ({"value": "second"}, False)
+    assert flights.stats() == {"calls": 4, "coalesced": 4, "in_flight": 0}
+
+
+def test_cancelled_caller_and_forget():
+    """A cancelled caller leaves the flight running; forget() starts later calls afresh."""
+    flights = SingleFlight()
+    runs = []
+
+    async def work(n):
+        runs.append(n)
+        await asyncio.sleep(0.05)
+        return n
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("k", work, 1))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flights.do("k", work, 2))
+        await asyncio.sleep(0)
+        first.cancel()
+        joined_result = await second
+
+        early = asyncio.ensure_future(flights.do("k", work, 3))
+        await asyncio.sleep(0)
+        flights.forget()
+        late = await flights.do("k", work, 4)
+        return joined_result, await early, late
+
+    assert asyncio.run(scenario()) == ((1, True), (3, False), (4, False))
+    assert runs == [1, 3, 4]
+
+
+class SlowCascade(MockCascadeConnector):
+    """Blob store whose full reads take a while and are counted."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gets = 0
+
+    def get(self, pointer):
+        self.gets += 1
+        time.sleep(0.05)
+        return super().get(pointer)
+
+
+@pytest.fixture
+def coalescing_server(tmp_path, monkeypatch, mock_env_key):
+    """Server with a fresh index, a slow blob store and zeroed metrics."""
+    monkeypatch.setattr(server, "index", MemoryIndex(db_path=tmp_path / "index.db"))
+    monkeypatch.setattr(server, "cascade", SlowCascade(cache_dir=tmp_path / "cascade"))
+    monkeypatch.setattr(server, "METRICS_FILE", None)
+    monkeypatch.setattr(server, "flights", SingleFlight())
+    server.metrics.reset()
+    yield tmp_path
+    server.index.close()
+
+
+async def _call(name, arguments):
+    return json.loads((await server.call_tool(name, arguments))[0].text)
+
+
+def test_concurrent_retrievals_fetch_once(coalescing_server):
+    """Agents pulling the same memory at once share one fetch and decryption."""
+
+    async def scenario():
+        stored = await _call("store_session_to_cascade", {"session_id": "demo-bug-report"})
+        uri = stored["cascade_uri"]
+        together = await asyncio.gather(
+            *(_call("retrieve_session_from_cascade", {"cascade_uri": uri}) for _ in range(5))
+        )
+        alone = await _call("retrieve_session_from_cascade", {"cascade_uri": uri})
+        return together, alone
+
+    together, alone = asyncio.run(scenario())
+    assert all(result["ok"] for result in together + [alone])
+    assert all(result == together[0] for result in together)
+    assert together[0]["artifact"] == alone["artifact"]
+    # One shared fetch for the five concurrent calls, one for the later call
+    assert server.cascade.gets == 2
+
+    report = server.metrics.snapshot()
+    assert report["events"]["retrieve"] == {"coalesced": 4, "ok": 6}
+    assert report["latency_ms"]["retrieve"]["decrypt"]["count"] == 2
+    assert report["singleflight"] == {"calls": 2, "coalesced": 4, "in_flight": 0}
+
+
+def test_joined_retrievals_charge_their_own_tickets(coalescing_server, monkeypatch):
+    """Each caller of a flight is charged the bytes; a cancelled first caller leaks nothing."""
+    monkeypatch.setattr(
+        server,
+        "admission",
+        AdmissionController(
+            {"retrieve_session_from_cascade": 0},
+            max_bytes=1024 * 1024,
+            byte_tools=("retrieve_session_from_cascade",),
+        ),
+    )
+    charges = []
+    charge = Ticket.charge
+
+    def recording_charge(ticket, nbytes):
+        charges.append((ticket._released, nbytes))
+        charge(ticket, nbytes)
+
+    monkeypatch.setattr(Ticket, "charge", recording_charge)
+
+    async def scenario():
+        stored = await _call("store_session_to_cascade", {"session_id": "demo-bug-report"})
+        charges.clear()
+        arguments = {"cascade_uri": stored["cascade_uri"]}
+        first = asyncio.ensure_future(_call("retrieve_session_from_cascade", arguments))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(_call("retrieve_session_from_cascade", arguments))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    result = asyncio.run(scenario())
+    assert result["ok"] and server.cascade.gets == 1
+    blob_size = len(MockCascadeConnector.get(server.cascade, result["cascade_uri"]))
+    # The caller that got the result was charged, while its call was admitted
+    assert charges == [(False, blob_size)]
+    assert server.admission.bytes_in_flight == 0
+    assert server.metrics.snapshot()["events"]["retrieve"]["coalesced"] == 1
+
+
+def test_concurrent_queries_run_once_and_stores_end_flights(coalescing_server, monkeypatch):
+    """Identical queries share one index query; a finished store is never missed."""
+    runs = []
+    query_memories = server.index.query_memories
+
+    def slow_query(**kwargs):
+        runs.append(kwargs)
+        time.sleep(0.05)
+        return query_memories(**kwargs)
+
+    monkeypatch.setattr(server.index, "query_memories", slow_query)
+
+    async def scenario():
+        await _call("store_session_to_cascade", {"session_id": "test-session-001"})
+        together = await asyncio.gather(
+            _call("query_memories", {"query": "forecast"}),
+            _call("query_memories", {"query": "forecast", "limit": 10}),
+            _call("query_memories", {"query": "forecast", "search_mode": "vector"}),
+        )
+
+        # A query that started before a store finished is not joined afterwards
+        before = asyncio.ensure_future(_call("query_memories", {"query": "forecast"}))
+        await asyncio.sleep(0.01)
+        await _call("store_session_to_cascade", {"session_id": "test-session-002"})
+        after = await _call("query_memories", {"query": "forecast"})
+        return together, await before, after
+
+    together, before, after = asyncio.run(scenario())
+    assert together[0] == together[1] and len(together[0]["hits"]) == 1
+    assert together[2]["ok"]
+    assert len(runs) == 4
+    assert before["ok"] and len(after["hits"]) == 2
+    assert server.metrics.snapshot()["events"]["query"] == {"coalesced": 1}
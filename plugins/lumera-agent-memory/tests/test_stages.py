@@ -0,0 +1,79 @@
+"""Tests for the staged pipeline runner (bounded queues between stages)."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.pipeline import Stage, StageFailure, run_stages
+
+
+def test_outcomes_in_input_order_with_early_exit_and_failures():
+    """Each item gets its own outcome: result, finished item or StageFailure."""
+
+    def parse(item):
+        if item == "bad":
+            raise ValueError("cannot parse")
+        return {"value": int(item)}
+
+    def check(job):
+        if job["value"] % 3 == 0:
+            job["skipped"] = True
+            return None
+        return job
+
+    def double(job):
+        return job["value"] * 2
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        outcomes = asyncio.run(
+            run_stages(
+                ["1", "2", "bad", "3", "4"],
+                [
+                    Stage("parse", parse, 3, pool),
+                    Stage("check", check),
+                    Stage("double", double, 2, pool),
+                ],
+                queue_depth=1,
+            )
+        )
+
+    assert outcomes[0] == 2 and outcomes[1] == 4 and outcomes[4] == 8
+    assert isinstance(outcomes[2], StageFailure) and outcomes[2].stage == "parse"
+    assert outcomes[3] == {"value": 3, "skipped": True}
+    assert asyncio.run(run_stages([], [Stage("parse", parse)])) == []
+
+
+def test_io_stages_overlap_and_queues_bound_work_in_flight():
+    """Slow I/O stages run concurrently; no more than the queues allow is in flight."""
+    lock = threading.Lock()
+    started, done, peak = [0], [0], [0]
+
+    def fetch(item):
+        with lock:
+            started[0] += 1
+            peak[0] = max(peak[0], started[0] - done[0])
+        time.sleep(0.02)
+        return item
+
+    def slow_consume(item):
+        time.sleep(0.01)
+        done[0] += 1
+        return item
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        begin = time.perf_counter()
+        outcomes = asyncio.run(
+            run_stages(
+                list(range(40)),
+                [Stage("fetch", fetch, 8, pool), Stage("consume", slow_consume, 1, pool)],
+                queue_depth=2,
+            )
+        )
+        elapsed = time.perf_counter() - begin
+
+    assert outcomes == list(range(40))
+    # Sequential would take 40 * 30 ms; fetches hide behind the consumer
+    assert elapsed < 40 * 0.03 * 0.75
+    # Items between fetch start and consume: 8 fetching + 2 queued + 1 consuming
+    assert peak[0] <= 8 + 2 + 1